@@ -0,0 +1,266 @@
+"""Benchmarks for the Zilch AI lab.
+
+`python -m ai_lab.benchmarks run` times the rules, EV solver and simulator hot
+paths and prints (or writes) a JSON report. `python -m ai_lab.benchmarks
+compare BASELINE CURRENT` lists metrics that got worse by more than a
+threshold and exits non-zero if there are any.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from random import Random
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+from .zilch_ai import rules
+from .zilch_ai.batch import simulate_batch
+from .zilch_ai.caching import clear_caches, warm_up
+from .zilch_ai.ev import EVTable
+from .zilch_ai.policies import EVPolicy, GreedyThresholdPolicy, Policy, RandomPolicy
+from .zilch_ai.rules import NUM_DICE, dice_from_counts, multinomial_outcomes, score_options
+from .zilch_ai.sim import play_game
+
+
+EV_SETTINGS = ((2_000, 3), (4_000, 5), (8_000, 7))
+LOWER_IS_BETTER = ("seconds", "seconds_per_game", "peak_kib", "peak_kib_per_game")
+HIGHER_IS_BETTER = ("games_per_second",)
+
+
+def lineups() -> dict[str, list[Policy]]:
+    table = EVTable()
+    return {
+        "greedy-750 vs greedy-1000": [GreedyThresholdPolicy(750), GreedyThresholdPolicy(1000)],
+        "ev vs greedy-750": [EVPolicy(table), GreedyThresholdPolicy(750)],
+        "ev vs greedy-1000": [EVPolicy(table), GreedyThresholdPolicy(1000)],
+        "ev vs random": [EVPolicy(table), RandomPolicy()],
+    }
+
+
+def best_time(setup: Callable[[], Any], run: Callable[[], Any], repeat: int) -> float:
+    """Smallest wall time of `run` over `repeat` tries, calling `setup` untimed before each."""
+    best = float("inf")
+    for _ in range(repeat):
+        setup()
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def all_rolls() -> list[tuple[int, ...]]:
+    return [dice_from_counts(counts) for n in range(1, NUM_DICE + 1) for counts, _ in multinomial_outcomes(n)]
+
+
+def rules_benchmarks(repeat: int) -> dict[str, dict[str, float]]:
+    """Time `score_options` over every count vector, cold and warm.
+
+    Cold clears the process caches first, so it includes mapping the cached
+    score index from disk; `score_index.compile` builds it from scratch.
+    """
+    rolls = all_rolls()
+
+    def score_all() -> None:
+        for dice in rolls:
+            score_options(dice)
+
+    def clear() -> None:
+        clear_caches("rules.score_index", "rules.described_options")
+
+    def clear_outcomes() -> None:
+        clear_caches("rules.multinomial_outcomes")
+
+    def enumerate_outcomes() -> None:
+        for num_dice in range(NUM_DICE + 1):
+            multinomial_outcomes(num_dice)
+
+    report = {
+        "score_options.cold": {"seconds": best_time(clear, score_all, repeat), "rolls": len(rolls)},
+        "score_options.warm": {"seconds": best_time(lambda: None, score_all, repeat), "rolls": len(rolls)},
+        "score_options.described": {
+            "seconds": best_time(lambda: clear_caches("rules.described_options"), lambda: [score_options(d, describe=True) for d in rolls], 1),
+            "rolls": len(rolls),
+        },
+        "score_index.compile": {"seconds": best_time(lambda: clear_caches("rules.described_options"), rules.compile_score_index, repeat)},
+        "multinomial_outcomes": {"seconds": best_time(clear_outcomes, enumerate_outcomes, repeat)},
+    }
+    clear()
+    return report
+
+
+def ev_benchmarks(repeat: int, settings: Sequence[tuple[int, int]] = EV_SETTINGS) -> dict[str, dict[str, float]]:
+    """Time solving each `(max_loose, horizon)` table and loading it from disk."""
+
+    def clear() -> None:
+        clear_caches("ev.outcome_summaries", "ev.transitions")
+
+    report = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for max_loose, horizon in settings:
+            solve = best_time(clear, lambda: EVTable(max_loose, horizon, cache=False), repeat)
+            EVTable(max_loose, horizon, cache=cache_dir)
+            load = best_time(lambda: None, lambda: EVTable(max_loose, horizon, cache=cache_dir), repeat)
+            report[f"ev_table.solve[{max_loose},{horizon}]"] = {"seconds": solve}
+            report[f"ev_table.load[{max_loose},{horizon}]"] = {"seconds": load}
+    return report
+
+
+def allocation_benchmark(policies: Sequence[Policy], games: int, seed: int = 20260617) -> dict[str, float]:
+    """Measure per-game time and memory churn of `play_game`.
+
+    Lazily built rule tables are warmed first. `peak_kib_per_game` is the traced
+    heap peak above the starting level while a game runs, which grows with the
+    number of live temporaries. `retained_blocks` counts allocated blocks still
+    alive after all games and a collection; beyond entries added to bounded
+    caches such as `EVTable.decisions`, it should stay near zero.
+    """
+    rng = Random(seed)
+    seeds = [rng.randrange(2**32) for _ in range(games)]
+    warm_up()
+    for game_seed in seeds[:10]:
+        play_game(policies, seed=game_seed)
+    gc.collect()
+
+    blocks_before = sys.getallocatedblocks()
+    started = time.perf_counter()
+    for game_seed in seeds:
+        play_game(policies, seed=game_seed)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks_before
+
+    peak_total = 0
+    tracemalloc.start()
+    try:
+        for game_seed in seeds:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            play_game(policies, seed=game_seed)
+            peak_total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "games": games,
+        "games_per_second": games / elapsed,
+        "seconds_per_game": elapsed / games,
+        "peak_kib_per_game": peak_total / games / 1024,
+        "retained_blocks": retained,
+    }
+
+
+def batch_benchmark(policies: Sequence[Policy], games: int, seed: int = 20260617) -> dict[str, float]:
+    """Games per second and traced peak memory of one `simulate_batch` run."""
+    simulate_batch(policies, min(games, 64), seed)
+    gc.collect()
+    started = time.perf_counter()
+    simulate_batch(policies, games, seed)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        simulate_batch(policies, games, seed)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"games": games, "games_per_second": games / elapsed, "peak_kib": peak / 1024}
+
+
+def run_suite(games: int = 200, batch_games: int = 4_096, repeat: int = 3) -> dict[str, Any]:
+    results: dict[str, dict[str, float]] = {}
+    results.update(rules_benchmarks(repeat))
+    results.update(ev_benchmarks(repeat))
+    for name, policies in lineups().items():
+        results[f"games.python[{name}]"] = allocation_benchmark(policies, games)
+        results[f"games.batch[{name}]"] = batch_benchmark(policies, batch_games)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "rules": rules.rules_fingerprint(),
+        },
+        "results": results,
+    }
+
+
+@dataclass(frozen=True)
+class Regression:
+    benchmark: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Relative slowdown: positive means worse, whichever way the metric points."""
+        if self.metric in HIGHER_IS_BETTER:
+            return self.baseline / self.current - 1 if self.current else float("inf")
+        return self.current / self.baseline - 1 if self.baseline else float("inf")
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float = 0.1) -> list[Regression]:
+    """Return the metrics in `current` that are more than `threshold` worse than `baseline`.
+
+    Only timing and memory metrics are compared, and only for benchmarks both
+    reports contain.
+    """
+    regressions = []
+    for name, metrics in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if metric in metrics and metric in previous:
+                regression = Regression(name, metric, previous[metric], metrics[metric])
+                if regression.change > threshold:
+                    regressions.append(regression)
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run Zilch AI lab benchmarks.")
+    commands = parser.add_subparsers(dest="command")
+    run = commands.add_parser("run", help="run the suite and print a JSON report")
+    run.add_argument("--games", type=int, default=200, help="play_game games per lineup")
+    run.add_argument("--batch-games", type=int, default=4_096, help="simulate_batch games per lineup")
+    run.add_argument("--repeat", type=int, default=3, help="timed repeats; the best is reported")
+    run.add_argument("--output", type=Path, default=None, help="write the report here instead of stdout")
+    check = commands.add_parser("compare", help="flag regressions against a baseline report")
+    check.add_argument("baseline", type=Path)
+    check.add_argument("current", type=Path)
+    check.add_argument("--threshold", type=float, default=0.1, help="allowed relative slowdown (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        regressions = compare(json.loads(args.baseline.read_text()), json.loads(args.current.read_text()), args.threshold)
+        for item in regressions:
+            print(f"REGRESSION {item.benchmark} {item.metric}: {item.baseline:.6g} -> {item.current:.6g} ({item.change:+.0%})")
+        if not regressions:
+            print(f"no regressions above {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    if args.command is None:
+        args = run.parse_args([])
+    report = json.dumps(run_suite(args.games, args.batch_games, args.repeat), indent=2)
+    if args.output is None:
+        print(report)
+    else:
+        args.output.write_text(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,26 +3,52 @@
 from __future__ import annotations
 
 import argparse
-from collections import Counter
 
-from .zilch_ai.ev import EVTable
+import numpy as np
+
+from .zilch_ai.batch import simulate_batch
+from .zilch_ai.ev import EVTable, solve_anytime
+from .zilch_ai.paired import paired_match
 from .zilch_ai.policies import EVPolicy, GreedyThresholdPolicy, RandomPolicy
-from .zilch_ai.sim import simulate_games
+from .zilch_ai.rules import STANDARD_RULES, VARIANTS, RuleSet
+from .zilch_ai.sequential import sequential_match
+from .zilch_ai.sim import iter_games
+from .zilch_ai.stats import MARGIN_BUCKET, GameStats
 
 
 def print_turn_table() -> None:
     table = EVTable()
+    loose, dice = np.meshgrid([0, 250, 500, 750, 1000, 1500, 2000, 3000, 5000], np.arange(1, 11), indexing="ij")
+    roll_ev = table.roll_values(loose, dice)
+    bank = table.bank_decisions(loose, dice)
     print("Expected turn value when forced to roll:")
     print("loose,free_dice,roll_ev,decision_after_score")
-    for loose in (0, 250, 500, 750, 1000, 1500, 2000, 3000, 5000):
-        for dice in range(1, 11):
-            roll_ev = table.roll_value(loose, dice)
-            decision = table.choose_after_score(loose, dice)
-            print(f"{loose},{dice},{roll_ev:.1f},{decision.action}")
+    rows = zip(loose.ravel().tolist(), dice.ravel().tolist(), roll_ev.ravel().tolist(), bank.ravel().tolist())
+    for loose_score, free_dice, value, banks in rows:
+        print(f"{loose_score},{free_dice},{value:.1f},{'bank' if banks else 'roll'}")
 
 
-def run_tournament(games: int, players: int) -> None:
-    table = EVTable()
+def run_tournament(
+    games: int,
+    players: int,
+    engine: str = "python",
+    workers: int | None = None,
+    sequential: bool = False,
+    delta: float = 0.05,
+    precision: float | None = None,
+    paired: bool = False,
+    table: EVTable | None = None,
+    rules: RuleSet | None = None,
+) -> None:
+    """Play each lineup for `games` games, or until settled when `sequential`.
+
+    `rules` other than the standard ones need the python engine, without
+    `sequential` or `paired`.
+    """
+    rules = STANDARD_RULES if rules is None else rules
+    if rules != STANDARD_RULES and (engine != "python" or sequential or paired):
+        raise ValueError("rule variants run on the python engine without sequential or paired play")
+    table = table or EVTable(rules=rules)
     lineups = [
         [EVPolicy(table), GreedyThresholdPolicy(750)],
         [EVPolicy(table), GreedyThresholdPolicy(1000)],
@@ -34,15 +60,37 @@ def run_tournament(games: int, players: int) -> None:
         if len(active) < players:
             active = [lineup[0]] + [GreedyThresholdPolicy(750 + 250 * i) for i in range(players - 1)]
 
-        results = simulate_games(active, games)
-        wins = Counter(result.winner_index for result in results)
-        avg_turns = sum(result.turns for result in results) / len(results)
+        outcome = None
+        if sequential:
+            outcome = sequential_match(
+                active, delta=delta, precision=precision, max_games=games, engine=engine, workers=workers
+            )
+            stats = outcome.stats
+        elif engine == "batch":
+            stats = GameStats(len(active)).extend(simulate_batch(active, games))
+        else:
+            stats = GameStats(len(active)).extend(iter_games(active, games, workers=workers, rules=rules))
         names = [policy.name for policy in active]
         print(f"\n{' vs '.join(names)}")
+        if outcome is not None:
+            print(f"  sequential decision for {names[0]}: {outcome.decision} after {outcome.games} of {games} games")
         for index, name in enumerate(names):
-            pct = wins[index] / games * 100
-            print(f"  {name}: {wins[index]}/{games} wins ({pct:.1f}%)")
-        print(f"  average turns: {avg_turns:.1f}")
+            pct = stats.win_rate(index) * 100
+            low, high = stats.win_interval(index)
+            print(f"  {name}: {stats.wins[index]}/{stats.games} wins ({pct:.1f}%, 95% CI {low * 100:.1f}-{high * 100:.1f}%)")
+        print(f"  average turns: {stats.mean_turns():.1f} (median {stats.turn_quantile(0.5)})")
+        margin = stats.margin_quantile(0.5)
+        print(f"  median winning margin: {margin}-{margin + MARGIN_BUCKET} points")
+
+        if paired and len(active) == 2:
+            pairs = paired_match(active[0], active[1], max(1, games // 2), workers=workers)
+            low, high = pairs.interval()
+            print(
+                f"  paired ({pairs.games} games, seats swapped, common dice): "
+                f"win-rate difference {pairs.mean_difference() * 100:+.1f} pp "
+                f"(95% CI {low * 100:+.1f} to {high * 100:+.1f}), "
+                f"variance {pairs.variance():.2e} vs {pairs.independent_variance():.2e} unpaired"
+            )
 
 
 def main() -> None:
@@ -50,12 +98,43 @@ def main() -> None:
     parser.add_argument("--games", type=int, default=1000)
     parser.add_argument("--players", type=int, default=2)
     parser.add_argument("--turn-table", action="store_true")
+    parser.add_argument("--engine", choices=("python", "batch"), default="python")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size for the python engine")
+    parser.add_argument("--sequential", action="store_true", help="stop each lineup early; --games is the cap")
+    parser.add_argument("--delta", type=float, default=0.05, help="smallest win-rate difference the SPRT detects")
+    parser.add_argument("--precision", type=float, default=None, help="stop at this CI half-width instead of SPRT")
+    parser.add_argument("--paired", action="store_true", help="also run seat-swapped common-dice pairs (2 players)")
+    parser.add_argument("--ev-seconds", type=float, default=None, help="deepen the EV table within this time budget")
+    parser.add_argument("--ev-epsilon", type=float, default=None, help="deepen the EV table until layers change less")
+    parser.add_argument("--rules", choices=sorted(VARIANTS), default="standard", help="rule set to play (python engine)")
     args = parser.parse_args()
+    rules = VARIANTS[args.rules]
+    if rules != STANDARD_RULES and (args.engine != "python" or args.sequential or args.paired):
+        parser.error("--rules variants need --engine python without --sequential or --paired")
 
     if args.turn_table:
         print_turn_table()
-    else:
-        run_tournament(args.games, args.players)
+        return
+
+    table = None
+    if args.ev_seconds is not None or args.ev_epsilon is not None:
+        table, convergence = solve_anytime(time_budget=args.ev_seconds, epsilon=args.ev_epsilon, rules=rules)
+        print(
+            f"EV table horizon {convergence.horizon} in {convergence.seconds:.2f}s "
+            f"(last layer changed values by {convergence.change:.4g}; stopped by {convergence.stopped_by})"
+        )
+    run_tournament(
+        args.games,
+        args.players,
+        args.engine,
+        args.workers,
+        args.sequential,
+        args.delta,
+        args.precision,
+        args.paired,
+        table,
+        rules,
+    )
 
 
 if __name__ == "__main__":
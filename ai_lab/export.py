@@ -0,0 +1,146 @@
+"""Export solved EV tables as a compact asset for the web game.
+
+`python -m ai_lab.export --output ev-asset.zt` writes the roll values of an
+`EVTable` as a table file (see `zilch_ai.storage`) of kind "ev-asset": one
+`uint16` per (free dice, loose column), quantized to `1 / scale` points.
+With `--decisions` it also carries the `DecisionTable` codes and the score
+index arrays needed to turn a code back into the dice to set aside.
+
+The header key is a SHA-256 checksum of the rules fingerprint and every
+array's bytes, so a client can reject an asset that is corrupt or was built
+for other rules. `read_asset` checks both.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from .zilch_ai.decisions import DecisionTable
+from .zilch_ai.ev import STEP, EVTable
+from .zilch_ai.rules import NUM_DICE, rules_fingerprint, score_index
+from .zilch_ai.storage import TableFileError, read_header, read_table, write_table
+
+
+ASSET_KIND = "ev-asset"
+_QUANTUM_LIMIT = np.iinfo(np.uint16).max
+
+
+def quantize(values: np.ndarray) -> tuple[np.ndarray, int]:
+    """Scale `values` into `uint16` as finely as their maximum allows.
+
+    Returns the codes and the integer `scale` (codes per point); decoding
+    `codes / scale` is off by at most `0.5 / scale`.
+    """
+    top = float(values.max())
+    scale = max(1, int(_QUANTUM_LIMIT // top)) if top > 0 else _QUANTUM_LIMIT
+    if top * scale > _QUANTUM_LIMIT:
+        raise ValueError(f"values up to {top:.0f} do not fit in uint16")
+    return np.rint(values * scale).astype(np.uint16), scale
+
+
+def checksum(fingerprint: str, arrays: dict[str, np.ndarray]) -> str:
+    digest = hashlib.sha256(fingerprint.encode())
+    for name, array in arrays.items():
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def export_asset(path: str | os.PathLike[str], table: EVTable, decisions: bool = False) -> str:
+    """Write `table` as an EV asset at `path` and return its checksum."""
+    roll_values, scale = quantize(table.values[table.horizon])
+    arrays = {"roll_values": roll_values}
+    if decisions:
+        index = score_index()
+        arrays.update(
+            decisions=np.ascontiguousarray(DecisionTable.for_table(table).codes),
+            outcome_counts=index.counts.astype(np.int8),
+            option_start=index.option_start.astype(np.uint32),
+            option_points=index.option_points.astype(np.uint16),
+            option_used=index.option_used.astype(np.int8),
+        )
+    fingerprint = rules_fingerprint()
+    key = checksum(fingerprint, arrays)
+    meta = {
+        "rules": fingerprint,
+        "step": STEP,
+        "max_loose": table.max_loose,
+        "horizon": table.horizon,
+        "num_dice": NUM_DICE,
+        "scale": scale,
+        "tolerance": 0.5 / scale,
+    }
+    write_table(path, ASSET_KIND, key, arrays, meta)
+    return key
+
+
+@dataclass(frozen=True)
+class EVAsset:
+    """A loaded EV asset, answering the same scalar queries as `EVTable`."""
+
+    roll_values: np.ndarray
+    scale: int
+    max_loose: int
+    horizon: int
+    checksum: str
+    decisions: np.ndarray | None = None
+
+    @property
+    def tolerance(self) -> float:
+        return 0.5 / self.scale
+
+    def roll_value(self, loose: int, free_dice: int) -> float:
+        if free_dice <= 0:
+            free_dice = NUM_DICE
+        if loose > self.max_loose:
+            return float(loose)
+        return int(self.roll_values[free_dice, round(loose / STEP)]) / self.scale
+
+
+def read_asset(path: str | os.PathLike[str]) -> EVAsset:
+    """Load and verify an EV asset written by `export_asset`.
+
+    Raises `TableFileError` if the checksum does not match the contents or
+    the asset was built for different rules.
+    """
+    arrays, meta = read_table(path, ASSET_KIND)
+    header_key = read_header(path)["key"]
+    if meta["rules"] != rules_fingerprint():
+        raise TableFileError(f"{path} was built for a different rule set")
+    if checksum(meta["rules"], arrays) != header_key:
+        raise TableFileError(f"{path} does not match its checksum")
+    return EVAsset(
+        roll_values=arrays["roll_values"],
+        scale=meta["scale"],
+        max_loose=meta["max_loose"],
+        horizon=meta["horizon"],
+        checksum=header_key,
+        decisions=arrays.get("decisions"),
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export a solved EV table for the web game.")
+    parser.add_argument("--output", type=Path, default=Path("ev-asset.zt"))
+    parser.add_argument("--max-loose", type=int, default=8_000)
+    parser.add_argument("--horizon", type=int, default=5, help="future rolls solved; app.js uses 5")
+    parser.add_argument("--decisions", action="store_true", help="include best-option codes and the score index")
+    args = parser.parse_args(argv)
+
+    key = export_asset(args.output, EVTable(args.max_loose, args.horizon), decisions=args.decisions)
+    asset = read_asset(args.output)
+    print(f"wrote {args.output} ({args.output.stat().st_size} bytes, scale {asset.scale}, tolerance {asset.tolerance:.3g})")
+    print(f"sha256 {key}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""Tests for the Zilch AI lab.
+
+Modules that solve or load cached tables with the default `cache=True`
+import `setUpModule` and `tearDownModule` from here, which point
+`ZILCH_AI_CACHE` at a temporary directory for the module's tests, so they
+neither read nor write the developer's real table cache.
+"""
+
+import os
+import tempfile
+from typing import Any
+from unittest import mock
+
+_cache: tempfile.TemporaryDirectory | None = None
+_environ: Any = None
+
+
+def setUpModule() -> None:
+    global _cache, _environ
+    _cache = tempfile.TemporaryDirectory()
+    _environ = mock.patch.dict(os.environ, {"ZILCH_AI_CACHE": _cache.name})
+    _environ.start()
+
+
+def tearDownModule() -> None:
+    global _cache, _environ
+    if _environ is not None:
+        _environ.stop()
+    if _cache is not None:
+        _cache.cleanup()
+    _cache = _environ = None
@@ -0,0 +1,28 @@
+import unittest
+
+from ai_lab.tests import setUpModule, tearDownModule  # noqa: F401
+from ai_lab.zilch_ai.batch import simulate_batch
+from ai_lab.zilch_ai.policies import EVPolicy, GreedyThresholdPolicy, RandomPolicy
+from ai_lab.zilch_ai.sim import simulate_games
+
+
+class BatchTest(unittest.TestCase):
+    def test_reference_mode_matches_simulate_games(self):
+        lineup = [EVPolicy(), GreedyThresholdPolicy(750), GreedyThresholdPolicy(1000)]
+        expected = simulate_games(lineup, 40, seed=11)
+        self.assertEqual(simulate_batch(lineup, 40, seed=11, batch_size=16, reference=True), expected)
+
+    def test_fallback_policies_finish_games(self):
+        results = simulate_batch([RandomPolicy(), GreedyThresholdPolicy(750)], 30, seed=3, batch_size=8)
+        self.assertEqual(len(results), 30)
+        for result in results:
+            self.assertGreaterEqual(max(result.scores), 20_000)
+            self.assertEqual(result.scores[result.winner_index], max(result.scores))
+
+    def test_max_turns_caps_games(self):
+        results = simulate_batch([GreedyThresholdPolicy(750)] * 2, 5, max_turns=3)
+        self.assertTrue(all(result.turns == 3 for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
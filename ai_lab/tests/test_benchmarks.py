@@ -0,0 +1,36 @@
+import unittest
+
+from ai_lab.benchmarks import compare, ev_benchmarks
+
+
+def report(**results):
+    return {"meta": {}, "results": results}
+
+
+class CompareTest(unittest.TestCase):
+    def test_flags_only_metrics_past_the_threshold(self):
+        baseline = report(
+            solve={"seconds": 1.0},
+            games={"games_per_second": 1_000.0, "peak_kib": 100.0, "games": 10},
+            dropped={"seconds": 1.0},
+        )
+        current = report(
+            solve={"seconds": 1.05},
+            games={"games_per_second": 500.0, "peak_kib": 150.0, "games": 20},
+            added={"seconds": 9.0},
+        )
+        flagged = {(item.benchmark, item.metric): item.change for item in compare(baseline, current, 0.1)}
+        self.assertEqual(set(flagged), {("games", "games_per_second"), ("games", "peak_kib")})
+        self.assertAlmostEqual(flagged["games", "games_per_second"], 1.0)
+        self.assertAlmostEqual(flagged["games", "peak_kib"], 0.5)
+        self.assertEqual(compare(current, baseline, 0.1), [])
+        self.assertEqual(len(compare(baseline, current, 0.01)), 3)
+
+    def test_ev_benchmarks_report_solve_and_load(self):
+        results = ev_benchmarks(1, [(500, 1)])
+        self.assertEqual(set(results), {"ev_table.solve[500,1]", "ev_table.load[500,1]"})
+        self.assertGreater(results["ev_table.solve[500,1]"]["seconds"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import gc
+import os
+import unittest
+from unittest import mock
+
+from ai_lab.zilch_ai import caching
+from ai_lab.zilch_ai.caching import cache_stats, clear_caches, memoize, scoped_cache, set_cache_limit
+from ai_lab.zilch_ai.ev import EVTable
+
+
+class Owner:
+    def __init__(self, name, maxsize):
+        self.cache = scoped_cache(name, maxsize)
+
+
+class BoundedCacheTest(unittest.TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = scoped_cache("test.lru", 2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertIsNone(cache.get("b"))
+        stats = cache_stats()["test.lru"]
+        self.assertEqual((stats.hits, stats.misses, stats.evictions, stats.size), (1, 1, 1, 2))
+
+    def test_scoped_caches_die_with_their_owner_but_keep_counting(self):
+        owners = [Owner("test.scoped", 10) for _ in range(3)]
+        for number, owner in enumerate(owners):
+            owner.cache.put(number, number)
+            owner.cache.get(number)
+        self.assertEqual(cache_stats()["test.scoped"].instances, 3)
+        del owners, owner
+        gc.collect()
+        stats = cache_stats()["test.scoped"]
+        self.assertEqual((stats.instances, stats.size, stats.hits), (0, 0, 3))
+
+    def test_limits_can_shrink_live_caches(self):
+        owner = Owner("test.resize", None)
+        for key in range(10):
+            owner.cache.put(key, key)
+        set_cache_limit("test.resize", 4)
+        self.assertEqual(len(owner.cache), 4)
+        self.assertIn(9, owner.cache)
+        self.assertEqual(cache_stats()["test.resize"].evictions, 6)
+        clear_caches("test.resize")
+        self.assertEqual(len(owner.cache), 0)
+        with self.assertRaises(KeyError):
+            clear_caches("test.missing")
+
+    def test_memoized_counters_survive_clears(self):
+        calls = []
+
+        @memoize("test.memoized", maxsize=2)
+        def square(value):
+            calls.append(value)
+            return value * value
+
+        for value in (1, 2, 1, 3, 1):
+            square(value)
+        square.cache_clear()
+        square(1)
+        stats = cache_stats()["test.memoized"]
+        self.assertEqual(calls, [1, 2, 3, 1])
+        self.assertEqual((stats.hits, stats.misses, stats.evictions, stats.size), (2, 4, 1, 1))
+        with self.assertRaises(ValueError):
+            set_cache_limit("test.memoized", 10)
+
+    def test_environment_overrides_default_limits(self):
+        with mock.patch.dict(os.environ, {"ZILCH_AI_CACHE_LIMITS": "test.env=3, other=none"}):
+            self.assertEqual(caching._configured_limit("test.env", 100), 3)
+            self.assertIsNone(caching._configured_limit("other", 100))
+            self.assertEqual(caching._configured_limit("unlisted", 100), 100)
+
+
+class EVDecisionCacheTest(unittest.TestCase):
+    def test_tables_memoize_best_options_per_instance(self):
+        table = EVTable(max_loose=1_000, horizon=2, cache=False)
+        first = table.best_option((5, 1, 2, 3, 4, 6), 300)
+        self.assertIs(table.best_option((1, 2, 3, 4, 5, 6), 300), first)
+        self.assertEqual(len(table.decisions), 1)
+        self.assertIsNot(EVTable(max_loose=1_000, horizon=2, cache=False).decisions, table.decisions)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+from ai_lab.zilch_ai.decisions import ZILCH, DecisionTable, build_codes
+from ai_lab.zilch_ai.ev import STEP, EVTable
+from ai_lab.zilch_ai.policies import EVPolicy, GreedyThresholdPolicy
+from ai_lab.zilch_ai.rules import score_index
+from ai_lab.zilch_ai.sim import play_game
+
+
+class DecisionTableTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.table = EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir.name)
+        self.decisions = DecisionTable.for_table(self.table)
+
+    def test_matches_best_option_for_every_state(self):
+        index = score_index()
+        self.assertEqual(self.decisions.codes.dtype, np.uint8)
+        for outcome in range(0, len(index), 7):
+            dice = index.dice(outcome)
+            options = index.options(outcome)
+            for loose in range(0, self.table.max_loose + 1, STEP):
+                expected = self.table.best_option(dice, loose)
+                position = self.decisions.option(outcome, loose)
+                if expected.option is None:
+                    self.assertEqual(position, -1)
+                    self.assertEqual(self.decisions.codes[outcome, loose // STEP], ZILCH)
+                    continue
+                self.assertEqual(options[position], expected.option)
+                self.assertEqual(self.decisions.banks(outcome, loose), expected.action == "bank")
+
+    def test_vectorized_lookup_matches_scalar_and_falls_back_beyond_max_loose(self):
+        outcomes = np.arange(len(score_index()))
+        loose = np.full(len(outcomes), 350)
+        loose[::3] = 1_500
+        positions = self.decisions.options(loose, outcomes)
+        for outcome in range(0, len(outcomes), 97):
+            self.assertEqual(positions[outcome], self.decisions.option(outcome, int(loose[outcome])))
+        self.assertTrue((positions[::3] == self.table.best_options(1_500, outcomes[::3])[0]).all())
+
+    def test_tables_are_stored_and_mapped(self):
+        path = self.table.cache_path()
+        self.assertTrue(path.with_name(f"decisions-{path.name}").exists())
+        loaded = DecisionTable.for_table(EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir.name))
+        self.assertFalse(loaded.codes.flags.writeable)
+        self.assertTrue((loaded.codes == self.decisions.codes).all())
+        self.assertTrue((pickle.loads(pickle.dumps(loaded)).codes == loaded.codes).all())
+        uncached = EVTable(max_loose=1_000, horizon=2, cache=False)
+        self.assertTrue((build_codes(uncached) == self.decisions.codes).all())
+
+    def test_policy_follows_the_table_and_rebuilds_after_extend(self):
+        class ScanningPolicy(EVPolicy):
+            def choose_option(self, dice, options, view):
+                return self.table.best_option(dice, view.loose_score).option or options[0]
+
+        for seed in range(5):
+            looked_up = play_game([EVPolicy(self.table), GreedyThresholdPolicy(750)], seed=seed)
+            scanned = play_game([ScanningPolicy(self.table), GreedyThresholdPolicy(750)], seed=seed)
+            self.assertEqual(looked_up, scanned)
+
+        policy = EVPolicy(self.table)
+        before = policy.decisions
+        self.assertIs(policy.decisions, before)
+        self.table.extend()
+        self.assertIsNot(policy.decisions, before)
+        self.assertEqual(policy.decisions.horizon, self.table.horizon)
+
+if __name__ == "__main__":
+    unittest.main()
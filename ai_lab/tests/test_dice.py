@@ -0,0 +1,45 @@
+import unittest
+from collections import Counter
+from fractions import Fraction
+from random import Random
+
+import numpy as np
+
+from ai_lab.zilch_ai.dice import alias_table, sample_outcome, sample_outcomes
+from ai_lab.zilch_ai.rules import NUM_DICE, NUM_SIDES, multinomial_outcomes, score_index
+
+
+class AliasTableTest(unittest.TestCase):
+    def test_tables_reproduce_roll_probabilities_exactly(self):
+        for num_dice in range(1, NUM_DICE + 1):
+            table = alias_table(num_dice)
+            mass = Counter()
+            for column, (threshold, alias) in enumerate(zip(table.threshold, table.alias)):
+                mass[column] += threshold
+                mass[alias] += table.rolls - threshold
+            self.assertEqual(sum(mass.values()), table.draws)
+            for column, (_, probability) in enumerate(multinomial_outcomes(num_dice)):
+                ways = round(probability * NUM_SIDES**num_dice)
+                self.assertEqual(Fraction(mass[column], table.draws), Fraction(ways, NUM_SIDES**num_dice))
+
+    def test_samples_land_in_the_right_dice_count(self):
+        index = score_index()
+        rng = Random(4)
+        for num_dice in range(1, NUM_DICE + 1):
+            outcome = sample_outcome(num_dice, rng)
+            self.assertIn(outcome, index.outcomes(num_dice))
+            self.assertEqual(len(index.dice(outcome)), num_dice)
+
+        free_dice = np.array([1, 10, 3, 3, 6])
+        outcomes = sample_outcomes(free_dice, np.random.default_rng(4))
+        self.assertEqual(index.num_dice[outcomes].tolist(), free_dice.tolist())
+
+    def test_single_die_frequencies(self):
+        rng = Random(8)
+        faces = Counter(score_index().dice(sample_outcome(1, rng)) for _ in range(6_000))
+        self.assertEqual(len(faces), 6)
+        self.assertTrue(all(850 < count < 1_150 for count in faces.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from random import Random
+
+import numpy as np
+
+from ai_lab.tests import setUpModule, tearDownModule  # noqa: F401
+from ai_lab.zilch_ai.dice import sample_outcome
+from ai_lab.zilch_ai.distribution import EVRule, ThresholdRule, TurnDistribution, TurnRule
+from ai_lab.zilch_ai.ev import STEP, EVTable
+from ai_lab.zilch_ai.rules import NUM_DICE, score_index
+
+
+def sampled_turn(rule, max_loose, horizon, loose, free_dice, rng):
+    """Play one turn of the `TurnDistribution` model by sampling rolls."""
+    index = score_index()
+    locked = 0
+    for _ in range(horizon):
+        outcome = sample_outcome(free_dice, rng)
+        position = int(rule.options(np.array(loose), np.array(outcome)))
+        if position < 0:
+            return locked
+        selected = index.option_start[outcome] + position
+        loose += int(index.option_points[selected])
+        free_dice = int(index.option_free_dice[selected])
+        if free_dice == 0:
+            locked, loose, free_dice = locked + loose, 0, NUM_DICE
+        elif loose > max_loose or rule.banks(np.array(loose), np.array(free_dice)):
+            return locked + loose
+    return locked + loose
+
+
+class TurnDistributionTest(unittest.TestCase):
+    def test_one_roll_matches_enumeration(self):
+        rule = ThresholdRule(300)
+        distribution = TurnDistribution(rule, max_loose=1_000, horizon=1, max_total=3_000)
+        index = score_index()
+        expected = np.zeros(3_000 // STEP + 1)
+        for outcome in index.outcomes(4):
+            position = int(rule.options(np.array(200), np.array(outcome)))
+            if position < 0:
+                expected[0] += index.probabilities[outcome]
+                continue
+            points = int(index.option_points[index.option_start[outcome] + position])
+            expected[(200 + points) // STEP] += index.probabilities[outcome]
+        self.assertTrue(np.allclose(distribution.probabilities(200, 4), expected))
+
+    def test_tail_probabilities_match_sampled_turns(self):
+        rule = ThresholdRule(750)
+        distribution = TurnDistribution(rule, max_loose=2_000, horizon=5, max_total=6_000)
+        rng = Random(7)
+        totals = np.array([sampled_turn(rule, 2_000, 5, 0, NUM_DICE, rng) for _ in range(4_000)])
+        for target in (0, 350, 750, 1_500, 3_000):
+            exact = distribution.probability_at_least(0, NUM_DICE, target)
+            sampled = (totals >= target).mean()
+            self.assertLess(abs(exact - sampled), 4 * np.sqrt(exact * (1 - exact) / len(totals)) + 1e-9)
+        self.assertAlmostEqual(distribution.expected_total(0, NUM_DICE), totals.mean(), delta=60)
+
+    def test_base_rule_takes_the_first_option_and_banks(self):
+        rule = TurnRule()
+        index = score_index()
+        outcomes = np.arange(len(index))
+        positions = rule.options(np.zeros(len(index), dtype=np.int64), outcomes)
+        self.assertEqual(positions.tolist(), np.where(index.option_count > 0, 0, -1).tolist())
+        self.assertEqual(rule.banks(np.array([0, 50, 50]), np.array([3, 3, 0])).tolist(), [False, True, False])
+
+        distribution = TurnDistribution(rule, max_loose=1_000, horizon=3, max_total=3_000)
+        rng = Random(3)
+        totals = np.array([sampled_turn(rule, 1_000, 3, 0, NUM_DICE, rng) for _ in range(2_000)])
+        self.assertAlmostEqual(distribution.expected_total(0, NUM_DICE), totals.mean(), delta=40)
+
+    def test_ev_rule_tracks_roll_value_and_vectorized_queries_agree(self):
+        table = EVTable()
+        distribution = TurnDistribution(EVRule(table), max_loose=table.max_loose, horizon=table.horizon, max_total=8_000)
+        for loose, free_dice in ((0, NUM_DICE), (300, 6), (1_000, 2)):
+            self.assertAlmostEqual(distribution.probabilities(loose, free_dice).sum(), 1.0)
+            # The table's value is optimal over the same horizon, so the fixed rule can only fall short of it.
+            optimal = table.roll_value(loose, free_dice)
+            self.assertLessEqual(distribution.expected_total(loose, free_dice), optimal + 1e-6)
+            self.assertGreater(distribution.expected_total(loose, free_dice), 0.95 * optimal)
+        loose = np.array([0, 300, 1_000, 8_500])
+        free_dice = np.array([0, 6, 2, 3])
+        target = np.array([1_000, 500, 1_500, 2_000])
+        scalar = [distribution.probability_at_least(*state) for state in zip(loose.tolist(), free_dice.tolist(), target.tolist())]
+        self.assertTrue(np.allclose(distribution.probabilities_at_least(loose, free_dice, target), scalar))
+        self.assertEqual(distribution.probability_at_least(8_500, 3, 2_000), 1.0)
+        with self.assertRaises(ValueError):
+            distribution.probability_at_least(0, NUM_DICE, 9_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
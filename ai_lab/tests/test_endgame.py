@@ -0,0 +1,121 @@
+import pickle
+import tempfile
+import unittest
+from functools import lru_cache
+
+import numpy as np
+
+from ai_lab.zilch_ai.decisions import DecisionTable
+from ai_lab.zilch_ai.endgame import EndgamePolicy, EndgameTable
+from ai_lab.zilch_ai.ev import STEP, EVTable
+from ai_lab.zilch_ai.policies import EVPolicy
+from ai_lab.zilch_ai.rules import NUM_DICE, score_index
+from ai_lab.zilch_ai.sim import play_game
+
+
+@lru_cache(maxsize=None)
+def final_by_recursion(need, free_dice):
+    """P(a final turn scores `need` more buckets), straight from the score index."""
+    index = score_index()
+    total = 0.0
+    for outcome in index.outcomes(free_dice):
+        values = [
+            1.0 if option.points // STEP >= need else final_by_recursion(need - option.points // STEP, option.free_dice or NUM_DICE)
+            for option in index.options(outcome)
+        ]
+        total += index.probabilities[outcome] * max(values, default=0.0)
+    return total
+
+
+class EndgameTableTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.table = EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir.name)
+        self.endgame = EndgameTable(self.table, window=300, turn_cap=400, cache=self.cache_dir.name)
+
+    def test_final_round_matches_recursion(self):
+        for need in range(5):
+            for free_dice in (1, 3, 6):
+                self.assertAlmostEqual(self.endgame.final_roll_probability(need * STEP, free_dice), final_by_recursion(need, free_dice))
+        self.assertEqual(self.endgame.final_roll_probability(-100, 2), self.endgame.final[0, 2])
+
+    def test_values_satisfy_the_update(self):
+        endgame = self.endgame
+        decisions = DecisionTable.for_table(self.table)
+        index = score_index()
+        tolerance = 4 / np.iinfo(np.uint16).max
+        for seat, my_score, other_score, locked, loose, free_dice in [
+            (0, 19_800, 19_750, 0, 0, NUM_DICE),
+            (1, 19_700, 19_900, 100, 150, 4),
+            (0, 19_950, 19_700, 0, 200, 2),
+        ]:
+            expected = 0.0
+            for outcome in index.outcomes(free_dice):
+                probability = index.probabilities[outcome]
+                position = decisions.option(outcome, loose)
+                if position < 0:
+                    expected += probability * self._zilch(seat, my_score, other_score, locked)
+                    continue
+                option = index.options(outcome)[position]
+                state = (seat, my_score, other_score, locked, loose + option.points, option.free_dice)
+                if option.free_dice and loose + option.points > endgame.turn_cap:
+                    # Scores past the cap bank the cap.
+                    value = endgame.bank_probability(seat, my_score, other_score, locked, endgame.turn_cap, option.free_dice)
+                elif option.free_dice == 0:
+                    value = endgame.roll_probability(seat, my_score, other_score, locked + loose + option.points, 0, NUM_DICE)
+                else:
+                    value = max(endgame.bank_probability(*state), endgame.roll_probability(*state))
+                expected += probability * value
+            actual = endgame.roll_probability(seat, my_score, other_score, locked, loose, free_dice)
+            self.assertAlmostEqual(actual, expected, delta=tolerance)
+
+    def _zilch(self, seat, my_score, other_score, locked):
+        if my_score + locked >= self.endgame.target_score:
+            need = my_score + locked - other_score + (seat == 0) * STEP
+            return 1.0 - self.endgame.final_start_probability(need)
+        return 1.0 - self.endgame.start_probability(1 - seat, other_score, my_score + locked)
+
+    def test_crossing_bank_hands_on_the_whole_turn(self):
+        endgame = self.endgame
+        # Opponent needs lead + tie break; building on 300 with 5 dice leaves them the lead.
+        need = 19_900 + 300 - 19_800 + STEP
+        expected = 1.0 - max(endgame.final_roll_probability(need, NUM_DICE), endgame.final_roll_probability(need - 300, 5))
+        self.assertAlmostEqual(endgame.bank_probability(0, 19_900, 19_800, 200, 100, 5), expected)
+
+    def test_cached_table_is_mapped(self):
+        self.assertEqual(self.endgame.values.dtype, np.uint16)
+        self.assertGreater(self.endgame.sweeps, 1)
+        loaded = EndgameTable(self.table, window=300, turn_cap=400, cache=self.cache_dir.name)
+        self.assertFalse(loaded.values.flags.writeable)
+        self.assertEqual(loaded.sweeps, self.endgame.sweeps)
+        np.testing.assert_array_equal(loaded.values, self.endgame.values)
+
+        restored = pickle.loads(pickle.dumps(loaded))
+        self.assertFalse(restored.values.flags.writeable)
+        self.assertEqual(restored.start_probability(0, 19_800, 19_800), loaded.start_probability(0, 19_800, 19_800))
+
+    def test_rejects_bad_sizes(self):
+        with self.assertRaises(ValueError):
+            EndgameTable(self.table, window=320, cache=False)
+        with self.assertRaises(ValueError):
+            EndgameTable(self.table, window=400, turn_cap=300, cache=False)
+        with self.assertRaises(ValueError):
+            EndgameTable(self.table, window=300, turn_cap=1_500, cache=False)
+
+
+class EndgamePolicyTest(unittest.TestCase):
+    def test_plays_two_player_games(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            table = EVTable(max_loose=1_000, horizon=2, cache=cache_dir)
+            endgame = EndgameTable(table, window=300, turn_cap=400, target_score=2_000, cache=cache_dir)
+            policy = EndgamePolicy(endgame)
+            self.assertEqual(policy.target_score, 2_000)
+            for seed in range(5):
+                result = play_game([policy, EVPolicy(table, 2_000)], seed=seed, target_score=2_000)
+                self.assertIn(result.winner_index, (0, 1))
+                self.assertGreaterEqual(max(result.scores), 2_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
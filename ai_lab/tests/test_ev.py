@@ -0,0 +1,173 @@
+import pickle
+import tempfile
+import unittest
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from ai_lab.tests import setUpModule, tearDownModule  # noqa: F401
+from ai_lab.zilch_ai.ev import STEP, EVTable, _outcome_summaries, solve_anytime
+from ai_lab.zilch_ai.rules import NUM_DICE, score_index
+from ai_lab.zilch_ai.storage import TableFileError, read_header, read_table, write_table
+
+
+def recursive_roll_value(max_loose, loose, free_dice, depth):
+    @lru_cache(maxsize=None)
+    def value(loose, free_dice, depth):
+        if depth <= 0:
+            return float(loose)
+        total = 0.0
+        for probability, summaries in _outcome_summaries(free_dice):
+            best = 0.0
+            for points, next_free_dice in summaries:
+                next_loose = loose + points
+                if next_free_dice == 0:
+                    option = next_loose + value(0, NUM_DICE, depth - 1)
+                elif next_loose > max_loose:
+                    option = float(next_loose)
+                else:
+                    option = max(float(next_loose), value(next_loose, next_free_dice, depth - 1))
+                best = max(best, option)
+            total += probability * best
+        return total
+
+    return value(loose, free_dice, depth)
+
+
+class EVTableTest(unittest.TestCase):
+    def test_dense_solver_matches_recursion(self):
+        table = EVTable(max_loose=1_500, horizon=3)
+        for loose in (0, 250, 1_000, 1_500):
+            for free_dice in (1, 4, 6):
+                self.assertAlmostEqual(
+                    table.roll_value(loose, free_dice),
+                    recursive_roll_value(1_500, loose, free_dice, 3),
+                    places=9,
+                )
+
+    def test_table_layout(self):
+        table = EVTable(max_loose=1_000, horizon=2)
+        self.assertEqual(table.values.shape, (3, NUM_DICE + 1, 1_000 // STEP + 1))
+        self.assertEqual(table.values[0, 3, 4], 200)
+        self.assertEqual(table.roll_value(0, 0), table.roll_value(0, NUM_DICE))
+        self.assertEqual(table.roll_value(1_200, 3), 1_200)
+
+
+class BatchedQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.table = EVTable(max_loose=2_000, horizon=3)
+
+    def test_state_queries_match_scalar_lookups(self):
+        loose, free_dice = np.meshgrid(np.arange(0, 2_600, 50), np.arange(0, NUM_DICE + 1), indexing="ij")
+        roll_values = self.table.roll_values(loose, free_dice)
+        banks = self.table.bank_decisions(loose, free_dice)
+        after = self.table.after_score_values(loose, free_dice)
+        self.assertEqual(roll_values.shape, loose.shape)
+        for (row, column), value in np.ndenumerate(roll_values):
+            state = int(loose[row, column]), int(free_dice[row, column])
+            decision = self.table.choose_after_score(*state)
+            self.assertEqual(value, self.table.roll_value(*state))
+            self.assertEqual(banks[row, column], decision.action == "bank")
+            self.assertEqual(after[row, column], decision.value)
+
+    def test_best_options_match_best_option(self):
+        index = score_index()
+        rng = np.random.default_rng(3)
+        outcomes = rng.integers(0, len(index), size=400)
+        loose = rng.integers(0, 50, size=400) * 50
+        positions, values = self.table.best_options(loose, outcomes)
+        for outcome, loose_score, position, value in zip(outcomes.tolist(), loose.tolist(), positions, values):
+            decision = self.table.best_option(index.dice(outcome), loose_score)
+            options = index.options(outcome)
+            self.assertEqual(position, options.index(decision.option) if decision.option else -1)
+            self.assertAlmostEqual(value, decision.value)
+
+        by_counts, _ = self.table.best_options_for_counts(loose, index.counts[outcomes])
+        self.assertTrue((by_counts == positions).all())
+        with self.assertRaises(ValueError):
+            self.table.best_options_for_counts([0], [[NUM_DICE, 1, 0, 0, 0, 0]])
+
+
+class EVTableCacheTest(unittest.TestCase):
+    def setUp(self):
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.cache_dir = Path(temp.name)
+
+    def test_cached_table_is_mapped_read_only(self):
+        solved = EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir)
+        path = solved.cache_path()
+        self.assertTrue(path.exists())
+
+        loaded = EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir)
+        self.assertFalse(loaded.values.flags.writeable)
+        self.assertTrue((loaded.values == solved.values).all())
+        self.assertTrue((pickle.loads(pickle.dumps(loaded)).values == solved.values).all())
+
+    def test_stale_file_is_replaced(self):
+        table = EVTable(max_loose=1_000, horizon=2, cache=False)
+        path = EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir).cache_path()
+        write_table(path, "ev-table", "old-rules", {"values": table.values * 2})
+
+        with self.assertRaises(TableFileError):
+            read_table(path, "ev-table", table.cache_key)
+        reloaded = EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir)
+        self.assertTrue((reloaded.values == table.values).all())
+        _, meta = read_table(path, "ev-table", table.cache_key)
+        self.assertEqual(meta["horizon"], 2)
+
+    def test_damaged_header_is_resolved(self):
+        table = EVTable(max_loose=1_000, horizon=2, cache=False)
+        path = EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir).cache_path()
+        with open(path, "r+b") as handle:
+            handle.seek(20)
+            handle.write(b"\xff{not json")
+
+        with self.assertRaises(TableFileError):
+            read_table(path, "ev-table", table.cache_key)
+        with self.assertRaises(TableFileError):
+            read_header(path)
+        reloaded = EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir)
+        self.assertTrue((reloaded.values == table.values).all())
+        self.assertEqual(read_header(path)["kind"], "ev-table")
+
+    def test_settings_change_the_key(self):
+        keys = {EVTable(max_loose=1_000, horizon=horizon, cache=False).cache_key for horizon in (1, 2)}
+        self.assertEqual(len(keys), 2)
+
+    def test_deeper_tables_grow_from_cached_shallower_ones(self):
+        EVTable(max_loose=1_000, horizon=2, cache=self.cache_dir)
+        grown = EVTable(max_loose=1_000, horizon=4, cache=self.cache_dir)
+        self.assertTrue((grown.values == EVTable(max_loose=1_000, horizon=4, cache=False).values).all())
+        self.assertTrue(grown.cache_path().exists())
+
+
+class AnytimeSolverTest(unittest.TestCase):
+    def test_extend_matches_a_direct_solve(self):
+        table = EVTable(max_loose=1_000, horizon=2, cache=False)
+        table.best_option((1, 5, 5), 0)
+        table.extend(3)
+        self.assertEqual(table.horizon, 5)
+        self.assertEqual(len(table.decisions), 0)
+        self.assertTrue((table.values == EVTable(max_loose=1_000, horizon=5, cache=False).values).all())
+        changes = table.layer_changes()
+        self.assertEqual(len(changes), 5)
+        self.assertTrue((changes[1:] <= changes[:-1]).all())
+
+    def test_stopping_rules(self):
+        table, convergence = solve_anytime(1_000, epsilon=1.0, cache=False)
+        self.assertTrue(convergence.converged)
+        self.assertLessEqual(convergence.change, 1.0)
+        self.assertGreater(table.layer_changes()[-2], 1.0)
+        self.assertEqual(table.horizon, convergence.horizon)
+
+        _, capped = solve_anytime(1_000, epsilon=0.0, max_horizon=3, cache=False)
+        self.assertEqual((capped.horizon, capped.stopped_by, len(capped.layer_seconds)), (3, "max_horizon", 2))
+
+        _, timed = solve_anytime(1_000, time_budget=0.0, start_horizon=2, cache=False)
+        self.assertEqual((timed.horizon, timed.stopped_by), (2, "time"))
+
+
+if __name__ == "__main__":
+    unittest.main()
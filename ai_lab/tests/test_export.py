@@ -0,0 +1,58 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+from ai_lab.export import export_asset, main, quantize, read_asset
+from ai_lab.zilch_ai.decisions import DecisionTable
+from ai_lab.zilch_ai.ev import STEP, EVTable
+from ai_lab.zilch_ai.rules import NUM_DICE
+from ai_lab.zilch_ai.storage import TableFileError
+
+
+class EVAssetTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "ev-asset.zt"
+        self.table = EVTable(max_loose=2_000, horizon=3, cache=directory.name)
+
+    def test_exported_values_match_roll_value_within_tolerance(self):
+        export_asset(self.path, self.table)
+        asset = read_asset(self.path)
+        self.assertLessEqual(asset.tolerance, 0.1)
+        for free_dice in range(NUM_DICE + 1):
+            for loose in range(0, self.table.max_loose + 3 * STEP, STEP):
+                expected = self.table.roll_value(loose, free_dice)
+                self.assertAlmostEqual(asset.roll_value(loose, free_dice), expected, delta=asset.tolerance + 1e-9)
+        self.assertLess(self.path.stat().st_size, 8_192)
+
+    def test_decisions_are_carried_when_requested(self):
+        export_asset(self.path, self.table, decisions=True)
+        asset = read_asset(self.path)
+        self.assertTrue((asset.decisions == DecisionTable.for_table(self.table).codes).all())
+
+    def test_corrupt_assets_are_rejected(self):
+        export_asset(self.path, self.table)
+        data = bytearray(self.path.read_bytes())
+        data[-1] ^= 0xFF
+        self.path.write_bytes(bytes(data))
+        with self.assertRaises(TableFileError):
+            read_asset(self.path)
+
+    def test_quantize_keeps_codes_in_range(self):
+        codes, scale = quantize(np.array([0.0, 1234.5, 9000.25]))
+        self.assertEqual(codes.dtype, np.uint16)
+        self.assertTrue((np.abs(codes / scale - [0.0, 1234.5, 9000.25]) <= 0.5 / scale + 1e-9).all())
+
+    def test_cli_writes_an_asset(self):
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main(["--output", str(self.path), "--max-loose", "1000", "--horizon", "2"]), 0)
+        self.assertEqual(read_asset(self.path).horizon, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from ai_lab.zilch_ai.caching import clear_caches
+from ai_lab.zilch_ai.instrument import LatencyHistogram, Probe
+from ai_lab.zilch_ai.policies import GreedyThresholdPolicy
+from ai_lab.zilch_ai.rules import VARIANTS, score_index
+from ai_lab.zilch_ai.sim import simulate_games
+
+
+class ProbeTest(unittest.TestCase):
+    def setUp(self):
+        self.policies = [GreedyThresholdPolicy(750), GreedyThresholdPolicy(1000)]
+
+    def test_probe_does_not_change_results_and_counts_add_up(self):
+        probe = Probe()
+        self.assertEqual(simulate_games(self.policies, 40, seed=5, probe=probe), simulate_games(self.policies, 40, seed=5))
+        report = json.loads(json.dumps(probe.report()))
+        counts = report["counts"]
+        self.assertEqual(counts["games"], 40)
+        self.assertEqual(counts["turns"], counts["banks"] + counts["zilches"])
+        option_calls = sum(policy["choose_option"]["calls"] for policy in report["decisions"].values())
+        self.assertEqual(counts["rolls"], option_calls + counts["zilches"])
+        self.assertLessEqual(counts["builds"], sum(policy["choose_build"]["calls"] for policy in report["decisions"].values()))
+        self.assertEqual(set(report["decisions"]), {"greedy-750", "greedy-1000"})
+        options = report["caches"]["score_index.options"]
+        self.assertEqual(options["hits"] + options["misses"], counts["rolls"])
+
+    def test_worker_probes_merge_into_the_parent(self):
+        serial, parallel = Probe(), Probe()
+        simulate_games(self.policies, 30, seed=6, probe=serial)
+        simulate_games(self.policies, 30, seed=6, workers=2, probe=parallel)
+        self.assertEqual(parallel.report()["counts"], serial.report()["counts"])
+        for key, histogram in serial.latencies.items():
+            self.assertEqual(parallel.latencies[key].calls, histogram.calls)
+
+    def test_variant_games_measure_the_variant_index(self):
+        rules = VARIANTS["six-dice"]
+        probe = Probe(rules=rules)
+        clear_caches("rules.score_index")
+        simulate_games(self.policies, 10, seed=7, probe=probe, rules=rules)
+        report = probe.report()
+        options = report["caches"]["score_index.options"]
+        self.assertEqual(options["hits"] + options["misses"], report["counts"]["rolls"])
+        self.assertGreater(options["misses"], 0)
+        self.assertLessEqual(options["misses"], len(score_index(rules)))
+        with self.assertRaises(ValueError):
+            simulate_games(self.policies, 1, seed=7, probe=Probe(), rules=rules)
+
+    def test_histogram_buckets_and_quantiles(self):
+        histogram = LatencyHistogram()
+        for nanoseconds in (100, 200, 300, 5_000):
+            histogram.add(nanoseconds)
+        self.assertEqual(histogram.quantile(0.0), 128)
+        self.assertEqual(histogram.quantile(0.5), 256)
+        self.assertEqual(histogram.quantile(1.0), 8_192)
+        self.assertEqual(histogram.as_dict()["histogram"], {128: 1, 256: 1, 512: 1, 8_192: 1})
+        self.assertEqual(LatencyHistogram().merge(histogram).calls, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
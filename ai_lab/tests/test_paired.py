@@ -0,0 +1,80 @@
+import unittest
+from collections import Counter
+
+from ai_lab.zilch_ai.dice import CommonDice
+from ai_lab.zilch_ai.paired import PairedStats, iter_pairs, paired_match
+from ai_lab.zilch_ai.policies import GreedyThresholdPolicy
+from ai_lab.zilch_ai.rules import NUM_DICE, counts_for, score_index
+from ai_lab.zilch_ai.sim import GameResult, play_game
+
+
+class CommonDiceTest(unittest.TestCase):
+    def test_rolls_depend_only_on_game_turn_and_roll(self):
+        first, second = CommonDice(7), CommonDice(7)
+        first.start_turn(3)
+        first.roll(4)
+        first.start_turn(5)
+        second.start_turn(5)
+        self.assertEqual([first.roll(n) for n in (10, 6, 2)], [second.roll(n) for n in (10, 6, 2)])
+        other = CommonDice(8)
+        other.start_turn(5)
+        self.assertNotEqual([other.roll(NUM_DICE) for _ in range(3)], [CommonDice(7).roll(NUM_DICE) for _ in range(3)])
+
+    def test_fewer_dice_show_a_prefix_of_the_faces(self):
+        index = score_index()
+        for game in range(20):
+            full, fewer = CommonDice(game), CommonDice(game)
+            all_dice = index.dice(full.roll(NUM_DICE))
+            some_dice = index.dice(fewer.roll(4))
+            self.assertEqual(len(some_dice), 4)
+            self.assertTrue(all(all_dice.count(face) >= some_dice.count(face) for face in set(some_dice)))
+
+    def test_single_die_is_fair(self):
+        index = score_index()
+        dice = CommonDice(1)
+        faces = Counter()
+        for turn in range(6_000):
+            dice.start_turn(turn)
+            faces[index.dice(dice.roll(1))[0]] += 1
+        self.assertEqual(set(faces), set(range(1, 7)))
+        for count in faces.values():
+            self.assertAlmostEqual(count / 6_000, 1 / 6, delta=0.025)
+
+    def test_common_dice_games_replay(self):
+        policies = [GreedyThresholdPolicy(750), GreedyThresholdPolicy(1000)]
+        self.assertEqual(play_game(policies, 11, common_dice=True), play_game(policies, 11, common_dice=True))
+        self.assertEqual(sum(counts_for(score_index().dice(CommonDice(0).roll(NUM_DICE)))), NUM_DICE)
+
+
+class PairedMatchTest(unittest.TestCase):
+    def test_identical_policies_cancel_exactly(self):
+        stats = paired_match(GreedyThresholdPolicy(750), GreedyThresholdPolicy(750), 30)
+        self.assertEqual(stats.pairs, 30)
+        self.assertEqual(stats.split_pairs, 30)
+        self.assertEqual(stats.mean_difference(), 0)
+        self.assertEqual(stats.variance(), 0)
+        self.assertEqual(stats.mean_margin(), 0)
+
+    def test_pairs_share_seeds_with_seats_swapped(self):
+        first, second = GreedyThresholdPolicy(750), GreedyThresholdPolicy(1000)
+        for forward, swapped in iter_pairs(first, second, 5, seed=3):
+            self.assertEqual(len(forward.scores), 2)
+            self.assertEqual(len(swapped.scores), 2)
+        stats = paired_match(first, second, 200, seed=3)
+        self.assertLess(stats.variance(), stats.independent_variance())
+        low, high = stats.interval()
+        self.assertLessEqual(low, stats.mean_difference())
+        self.assertLessEqual(stats.mean_difference(), high)
+
+    def test_difference_bookkeeping(self):
+        stats = PairedStats()
+        stats.add(GameResult(0, (20_000, 19_000), 10), GameResult(1, (18_000, 20_500), 11))
+        stats.add(GameResult(0, (20_000, 19_000), 10), GameResult(0, (21_000, 17_000), 11))
+        self.assertEqual((stats.pairs, stats.first_wins, stats.split_pairs), (2, 3, 1))
+        self.assertEqual(stats.mean_difference(), 0.5)
+        self.assertAlmostEqual(stats.variance(), 0.25)
+        self.assertEqual(stats.mean_margin(), (1_000 + 2_500 + 1_000 - 4_000) / 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
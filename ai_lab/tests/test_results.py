@@ -0,0 +1,78 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+from ai_lab.zilch_ai.batch import simulate_batch
+from ai_lab.zilch_ai.policies import GreedyThresholdPolicy
+from ai_lab.zilch_ai.results import GameResult, GameResults
+from ai_lab.zilch_ai.sim import simulate_games
+from ai_lab.zilch_ai.stats import GameStats
+
+
+class GameResultsTest(unittest.TestCase):
+    def setUp(self):
+        self.games = [
+            GameResult(0, (20_000, 18_000, 500), 10),
+            GameResult(1, (19_000, 20_600, 20_550), 12),
+            GameResult(2, (21_000, 20_900, 21_250), 14),
+        ]
+        self.results = GameResults(3).extend(self.games)
+
+    def test_behaves_like_a_list_of_results(self):
+        self.assertEqual(len(self.results), 3)
+        self.assertEqual(list(self.results), self.games)
+        self.assertEqual(self.results, self.games)
+        self.assertEqual(self.games, self.results)
+        self.assertEqual(self.results[-1], self.games[-1])
+        self.assertEqual(self.results[1:], self.games[1:])
+        self.assertIsInstance(self.results[1:], GameResults)
+        self.assertNotEqual(self.results, self.games[:2])
+        with self.assertRaises(IndexError):
+            self.results[3]
+        with self.assertRaises(ValueError):
+            self.results.append(GameResult(0, (1, 2), 3))
+
+    def test_grows_past_its_capacity(self):
+        results = GameResults(3, capacity=1)
+        for _ in range(700):
+            results.extend(self.results)
+        self.assertEqual(len(results), 2_100)
+        self.assertEqual(results[2_099], self.games[2])
+        self.assertEqual(results.winner.dtype, np.uint8)
+
+    def test_summaries(self):
+        np.testing.assert_array_equal(self.results.win_counts(), [1, 1, 1])
+        np.testing.assert_array_equal(self.results.margins(), [2_000, 50, 250])
+        self.assertEqual(self.results.margin_quantiles(0.5), 250)
+        np.testing.assert_array_equal(self.results.turn_quantiles([0.0, 1.0]), [10, 14])
+        turns, counts = self.results.turn_counts()
+        self.assertEqual((turns.tolist(), counts.tolist()), ([10, 12, 14], [1, 1, 1]))
+        self.assertAlmostEqual(self.results.mean_scores()[0], 20_000)
+
+    def test_game_stats_from_columns_match_per_game_adds(self):
+        results = simulate_games([GreedyThresholdPolicy(750), GreedyThresholdPolicy(1000)], 50, seed=3)
+        self.assertIsInstance(results, GameResults)
+        per_game = GameStats(2)
+        for result in results:
+            per_game.add(result)
+        self.assertEqual(GameStats(2).extend(results), per_game)
+        self.assertEqual(GameStats(3).extend(self.results), GameStats(3).extend(self.games))
+
+    def test_save_maps_and_pickles(self):
+        results = simulate_batch([GreedyThresholdPolicy(750)] * 2, 40, seed=2, batch_size=16)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.zt")
+            results.save(path)
+            loaded = GameResults.load(path)
+            self.assertEqual(loaded, results)
+            self.assertFalse(loaded.scores.flags.writeable)
+            loaded.append(results[0])
+            self.assertEqual(loaded[40], results[0])
+        self.assertEqual(pickle.loads(pickle.dumps(results[5:9])), results[5:9])
+
+
+if __name__ == "__main__":
+    unittest.main()
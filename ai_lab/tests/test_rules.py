@@ -1,6 +1,6 @@
 import unittest
 
-from ai_lab.zilch_ai.rules import roll_dice, score_options
+from ai_lab.zilch_ai.rules import NUM_DICE, counts_for, roll_dice, score_index, score_options
 
 
 def compact(options):
@@ -49,6 +49,24 @@ class RulesTest(unittest.TestCase):
         self.assert_has([1, 5, 5, 5, 6, 1, 5, 2, 1, 6], 2000, "1115555", 3)
         self.assert_has([1, 2, 3, 4, 5, 6, 1, 5], 1650, "11234565", 0)
 
+    def test_index_matches_described_options(self):
+        index = score_index()
+        self.assertEqual(len(index), 8008)
+        for outcome in (0, 1, 7, 500, 4000, len(index) - 1):
+            dice = index.dice(outcome)
+            self.assertEqual(index.outcome_for(counts_for(dice)), outcome)
+            self.assertEqual(score_options(dice), score_options(dice, describe=True))
+        self.assertEqual(index.outcomes_for(index.counts).tolist(), list(range(len(index))))
+        self.assertEqual(index.outcomes_for([[NUM_DICE + 1, 0, 0, 0, 0, 0], [0, -1, 1, 0, 0, 0]]).tolist(), [-1, -1])
+
+    def test_descriptions_only_on_request(self):
+        dice = (1, 1, 1, 2, 3)
+        self.assertEqual(score_options(dice)[0].descriptions, ())
+        self.assertEqual(score_options(dice, describe=True)[0].descriptions, ("3 1's (1000)",))
+
+    def test_rolls_beyond_the_index_are_still_scored(self):
+        self.assertIn(6000, {option.points for option in score_options((1,) * (NUM_DICE + 1))})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,120 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from ai_lab.tests import setUpModule, tearDownModule  # noqa: F401
+from ai_lab.zilch_ai.policies import GreedyThresholdPolicy, TurnView
+from ai_lab.zilch_ai.rules import NUM_DICE, ScoreOption, score_options
+from ai_lab.zilch_ai.search import MCTSPolicy, SearchState, rollout_wins
+from ai_lab.zilch_ai.sim import play_game
+
+
+class SearchStateTest(unittest.TestCase):
+    def test_bank_passes_the_turn_like_play_game(self):
+        state = SearchState((900, 400), 0, (False, False), in_turn=True, locked_points=100, loose_score=50, free_dice=3)
+        after = state.bank(target_score=1_000)
+        self.assertEqual(after.scores, (1_050, 400))
+        self.assertTrue(after.final_round)
+        self.assertEqual(after.played_final_turn, (True, False))
+        self.assertEqual((after.player_index, after.turn_number), (1, 2))
+        self.assertEqual((after.inherited_score, after.inherited_free_dice, after.in_turn), (150, 3, False))
+        self.assertIsNone(after.winner)
+
+        last = after.start(build=True).bank(target_score=1_000)
+        self.assertEqual(last.scores, (1_050, 550))
+        self.assertEqual(last.winner, 0)
+
+    def test_take_locks_all_dice(self):
+        state = SearchState((0, 0), 0, (False, False), in_turn=True, loose_score=200, free_dice=2)
+        locked = state.take(ScoreOption(100, (1,), ()))
+        self.assertEqual((locked.locked_points, locked.loose_score, locked.free_dice), (300, 0, NUM_DICE))
+
+    def test_from_view_finds_final_turns_played(self):
+        view = TurnView(2, (20_500, 20_100, 19_000, 18_000), 0, NUM_DICE, 0, 0, NUM_DICE, final_round=True)
+        self.assertEqual(SearchState.from_view(view).played_final_turn, (True, True, False, False))
+        view = TurnView(0, (19_000, 20_100, 20_500, 18_000), 0, NUM_DICE, 0, 0, NUM_DICE, final_round=True)
+        self.assertEqual(SearchState.from_view(view).played_final_turn, (False, True, True, True))
+
+
+class RolloutTest(unittest.TestCase):
+    def test_rollouts_are_counted_and_repeatable(self):
+        policies = [GreedyThresholdPolicy(300)] * 2
+        states = [
+            SearchState((800, 900), 0, (False, False)),
+            SearchState((1_200, 900), 1, (True, True), final_round=True, winner=0),
+        ]
+        wins = rollout_wins(states, [40, 7], policies, np.random.default_rng(3), target_score=1_000)
+        self.assertEqual(wins.sum(axis=1).tolist(), [40, 7])
+        self.assertEqual(wins[1].tolist(), [7, 0])
+        again = rollout_wins(states, [40, 7], policies, np.random.default_rng(3), target_score=1_000)
+        np.testing.assert_array_equal(wins, again)
+
+
+class MCTSPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.policy = MCTSPolicy(GreedyThresholdPolicy(300), rollouts=64, batch_size=16, target_score=1_000)
+
+    def test_banks_a_won_final_turn_and_rolls_a_lost_one(self):
+        ahead = TurnView(1, (1_100, 900), 0, NUM_DICE, 100, 150, 2, final_round=True)
+        self.assertTrue(self.policy.should_bank(ahead))
+        self.assertEqual(self.policy.last_result.win_rates()[1], 1.0)
+        self.assertGreaterEqual(self.policy.last_result.rollouts, 64)
+
+        behind = TurnView(1, (1_100, 900), 0, NUM_DICE, 0, 150, 2, final_round=True)
+        self.assertFalse(self.policy.should_bank(behind))
+        self.assertEqual(self.policy.last_result.win_rates()[1], 0.0)
+
+    def test_equal_options_are_not_searched(self):
+        option = ScoreOption(50, (5,), (2, 3))
+        view = TurnView(0, (0, 0), 0, NUM_DICE, 0, 0, 3)
+        self.assertIs(self.policy.choose_option((2, 3, 5), (option,), view), option)
+        self.assertIsNone(self.policy.last_result)
+
+    def test_time_budget_and_pickling(self):
+        policy = MCTSPolicy(GreedyThresholdPolicy(300), rollouts=None, time_budget=0.01, batch_size=8, target_score=1_000)
+        view = TurnView(0, (600, 700), 300, 4, 0, 0, NUM_DICE)
+        policy.choose_build(view)
+        self.assertEqual(len(policy.last_result.visits), 2)
+        self.assertIsInstance(pickle.loads(pickle.dumps(policy)), MCTSPolicy)
+        with self.assertRaises(ValueError):
+            MCTSPolicy(rollouts=None, time_budget=None)
+
+    def test_budgets_are_not_overrun(self):
+        dice = (1, 1, 1, 2, 2, 2, 3, 4, 5, 5)
+        options = score_options(dice)
+        view = TurnView(0, (5_000, 6_000), 0, NUM_DICE, 0, 0, NUM_DICE)
+        policy = MCTSPolicy(GreedyThresholdPolicy(300), rollouts=100)
+        policy.choose_option(dice, options, view)
+        children = len(policy.last_result.visits)
+        self.assertGreater(children, 12)
+        self.assertLessEqual(policy.last_result.rollouts, 100)
+        self.assertGreaterEqual(policy.last_result.rollouts, 100 - children)
+
+        policy = MCTSPolicy(GreedyThresholdPolicy(300), rollouts=None, time_budget=0.05)
+        policy.choose_option(dice, options, view)
+        self.assertLess(policy.last_result.seconds, 0.15)
+        self.assertTrue(all(policy.last_result.visits))
+
+        policy = MCTSPolicy(GreedyThresholdPolicy(300), rollouts=3)
+        policy.choose_option(dice, options, view)
+        self.assertEqual(policy.last_result.visits, (1,) * children)
+
+    def test_rollouts_on_a_process_pool(self):
+        with MCTSPolicy(GreedyThresholdPolicy(300), rollouts=64, batch_size=16, workers=2, target_score=1_000) as policy:
+            view = TurnView(1, (1_100, 900), 0, NUM_DICE, 100, 150, 2, final_round=True)
+            self.assertTrue(policy.should_bank(view))
+            self.assertEqual(policy.last_result.visits[0] % 16, 0)
+            pool = policy._pool
+            self.assertIsNotNone(pool)
+        self.assertIsNone(policy._pool)
+        with self.assertRaises(RuntimeError):
+            pool.submit(int)
+
+    def test_plays_a_game(self):
+        result = play_game([self.policy, GreedyThresholdPolicy(300)], seed=4, target_score=1_000)
+        self.assertGreaterEqual(max(result.scores), 1_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
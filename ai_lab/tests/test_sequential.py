@@ -0,0 +1,81 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from math import log
+from unittest import mock
+
+from ai_lab.zilch_ai import sim
+from ai_lab.zilch_ai.policies import GreedyThresholdPolicy, RandomPolicy
+from ai_lab.zilch_ai.results import GameResult
+from ai_lab.zilch_ai.sequential import _unrotate, bernoulli_llr, sequential_match, sprt_bounds
+
+
+class SequentialMatchTest(unittest.TestCase):
+    def test_lopsided_match_stops_early(self):
+        result = sequential_match([GreedyThresholdPolicy(750), RandomPolicy()], batch_size=50, max_games=2_000)
+        self.assertEqual(result.decision, "better")
+        self.assertLess(result.games, 2_000)
+        self.assertEqual(result.stats.games, result.games)
+        self.assertGreater(result.log_likelihood_ratios[0], sprt_bounds(0.025, 0.05)[1])
+
+    def test_reversed_seats_report_worse(self):
+        result = sequential_match([RandomPolicy(), GreedyThresholdPolicy(750)], batch_size=50, max_games=2_000)
+        self.assertEqual(result.decision, "worse")
+
+    def test_precision_mode_narrows_interval(self):
+        policies = [GreedyThresholdPolicy(750), GreedyThresholdPolicy(1000)]
+        result = sequential_match(policies, precision=0.1, batch_size=40, max_games=2_000, engine="batch")
+        low, high = result.interval
+        self.assertLessEqual(high - low, 0.2)
+        self.assertLessEqual(low, result.stats.win_rate(0))
+        self.assertLessEqual(result.stats.win_rate(0), high)
+        self.assertEqual(result.games % 40, 0)
+
+    def test_cap_leaves_close_match_undecided(self):
+        policies = [GreedyThresholdPolicy(750), GreedyThresholdPolicy(750)]
+        result = sequential_match(policies, delta=0.01, batch_size=20, max_games=60)
+        self.assertEqual(result.decision, "undecided")
+        self.assertEqual(result.games, 60)
+
+    def test_identical_policies_are_equivalent_despite_seat_advantage(self):
+        policies = [GreedyThresholdPolicy(750), GreedyThresholdPolicy(750)]
+        for delta in (0.05, 0.02):
+            result = sequential_match(policies, delta=delta, max_games=50_000, engine="batch")
+            self.assertEqual(result.decision, "equivalent")
+            self.assertEqual(result.games % 2, 0)
+            self.assertLess(result.interval[0], 0.5)
+            self.assertGreater(result.interval[1], 0.5)
+
+    def test_early_stop_on_a_pool_leaves_little_work_played(self):
+        submitted = []
+
+        class CountingPool(ProcessPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                future = super().submit(fn, *args, **kwargs)
+                submitted.append((len(args[0]), future))
+                return future
+
+        policies = [GreedyThresholdPolicy(750), RandomPolicy()]
+        with mock.patch.object(sim, "ProcessPoolExecutor", CountingPool):
+            result = sequential_match(policies, batch_size=50, max_games=100_000, workers=2)
+        played = sum(size for size, future in submitted if not future.cancelled())
+        self.assertEqual(result.decision, "better")
+        self.assertGreaterEqual(played, result.games)
+        self.assertLessEqual(played, 4 * 50)
+        serial = sequential_match(policies, batch_size=50, max_games=100_000)
+        self.assertEqual((serial.decision, serial.games), (result.decision, result.games))
+
+    def test_results_are_counted_by_policy(self):
+        result = _unrotate(GameResult(0, (300, 100, 200), 7), 2)
+        self.assertEqual(result, GameResult(2, (100, 200, 300), 7))
+
+    def test_wald_bounds_and_llr(self):
+        lower, upper = sprt_bounds(0.05, 0.1)
+        self.assertAlmostEqual(lower, log(0.1 / 0.95))
+        self.assertAlmostEqual(upper, log(0.9 / 0.05))
+        self.assertAlmostEqual(bernoulli_llr(6, 4, 0.5, 0.6), 6 * log(1.2) + 4 * log(0.8))
+        with self.assertRaises(ValueError):
+            sequential_match([GreedyThresholdPolicy(), GreedyThresholdPolicy()], delta=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,19 @@
 import unittest
 
-from ai_lab.zilch_ai.policies import EVPolicy, GreedyThresholdPolicy, TurnView
-from ai_lab.zilch_ai.sim import play_game
+from random import Random
+
+from ai_lab.tests import setUpModule, tearDownModule  # noqa: F401
+from ai_lab.zilch_ai.policies import EVPolicy, GreedyThresholdPolicy, Policy, ScoresView, TurnView
+from ai_lab.zilch_ai.sim import play_game, play_turn, simulate_games
+
+
+class RecordingPolicy(Policy):
+    def __init__(self):
+        self.seen = []
+
+    def should_bank(self, view):
+        self.seen.append((id(view), tuple(view.scores), view.loose_score, view.free_dice))
+        return len(self.seen) >= 3
 
 
 class SimTest(unittest.TestCase):
@@ -14,6 +26,31 @@ class SimTest(unittest.TestCase):
         result = play_game([EVPolicy(), GreedyThresholdPolicy(750)], seed=9)
         self.assertGreaterEqual(max(result.scores), 20_000)
 
+    def test_play_turn_updates_one_view_in_place(self):
+        scores = [1_000, 2_000]
+        view = TurnView(0, ScoresView(scores), 0, 10, 0, 0, 10)
+        policy = RecordingPolicy()
+        for seed in range(20):
+            play_turn(policy, 1, scores, 0, 10, False, Random(seed), view)
+        self.assertTrue(policy.seen)
+        self.assertEqual({seen[0] for seen in policy.seen}, {id(view)})
+        self.assertTrue(all(seen[1] == (1_000, 2_000) for seen in policy.seen))
+        self.assertEqual(view.player_index, 1)
+
+    def test_scores_view_is_read_only(self):
+        view = ScoresView([5, 7])
+        self.assertEqual(view, (5, 7))
+        self.assertEqual(max(view), 7)
+        self.assertEqual(view[1:], (7,))
+        with self.assertRaises(TypeError):
+            view[0] = 3
+
+    def test_parallel_results_do_not_depend_on_worker_count(self):
+        lineup = [EVPolicy(), GreedyThresholdPolicy(750)]
+        serial = simulate_games(lineup, 12, seed=5)
+        self.assertEqual(simulate_games(lineup, 12, seed=5, workers=2), serial)
+        self.assertEqual(simulate_games(lineup, 12, seed=5, workers=3), serial)
+
     def test_ev_policy_requires_closing_buffer_before_first_to_target_banks(self):
         policy = EVPolicy()
         weak_lead = TurnView(
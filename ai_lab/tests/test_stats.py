@@ -0,0 +1,48 @@
+import unittest
+from itertools import islice
+
+from ai_lab.zilch_ai.policies import GreedyThresholdPolicy
+from ai_lab.zilch_ai.sim import GameResult, iter_games, simulate_games
+from ai_lab.zilch_ai.stats import GameStats, wilson_interval
+
+
+class GameStatsTest(unittest.TestCase):
+    def test_shards_merge_exactly(self):
+        results = simulate_games([GreedyThresholdPolicy(750), GreedyThresholdPolicy(1000)], 60, seed=2)
+        whole = GameStats(2).extend(results)
+        shards = [GameStats(2).extend(results[start : start + 17]) for start in range(0, 60, 17)]
+        merged = GameStats(2)
+        for shard in reversed(shards):
+            merged.merge(shard)
+        self.assertEqual(merged, whole)
+        self.assertEqual(shards[0] + shards[1], GameStats(2).extend(results[:34]))
+        self.assertEqual(sum(whole.wins), 60)
+        self.assertEqual(sum(whole.turn_histogram().values()), 60)
+
+    def test_summaries(self):
+        stats = GameStats(2).extend(
+            [
+                GameResult(0, (20_000, 18_000), 10),
+                GameResult(1, (19_000, 20_600), 12),
+                GameResult(0, (21_000, 20_900), 14),
+            ]
+        )
+        self.assertAlmostEqual(stats.win_rate(0), 2 / 3)
+        self.assertEqual(stats.mean_turns(), 12)
+        self.assertEqual(stats.turn_quantile(0.5), 12)
+        self.assertEqual(stats.margin_histogram(), {0: 1, 1_500: 1, 2_000: 1})
+        self.assertEqual(stats.mean_score(1), 19_833 + 1 / 3)
+
+    def test_wilson_interval(self):
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=3)
+        self.assertAlmostEqual(high, 0.5962, places=3)
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+
+    def test_iter_games_streams_simulate_games(self):
+        lineup = [GreedyThresholdPolicy(750), GreedyThresholdPolicy(1000)]
+        self.assertEqual(list(islice(iter_games(lineup, 10**9, seed=4), 5)), simulate_games(lineup, 5, seed=4))
+
+
+if __name__ == "__main__":
+    unittest.main()
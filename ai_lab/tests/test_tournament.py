@@ -0,0 +1,119 @@
+import argparse
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from ai_lab import tournament
+from ai_lab.tests import setUpModule, tearDownModule  # noqa: F401
+from ai_lab.zilch_ai import tournament as zilch_tournament
+from ai_lab.zilch_ai.policies import EVPolicy, GreedyThresholdPolicy, RandomPolicy
+from ai_lab.zilch_ai.stats import GameStats
+from ai_lab.zilch_ai.tournament import ResultStore, build_policy, check_spec, play_block, play_tournament, rank, schedule
+
+
+class ScheduleTest(unittest.TestCase):
+    def test_seatings_rotate_every_combination(self):
+        seatings = schedule(["a", "b", "c"], players=(2, 3))
+        self.assertEqual(len(seatings), 3 * 2 + 3)
+        self.assertIn(("b", "a"), seatings)
+        self.assertIn(("c", "a", "b"), seatings)
+        self.assertEqual(len(set(seatings)), len(seatings))
+        with self.assertRaises(ValueError):
+            schedule(["a", "a"])
+        with self.assertRaises(ValueError):
+            schedule(["a", "b"], players=(3,))
+
+    def test_build_policy_specs(self):
+        self.assertIsInstance(build_policy("greedy-400"), GreedyThresholdPolicy)
+        self.assertIsInstance(build_policy("random"), RandomPolicy)
+        tuned = build_policy("ev(horizon=2, max_loose=1000, low_free_dice=1000)", target_score=2_000)
+        self.assertIsInstance(tuned, EVPolicy)
+        self.assertEqual((tuned.name, tuned.target_score, tuned.table.horizon), ("ev(horizon=2, max_loose=1000, low_free_dice=1000)", 2_000, 2))
+        self.assertEqual(build_policy("greedy(bank_threshold=300)").bank_threshold, 300)
+        for spec in ("mcts", "greedy(horizon=3)", "ev(horizon=x)"):
+            with self.assertRaises(ValueError):
+                build_policy(spec)
+            with self.assertRaises(ValueError):
+                check_spec(spec)
+
+
+class RankTest(unittest.TestCase):
+    def test_bradley_terry_orders_and_scales(self):
+        results = {
+            ("a", "b"): GameStats(2, 100, [75, 25]),
+            ("b", "c"): GameStats(2, 100, [75, 25]),
+            ("a", "b", "c"): GameStats(3, 90, [60, 20, 10]),
+        }
+        standings = rank(results, prior=0.0)
+        self.assertEqual([rating.spec for rating in standings.ratings], ["a", "b", "c"])
+        self.assertAlmostEqual(sum(rating.rating for rating in standings.ratings) / 3, 1500)
+        for rating in standings.ratings:
+            self.assertAlmostEqual(rating.expected_wins, rating.wins, places=4)
+        self.assertEqual((standings.games, standings.seatings), (290, 3))
+
+    def test_prior_keeps_unbeaten_specs_finite(self):
+        standings = rank({("a", "b"): GameStats(2, 10, [10, 0])})
+        self.assertGreater(standings.ratings[0].rating, standings.ratings[1].rating)
+        self.assertLess(standings.ratings[0].rating, 3000)
+        self.assertEqual(rank({}).ratings, ())
+
+
+class TournamentTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "results.sqlite")
+
+    def test_reruns_only_play_new_blocks(self):
+        with ResultStore(self.path) as store:
+            first = play_tournament(["greedy-300", "greedy-750"], store, games=8, block_size=4, target_score=2_000)
+            self.assertEqual((first.played, first.stored, first.games_played), (4, 0, 16))
+
+            again = play_tournament(["greedy-300", "greedy-750"], store, games=8, block_size=4, target_score=2_000)
+            self.assertEqual((again.played, again.stored), (0, 4))
+            self.assertEqual(again.standings, first.standings)
+
+            grown = play_tournament(["greedy-300", "greedy-750", "random"], store, games=8, block_size=4, target_score=2_000)
+            self.assertEqual((grown.played, grown.stored), (8, 4))
+            self.assertEqual(grown.standings.ratings[-1].spec, "random")
+
+        with ResultStore(self.path) as store:
+            stats = store.results(2_000)[("greedy-750", "greedy-300")]
+            self.assertEqual(stats.games, 8)
+            self.assertEqual(stats.wins, play_block(("greedy-750", "greedy-300"), 20260617, 20260625, 2_000).wins)
+            self.assertEqual(store.results(), {})
+            self.assertEqual(store.forget("random"), 8)
+            self.assertEqual(len(store.blocks(2_000)), 4)
+
+    def test_workers_match_a_single_process(self):
+        roster = ["greedy-300", "greedy-750", "random"]
+        with ResultStore(self.path) as store:
+            serial = play_tournament(roster, store, games=4, players=(2, 3), block_size=2, target_score=2_000)
+        with ResultStore(self.path + "-pool") as store:
+            parallel = play_tournament(roster, store, games=4, players=(2, 3), block_size=2, target_score=2_000, workers=2)
+        self.assertEqual(serial.standings, parallel.standings)
+        self.assertEqual(serial.played, 2 * (6 + 3))
+
+    def test_command_prints_standings(self):
+        output = io.StringIO()
+        args = ["--policy", "greedy-300", "--policy", "greedy-750", "--games", "4", "--block-size", "2", "--target", "2000"]
+        with redirect_stdout(output):
+            tournament.main([*args, "--store", self.path])
+            tournament.main([*args, "--store", self.path])
+        self.assertIn("played 4 blocks", output.getvalue())
+        self.assertIn("played 0 blocks (0 games), reused 4", output.getvalue())
+        self.assertIn("greedy-750", output.getvalue())
+
+    def test_command_checks_specs_without_building_them(self):
+        with mock.patch.object(zilch_tournament, "build_policy", side_effect=AssertionError("built while parsing")):
+            self.assertEqual(tournament.policy_spec("ev(horizon=5)"), "ev(horizon=5)")
+            self.assertEqual(tournament.policy_spec("endgame"), "endgame")
+            with self.assertRaises(argparse.ArgumentTypeError):
+                tournament.policy_spec("ev(horizon=x)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from random import Random
+
+from ai_lab.tests import setUpModule, tearDownModule  # noqa: F401
+from ai_lab.zilch_ai.policies import EVPolicy, GreedyThresholdPolicy, RandomPolicy
+from ai_lab.zilch_ai.sim import play_game, simulate_games
+from ai_lab.zilch_ai.storage import TableFileError
+from ai_lab.zilch_ai.traces import TraceReader, TraceWriter, decode, index_path, record_games
+
+
+class TraceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "games.trace")
+        self.policies = [EVPolicy(), GreedyThresholdPolicy(750)]
+
+    def test_replay_matches_the_played_games(self):
+        reader = record_games(self.policies, 20, self.path, seed=5)
+        results = simulate_games(self.policies, 20, seed=5)
+        self.assertEqual(len(reader), 20)
+        self.assertEqual([reader.replay(game) for game in range(20)], results)
+        self.assertEqual(reader.winner.tolist(), [result.winner_index for result in results])
+        self.assertEqual(os.path.getsize(self.path), 4 * int(reader.length.sum()))
+
+    def test_games_are_seekable_and_decode(self):
+        reader = record_games(self.policies, 5, self.path, seed=5)
+        records = reader.game(3)
+        self.assertEqual(len(records), reader.length[3])
+        outcome, option, banked, built = decode(records)
+        decisions = list(reader.decisions(3))
+        self.assertEqual(int(banked.sum()), sum(d.kind == "bank" and d.choice for d in decisions))
+        self.assertEqual(int(built.sum()), sum(d.kind == "build" and d.choice for d in decisions))
+        self.assertEqual(int((option >= 0).sum()), sum(d.kind == "option" for d in decisions))
+        self.assertTrue(banked[-1] or option[-1] == -1)
+        self.assertTrue((outcome > 0).all())
+
+    def test_decisions_carry_the_recorded_views(self):
+        reader = record_games(self.policies, 3, self.path, seed=8)
+        for decision in reader.decisions(0):
+            policy = self.policies[decision.view.player_index]
+            if decision.kind == "option":
+                self.assertEqual(policy.choose_option(decision.dice, decision.options, decision.view), decision.options[decision.choice])
+            elif decision.kind == "bank":
+                self.assertEqual(policy.should_bank(decision.view), decision.choice)
+            else:
+                self.assertEqual(policy.choose_build(decision.view), decision.choice)
+
+    def test_compare_with_other_policies(self):
+        reader = record_games(self.policies, 4, self.path, seed=8)
+        same = reader.compare(self.policies)
+        self.assertEqual(same.agreement(), 1.0)
+        self.assertEqual(same.divergences, {})
+        self.assertEqual(same.games, 4)
+
+        other = reader.compare([GreedyThresholdPolicy(300), None], games=[1, 2])
+        self.assertEqual(other.games, 2)
+        self.assertLess(other.agreement("bank"), 1.0)
+        self.assertTrue(set(other.divergences) <= {1, 2})
+        self.assertIn("bank:", other.format())
+
+    def test_max_turns_and_common_dice(self):
+        policies = [RandomPolicy(Random(1)), RandomPolicy(Random(2))]
+        with TraceWriter(self.path) as writer:
+            capped = play_game(policies, seed=3, max_turns=7, trace=writer)
+            common = play_game(self.policies, seed=4, target_score=2_000, common_dice=True, trace=writer)
+        reader = TraceReader(self.path)
+        self.assertEqual(reader.replay(0), capped)
+        self.assertEqual(reader.replay(1), common)
+        self.assertEqual((reader.seed.tolist(), reader.target.tolist()), ([3, 4], [20_000, 2_000]))
+
+    def test_mismatched_index_is_rejected(self):
+        record_games(self.policies, 2, self.path)
+        with open(self.path, "ab") as trace:
+            trace.write(b"\0\0\0\0")
+        with self.assertRaises(TableFileError):
+            TraceReader(self.path)
+        os.remove(index_path(self.path))
+        with self.assertRaises(OSError):
+            TraceReader(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from ai_lab import tune
+from ai_lab.zilch_ai.ev import EVTable
+from ai_lab.zilch_ai.policies import EVPolicy, GreedyThresholdPolicy
+from ai_lab.zilch_ai.tuning import Candidate, candidates, successive_halving
+
+
+class CandidateTest(unittest.TestCase):
+    def test_grid_covers_every_combination(self):
+        grid = candidates("ev", {"horizon": [2, 3], "high_free_dice": [3_000, 5_000]})
+        self.assertEqual(len(grid), 4)
+        self.assertEqual(grid[0].name, "ev(horizon=2, high_free_dice=3000)")
+        self.assertEqual(grid[0].table_settings(), (8_000, 2))
+        with self.assertRaises(ValueError):
+            candidates("greedy", {"horizon": [3]})
+        with self.assertRaises(ValueError):
+            candidates("mcts", {})
+
+    def test_build_applies_settings(self):
+        table = EVTable(max_loose=1_000, horizon=2, cache=False)
+        policy = Candidate("ev", (("low_free_dice", 1_000),)).build(table)
+        self.assertIsInstance(policy, EVPolicy)
+        self.assertIs(policy.table, table)
+        self.assertEqual(policy.closing_buffers["low_free_dice"], 1_000)
+        self.assertEqual(policy.closing_buffers["high_free_dice"], EVPolicy.closing_buffers["high_free_dice"])
+        self.assertEqual(EVPolicy.closing_buffers["low_free_dice"], 2_500)
+
+        greedy = Candidate("greedy", (("bank_threshold", 400),)).build()
+        self.assertEqual(greedy.bank_threshold, 400)
+        self.assertEqual(greedy.name, "greedy(bank_threshold=400)")
+
+
+class SuccessiveHalvingTest(unittest.TestCase):
+    def test_halves_survivors_and_ranks_them(self):
+        grid = candidates("greedy", {"bank_threshold": [50, 400, 750, 1_500]})
+        report = successive_halving(grid, [GreedyThresholdPolicy(750)], initial_seeds=6, eta=2)
+        self.assertEqual(report.rounds, 3)
+        self.assertEqual([score.rounds for score in report.ranking], [3, 2, 1, 1])
+        self.assertEqual([score.games for score in report.ranking], [2 * (6 + 12 + 24), 2 * (6 + 12), 12, 12])
+        self.assertEqual(report.games, sum(score.games for score in report.ranking))
+        self.assertGreaterEqual(report.ranking[2].win_rate, report.ranking[3].win_rate)
+        self.assertEqual(report.best, report.ranking[0].candidate)
+        self.assertEqual(report.tables, 0)
+        self.assertIn("greedy(bank_threshold=", report.format())
+
+    def test_workers_match_a_single_process(self):
+        grid = candidates("greedy", {"bank_threshold": [300, 750, 1_000]})
+        reference = [GreedyThresholdPolicy(750), GreedyThresholdPolicy(1_000)]
+        serial = successive_halving(grid, reference, initial_seeds=4, eta=3)
+        parallel = successive_halving(grid, reference, initial_seeds=4, eta=3, workers=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial.ranking[0].games, 3 * (4 + 12))
+
+    def test_candidates_share_tables(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            grid = candidates("ev", {"max_loose": [1_000], "horizon": [2], "low_free_dice": [1_000, 2_500]})
+            grid += candidates("ev", {"max_loose": [1_000], "horizon": [1]})
+            report = successive_halving(grid, [GreedyThresholdPolicy(750)], initial_seeds=2, max_rounds=1, cache=cache_dir)
+        self.assertEqual(report.tables, 2)
+        self.assertEqual(report.rounds, 1)
+
+
+class TuneCommandTest(unittest.TestCase):
+    def test_prints_ranked_report(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            tune.main(["--family", "greedy", "--param", "bank_threshold=300,1000", "--seeds", "2", "--reference", "greedy-750"])
+        self.assertIn("best: greedy(bank_threshold=", output.getvalue())
+        self.assertIn("vs greedy-750", output.getvalue())
+
+    def test_eta_below_two_is_a_usage_error(self):
+        with redirect_stderr(io.StringIO()) as errors, self.assertRaises(SystemExit) as raised:
+            tune.main(["--family", "greedy", "--param", "bank_threshold=300,1000", "--eta", "1"])
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn("--eta must be at least 2", errors.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
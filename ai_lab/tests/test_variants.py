@@ -0,0 +1,135 @@
+import pickle
+import tempfile
+import unittest
+
+from ai_lab.zilch_ai.batch import simulate_batch
+from ai_lab.zilch_ai.caching import cache_stats
+from ai_lab.zilch_ai.dice import CommonDice
+from ai_lab.zilch_ai.endgame import EndgameTable
+from ai_lab.zilch_ai.ev import EVTable
+from ai_lab.zilch_ai.policies import EVPolicy, GreedyThresholdPolicy
+from ai_lab.zilch_ai.rules import (
+    NUM_DICE,
+    STANDARD_RULES,
+    TARGET_SCORE,
+    VARIANTS,
+    RuleSet,
+    compile_score_index,
+    rules_fingerprint,
+    score_index,
+    score_options,
+)
+from ai_lab.zilch_ai.sim import play_game, simulate_games
+
+
+SIX_DICE = VARIANTS["six-dice"]
+
+
+class RuleSetTest(unittest.TestCase):
+    def test_standard_rules_are_the_defaults(self):
+        self.assertEqual((STANDARD_RULES.num_dice, STANDARD_RULES.target_score), (NUM_DICE, TARGET_SCORE))
+        self.assertIs(score_index(), score_index(STANDARD_RULES))
+        self.assertEqual(rules_fingerprint(), rules_fingerprint(RuleSet()))
+        self.assertEqual(STANDARD_RULES.of_a_kind, (1_000, 2_000, 3_000, 4_000, 5_000, 6_000, 7_000))
+
+    def test_invalid_rule_sets(self):
+        with self.assertRaises(ValueError):
+            RuleSet(num_dice=0)
+        with self.assertRaises(ValueError):
+            RuleSet(num_dice=12)
+        with self.assertRaises(ValueError):
+            RuleSet(triples=(1_000, 200))
+        with self.assertRaises(ValueError):
+            RuleSet(num_dice=8, of_a_kind=(1_000,))
+
+    def test_variant_scoring(self):
+        doubling = VARIANTS["doubling-kinds"]
+        sixes = (6,) * 6
+        self.assertEqual(max(score_options(sixes)).points, 3_000)
+        self.assertEqual(max(score_options(sixes, rules=doubling)).points, 4_000)
+        self.assertNotEqual(rules_fingerprint(doubling), rules_fingerprint())
+
+        no_straight = RuleSet(straight=None)
+        self.assertIn(1_500, {option.points for option in score_options((1, 2, 3, 4, 5, 6))})
+        self.assertNotIn(1_500, {option.points for option in score_options((1, 2, 3, 4, 5, 6), rules=no_straight)})
+
+        fives = RuleSet(singles=((1, 100), (5, 50), (6, 60)))
+        self.assertIn(60, {option.points for option in score_options((2, 3, 6), rules=fives)})
+        self.assertEqual(score_options((2, 3, 6)), ())
+
+
+class VariantIndexTest(unittest.TestCase):
+    def test_outcomes_are_numbered_alike(self):
+        index = score_index(SIX_DICE)
+        self.assertEqual(len(index), 924)
+        self.assertEqual(len(score_index(VARIANTS["eight-dice"])), 3_003)
+        standard = score_index()
+        for outcome in range(0, len(index), 37):
+            self.assertEqual(index.dice(outcome), standard.dice(outcome))
+            self.assertEqual(index.options(outcome), standard.options(outcome))
+        self.assertIsNone(index.outcome_for_dice((1,) * 7))
+
+    def test_compiled_and_cached_indexes_agree(self):
+        compiled = compile_score_index(SIX_DICE)
+        cached = score_index(SIX_DICE)
+        for name in ("counts", "option_start", "option_points", "option_free_dice"):
+            self.assertEqual(getattr(compiled, name).tolist(), getattr(cached, name).tolist())
+
+    def test_compiling_keeps_other_described_options(self):
+        score_options((1, 1, 5), describe=True)
+        compile_score_index(SIX_DICE)
+        misses = cache_stats()["rules.described_options"].misses
+        score_options((1, 1, 5), describe=True)
+        self.assertEqual(cache_stats()["rules.described_options"].misses, misses)
+
+    def test_common_dice_roll_within_the_variant(self):
+        dice = CommonDice(5, SIX_DICE)
+        outcome = dice.roll(SIX_DICE.num_dice)
+        self.assertLess(outcome, len(score_index(SIX_DICE)))
+        self.assertEqual(len(score_index(SIX_DICE).dice(outcome)), SIX_DICE.num_dice)
+
+
+class VariantPlayTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.table = EVTable(max_loose=2_000, horizon=3, cache=self.cache_dir.name, rules=SIX_DICE)
+
+    def test_ev_tables_are_kept_apart(self):
+        standard = EVTable(max_loose=2_000, horizon=3, cache=self.cache_dir.name)
+        self.assertEqual(self.table.values.shape[1], SIX_DICE.num_dice + 1)
+        self.assertNotEqual(self.table.cache_key, standard.cache_key)
+        self.assertNotEqual(self.table.cache_path(), standard.cache_path())
+        self.assertLess(self.table.roll_value(0, 0), standard.roll_value(0, 0))
+
+        reloaded = pickle.loads(pickle.dumps(self.table))
+        self.assertEqual(reloaded.rules, SIX_DICE)
+        self.assertEqual(reloaded.values.tolist(), self.table.values.tolist())
+
+    def test_games_use_the_variant(self):
+        policy = EVPolicy(self.table)
+        self.assertEqual(policy.target_score, SIX_DICE.target_score)
+        result = play_game([policy, GreedyThresholdPolicy(300)], seed=2, rules=SIX_DICE, common_dice=True)
+        self.assertGreaterEqual(max(result.scores), SIX_DICE.target_score)
+        self.assertLess(max(result.scores), TARGET_SCORE)
+
+        results = simulate_games([policy, GreedyThresholdPolicy(300)], 8, seed=4, rules=SIX_DICE)
+        self.assertEqual(len(results), 8)
+        self.assertTrue((results.scores.max(axis=1) >= SIX_DICE.target_score).all())
+
+    def test_standard_only_tables_refuse_variants(self):
+        with self.assertRaises(ValueError):
+            EndgameTable(self.table, window=300, turn_cap=400, cache=False)
+
+    def test_policies_must_match_the_game_rules(self):
+        standard = EVPolicy(EVTable(max_loose=2_000, horizon=3, cache=self.cache_dir.name))
+        with self.assertRaises(ValueError):
+            play_game([standard, GreedyThresholdPolicy(300)], seed=1, rules=SIX_DICE)
+        with self.assertRaises(ValueError):
+            play_game([EVPolicy(self.table), GreedyThresholdPolicy(300)], seed=1)
+        with self.assertRaises(ValueError):
+            simulate_batch([EVPolicy(self.table), GreedyThresholdPolicy(300)], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Run an incremental round-robin tournament and print Bradley–Terry ratings.
+
+    python -m ai_lab.tournament --policy ev --policy greedy-750 --policy greedy-1000 --games 2000
+    python -m ai_lab.tournament --policy ev --policy endgame --policy "ev(horizon=5)" --players 2 --players 3 --workers 8
+
+Results are kept in `--store` (default `tournament.sqlite` in the table
+cache), so rerunning with another policy only plays the seatings it is in.
+See `zilch_ai.tournament`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Sequence
+
+from .zilch_ai.rules import TARGET_SCORE
+from .zilch_ai.tournament import ResultStore, check_spec, play_tournament
+
+
+def policy_spec(spec: str) -> str:
+    try:
+        return check_spec(spec)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error)) from None
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run an incremental round-robin tournament.")
+    parser.add_argument("--policy", type=policy_spec, action="append", default=[], help="policy spec (repeatable)")
+    parser.add_argument("--players", type=int, action="append", help="table size (repeatable, default 2)")
+    parser.add_argument("--games", type=int, default=1_000, help="seeds per seating, rounded up to whole blocks")
+    parser.add_argument("--block-size", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=20260617)
+    parser.add_argument("--target", type=int, default=TARGET_SCORE)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    parser.add_argument("--store", default=None, help="result store path")
+    parser.add_argument("--forget", action="append", default=[], help="drop stored results of a spec first")
+    args = parser.parse_args(argv)
+    if len(args.policy) < 2:
+        parser.error("need at least two --policy specs")
+
+    with ResultStore(args.store) as store:
+        for spec in args.forget:
+            print(f"forgot {store.forget(spec)} blocks of {spec}")
+        try:
+            report = play_tournament(
+                args.policy, store, args.games, args.players or (2,), args.block_size, args.seed, args.workers, args.target
+            )
+        except ValueError as error:
+            parser.error(str(error))
+    print(f"played {report.played} blocks ({report.games_played} games), reused {report.stored} from {store.path}")
+    print(report.standings.format())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Tune policy settings by racing candidates with successive halving.
+
+    python -m ai_lab.tune --family ev --param horizon=5,7 --param high_free_dice=3500,4500,5500
+    python -m ai_lab.tune --family greedy --param bank_threshold=500,750,1000,1500 --reference ev
+
+Each `--param name=v1,v2,...` adds a dimension to the grid; `--reference`
+picks the lineup the candidates play against (`ev`, `greedy-N` or
+`random`, repeatable for multi-player games). See `zilch_ai.tuning`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Sequence
+
+from .zilch_ai.ev import EVTable
+from .zilch_ai.policies import EVPolicy, GreedyThresholdPolicy, Policy, RandomPolicy
+from .zilch_ai.tuning import PARAMETERS, candidates, successive_halving
+
+
+def reference_policy(spec: str) -> Policy:
+    if spec == "ev":
+        return EVPolicy(EVTable())
+    if spec == "random":
+        return RandomPolicy()
+    if spec.startswith("greedy-") and spec[len("greedy-") :].isdigit():
+        return GreedyThresholdPolicy(int(spec[len("greedy-") :]))
+    raise argparse.ArgumentTypeError(f"unknown reference policy {spec!r}; use ev, greedy-N or random")
+
+
+def parse_param(text: str) -> tuple[str, list[int]]:
+    name, _, values = text.partition("=")
+    try:
+        return name, [int(value) for value in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected name=v1,v2,... with integer values, got {text!r}") from None
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Tune policy settings with successive halving.")
+    parser.add_argument("--family", choices=sorted(PARAMETERS), default="ev")
+    parser.add_argument("--param", type=parse_param, action="append", default=[], help="name=v1,v2,... (repeatable)")
+    parser.add_argument("--reference", type=reference_policy, action="append", help="opponent policy (repeatable)")
+    parser.add_argument("--seeds", type=int, default=50, help="seeds per candidate in the first round")
+    parser.add_argument("--eta", type=int, default=2, help="keep the best 1/eta after each round")
+    parser.add_argument("--max-rounds", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=20260617)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    args = parser.parse_args(argv)
+    if args.eta < 2:
+        parser.error("--eta must be at least 2")
+
+    try:
+        grid = candidates(args.family, dict(args.param))
+    except ValueError as error:
+        parser.error(str(error))
+    reference = args.reference or [GreedyThresholdPolicy(750)]
+    report = successive_halving(grid, reference, args.seeds, args.eta, args.max_rounds, args.seed, args.workers)
+    print(report.format())
+    print(f"best: {report.best.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,29 @@
 """AI helpers for the Zilch lab."""
 
+from .batch import iter_batch, simulate_batch
+from .instrument import Probe
+from .paired import PairedStats, paired_match
 from .policies import EVPolicy, GreedyThresholdPolicy, RandomPolicy
-from .sim import GameResult, play_game, simulate_games
+from .results import GameResult, GameResults
+from .sequential import SequentialResult, sequential_match
+from .sim import iter_games, play_game, simulate_games
+from .stats import GameStats
 
 __all__ = [
     "EVPolicy",
     "GameResult",
+    "GameResults",
+    "GameStats",
     "GreedyThresholdPolicy",
+    "PairedStats",
+    "Probe",
     "RandomPolicy",
+    "SequentialResult",
+    "iter_batch",
+    "iter_games",
+    "paired_match",
     "play_game",
+    "sequential_match",
+    "simulate_batch",
     "simulate_games",
 ]
@@ -0,0 +1,269 @@
+"""Vectorized batch engine that advances many Zilch games at once.
+
+`play_game` walks one game through Python-level policy calls. The batch engine
+keeps thousands of games as struct-of-arrays state and advances every active
+game by one roll per step, asking each seat's policy for decisions on whole
+groups of games at once. Policies opt in through the `batch_*` methods on
+`Policy`; the base implementations fall back to per-game scalar calls, so any
+policy can play in a batch.
+
+Two dice modes are available:
+
+- The default mode draws rolls from a NumPy generator. Results match
+  `simulate_games` statistically but not game by game.
+- Reference mode (`reference=True`) gives every game its own `Random` seeded
+  exactly like `simulate_games` and rolls it with `sample_outcome`. For policies
+  whose decisions depend only on the view (`GreedyThresholdPolicy`,
+  `EVPolicy`), the results are identical to `simulate_games` bit for bit.
+  Policies with their own random state, such as `RandomPolicy`, are asked in
+  batch order instead of game order, so they only match statistically.
+
+The engine plays the standard rules only, and rejects an `EVPolicy` whose
+table was solved for another `RuleSet`.
+"""
+
+from __future__ import annotations
+
+from random import Random
+from typing import Iterator, Sequence
+
+import numpy as np
+
+from .dice import sample_outcome, sample_outcomes
+from .policies import Policy, TurnView, check_rules
+from .rules import NUM_DICE, STANDARD_RULES, TARGET_SCORE, score_index
+from .results import GameResult, GameResults
+
+
+class GameBatch:
+    """Struct-of-arrays state for a batch of games with the same lineup.
+
+    Turn fields use the `TurnView` names so vectorized policies can read
+    `batch.loose_score[rows]` wherever a scalar policy reads
+    `view.loose_score`.
+    """
+
+    def __init__(self, players: int, games: int) -> None:
+        self.table = score_index()
+        self.scores = np.zeros((games, players), dtype=np.int64)
+        self.player_index = np.zeros(games, dtype=np.int64)
+        self.turn_number = np.ones(games, dtype=np.int64)
+        self.inherited_score = np.zeros(games, dtype=np.int64)
+        self.inherited_free_dice = np.full(games, NUM_DICE, dtype=np.int64)
+        self.locked_points = np.zeros(games, dtype=np.int64)
+        self.loose_score = np.zeros(games, dtype=np.int64)
+        self.free_dice = np.full(games, NUM_DICE, dtype=np.int64)
+        self.final_round = np.zeros(games, dtype=bool)
+        self.played_final_turn = np.zeros((games, players), dtype=bool)
+        self.in_turn = np.zeros(games, dtype=bool)
+        self.active = np.ones(games, dtype=bool)
+        self.turns = np.zeros(games, dtype=np.int64)
+
+    def view(self, row: int) -> TurnView:
+        return TurnView(
+            player_index=int(self.player_index[row]),
+            scores=tuple(int(score) for score in self.scores[row]),
+            inherited_score=int(self.inherited_score[row]),
+            inherited_free_dice=int(self.inherited_free_dice[row]),
+            locked_points=int(self.locked_points[row]),
+            loose_score=int(self.loose_score[row]),
+            free_dice=int(self.free_dice[row]),
+            final_round=bool(self.final_round[row]),
+        )
+
+    def own_scores(self, rows: np.ndarray) -> np.ndarray:
+        return self.scores[rows, self.player_index[rows]]
+
+    def best_other_scores(self, rows: np.ndarray) -> np.ndarray:
+        if self.scores.shape[1] == 1:
+            return np.zeros(len(rows), dtype=np.int64)
+        others = self.scores[rows].copy()
+        others[np.arange(len(rows)), self.player_index[rows]] = np.iinfo(np.int64).min
+        return others.max(axis=1)
+
+    def results(self) -> GameResults:
+        return GameResults.from_arrays(self.scores.argmax(axis=1), self.scores, self.turns)
+
+
+class _BatchRunner:
+    def __init__(
+        self,
+        policies: Sequence[Policy],
+        batch: GameBatch,
+        rngs: list[Random] | None,
+        generator: np.random.Generator | None,
+        target_score: int,
+        max_turns: int,
+    ) -> None:
+        # Batches play the standard rules only.
+        check_rules(policies, STANDARD_RULES)
+        self.policies = policies
+        self.batch = batch
+        self.rngs = rngs
+        self.generator = generator
+        self.target_score = target_score
+        self.max_turns = max_turns
+
+    def run(self) -> None:
+        batch = self.batch
+        while batch.active.any():
+            self.start_turns(np.flatnonzero(batch.active & ~batch.in_turn))
+            self.roll(np.flatnonzero(batch.in_turn))
+
+    def start_turns(self, rows: np.ndarray) -> None:
+        batch = self.batch
+        while len(rows):
+            skip = batch.final_round[rows] & batch.played_final_turn[rows, batch.player_index[rows]]
+            if not skip.any():
+                break
+            skipped = rows[skip]
+            self.advance(skipped)
+            rows = rows[~skip]
+            rows = np.concatenate([rows, skipped[batch.active[skipped]]])
+
+        batch.locked_points[rows] = 0
+        batch.loose_score[rows] = 0
+        batch.free_dice[rows] = NUM_DICE
+        batch.in_turn[rows] = True
+
+        candidates = rows[batch.inherited_score[rows] > 0]
+        for seat, policy in enumerate(self.policies):
+            seated = candidates[batch.player_index[candidates] == seat]
+            if not len(seated):
+                continue
+            builders = seated[np.asarray(policy.batch_choose_build(batch, seated), dtype=bool)]
+            batch.loose_score[builders] = batch.inherited_score[builders]
+            batch.free_dice[builders] = batch.inherited_free_dice[builders]
+
+    def roll(self, rows: np.ndarray) -> None:
+        if not len(rows):
+            return
+        batch = self.batch
+        table = batch.table
+        outcomes = self.draw(rows)
+
+        zilched = table.option_count[outcomes] == 0
+        self.end_turns(rows[zilched], batch.locked_points[rows[zilched]], zilched=True)
+        rows = rows[~zilched]
+        outcomes = outcomes[~zilched]
+
+        choices = np.empty(len(rows), dtype=np.int64)
+        for seat, policy in enumerate(self.policies):
+            seated = np.flatnonzero(batch.player_index[rows] == seat)
+            if len(seated):
+                choices[seated] = policy.batch_choose_option(batch, rows[seated], outcomes[seated])
+
+        selected = table.option_start[outcomes] + choices
+        batch.loose_score[rows] += table.option_points[selected]
+        batch.free_dice[rows] = table.option_free_dice[selected]
+
+        locking = batch.free_dice[rows] == 0
+        lockers = rows[locking]
+        batch.locked_points[lockers] += batch.loose_score[lockers]
+        batch.loose_score[lockers] = 0
+        batch.free_dice[lockers] = NUM_DICE
+
+        rows = rows[~locking]
+        banking = np.zeros(len(rows), dtype=bool)
+        for seat, policy in enumerate(self.policies):
+            seated = np.flatnonzero(batch.player_index[rows] == seat)
+            if len(seated):
+                banking[seated] = policy.batch_should_bank(batch, rows[seated])
+        bankers = rows[banking]
+        self.end_turns(bankers, batch.locked_points[bankers] + batch.loose_score[bankers], zilched=False)
+
+    def draw(self, rows: np.ndarray) -> np.ndarray:
+        batch = self.batch
+        if self.rngs is None:
+            return sample_outcomes(batch.free_dice[rows], self.generator)
+        return np.array(
+            [sample_outcome(free, self.rngs[row]) for row, free in zip(rows, batch.free_dice[rows].tolist())],
+            dtype=np.int64,
+        )
+
+    def end_turns(self, rows: np.ndarray, earned: np.ndarray, zilched: bool) -> None:
+        if not len(rows):
+            return
+        batch = self.batch
+        seats = batch.player_index[rows]
+        batch.scores[rows, seats] += earned
+        if zilched:
+            batch.inherited_score[rows] = 0
+            batch.inherited_free_dice[rows] = NUM_DICE
+        else:
+            batch.inherited_score[rows] = earned
+            batch.inherited_free_dice[rows] = batch.free_dice[rows]
+        batch.in_turn[rows] = False
+
+        batch.final_round[rows] |= batch.scores[rows, seats] >= self.target_score
+        finals = rows[batch.final_round[rows]]
+        batch.played_final_turn[finals, batch.player_index[finals]] = True
+        finished = finals[batch.played_final_turn[finals].all(axis=1)]
+        batch.active[finished] = False
+        batch.turns[finished] = batch.turn_number[finished]
+
+        self.advance(rows[batch.active[rows]])
+
+    def advance(self, rows: np.ndarray) -> None:
+        batch = self.batch
+        batch.player_index[rows] = (batch.player_index[rows] + 1) % batch.scores.shape[1]
+        batch.turn_number[rows] += 1
+        expired = rows[batch.turn_number[rows] > self.max_turns]
+        batch.active[expired] = False
+        batch.turns[expired] = self.max_turns
+
+
+def simulate_batch(
+    policies: Sequence[Policy],
+    games: int,
+    seed: int = 20260617,
+    batch_size: int = 4096,
+    reference: bool = False,
+    target_score: int = TARGET_SCORE,
+    max_turns: int = 20_000,
+) -> GameResults:
+    """Play `games` games in vectorized batches and return their results as columns.
+
+    With `reference=True` each game is rolled from the same per-game seed that
+    `simulate_games` uses, which makes the results comparable game by game.
+    """
+    results = GameResults(len(policies), games)
+    for batch in _iter_batches(policies, games, seed, batch_size, reference, target_score, max_turns):
+        results.extend(batch.results())
+    return results
+
+
+def iter_batch(
+    policies: Sequence[Policy],
+    games: int,
+    seed: int = 20260617,
+    batch_size: int = 4096,
+    reference: bool = False,
+    target_score: int = TARGET_SCORE,
+    max_turns: int = 20_000,
+) -> Iterator[GameResult]:
+    """Yield results one batch at a time; see `simulate_batch`."""
+    for batch in _iter_batches(policies, games, seed, batch_size, reference, target_score, max_turns):
+        yield from batch.results()
+
+
+def _iter_batches(
+    policies: Sequence[Policy],
+    games: int,
+    seed: int,
+    batch_size: int,
+    reference: bool,
+    target_score: int,
+    max_turns: int,
+) -> Iterator[GameBatch]:
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+
+    rng = Random(seed)
+    generator = None if reference else np.random.default_rng(seed)
+    for start in range(0, games, batch_size):
+        size = min(batch_size, games - start)
+        rngs = [Random(rng.randrange(2**32)) for _ in range(size)] if reference else None
+        batch = GameBatch(len(policies), size)
+        _BatchRunner(policies, batch, rngs, generator, target_score, max_turns).run()
+        yield batch
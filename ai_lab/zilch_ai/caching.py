@@ -0,0 +1,233 @@
+"""Bounded, named memo caches for the rules, dice and EV layers.
+
+Every cache has a size limit, evicts least-recently-used entries past it and
+counts hits, misses and evictions. There are two kinds:
+
+- `memoize` wraps a module-level function in a `functools.lru_cache`. These
+  sit on per-roll hot paths, so they keep the C implementation; their limit
+  is fixed at import, from the decorator or from `ZILCH_AI_CACHE_LIMITS`
+  (for example `rules.described_options=1024,ev.decisions=none`).
+- `scoped_cache` returns a `BoundedCache` owned by an object, such as the
+  decision cache of each `EVTable`. It lives and dies with its owner, so a
+  sweep that builds many tables does not pin them in memory.
+
+`cache_stats` reports every cache by name, with scoped caches of the same name
+added together; `clear_caches` empties them; `set_cache_limit` resizes scoped
+caches; and `warm_up` fills the rule and dice caches ahead of time.
+"""
+
+from __future__ import annotations
+
+import os
+import weakref
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Generic, Hashable, TypeVar
+
+if TYPE_CHECKING:
+    from .rules import RuleSet
+
+
+T = TypeVar("T")
+_MISSING: Any = object()
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    name: str
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int | None
+    instances: int = 1
+
+    @property
+    def hit_rate(self) -> float | None:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+
+class _Counters:
+    __slots__ = ("hits", "misses", "evictions", "maxsize")
+
+    def __init__(self, maxsize: int | None) -> None:
+        self.hits = self.misses = self.evictions = 0
+        self.maxsize = maxsize
+
+
+class BoundedCache(Generic[T]):
+    """LRU mapping with a size limit (`None` for unbounded) and counters.
+
+    Counters are shared by every cache with the same name, so they keep
+    counting after a scoped cache's owner is garbage collected.
+    """
+
+    __slots__ = ("name", "_data", "_counters", "__weakref__")
+
+    def __init__(self, name: str, counters: _Counters) -> None:
+        self.name = name
+        self._data: dict[Hashable, T] = {}
+        self._counters = counters
+
+    @property
+    def maxsize(self) -> int | None:
+        return self._counters.maxsize
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> T | Any:
+        data = self._data
+        value = data.pop(key, _MISSING)
+        if value is _MISSING:
+            self._counters.misses += 1
+            return default
+        # Re-inserting moves the key to the young end of the dict.
+        data[key] = value
+        self._counters.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: T) -> T:
+        self._data[key] = value
+        if self._counters.maxsize is not None:
+            self._shrink(self._counters.maxsize)
+        return value
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def _shrink(self, maxsize: int) -> None:
+        data = self._data
+        while len(data) > maxsize:
+            del data[next(iter(data))]
+            self._counters.evictions += 1
+
+
+_counters: dict[str, _Counters] = {}
+_scoped: dict[str, weakref.WeakSet[BoundedCache[Any]]] = {}
+_memoized: dict[str, Any] = {}
+
+
+def scoped_cache(name: str, maxsize: int | None) -> BoundedCache[Any]:
+    """Create a cache registered under `name` that lives as long as its owner.
+
+    The first cache created under a name sets the limit, unless
+    `ZILCH_AI_CACHE_LIMITS` or `set_cache_limit` overrides it; later ones
+    share it, along with the counters.
+    """
+    if name in _memoized:
+        raise ValueError(f"cache {name!r} is a memoized function")
+    if name not in _counters:
+        _counters[name] = _Counters(_configured_limit(name, maxsize))
+        _scoped[name] = weakref.WeakSet()
+    cache: BoundedCache[Any] = BoundedCache(name, _counters[name])
+    _scoped[name].add(cache)
+    return cache
+
+
+def memoize(name: str, maxsize: int | None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator caching a function in a `functools.lru_cache` registered as `name`."""
+
+    def decorate(func: Callable[..., T]) -> Callable[..., T]:
+        if name in _counters:
+            raise ValueError(f"cache {name!r} is already registered")
+        cached = lru_cache(maxsize=_configured_limit(name, maxsize))(func)
+        counters = _counters[name] = _Counters(cached.cache_info().maxsize)
+        clear = cached.cache_clear
+
+        def cache_clear() -> None:
+            # lru_cache resets its own counters on clear; keep ours cumulative.
+            info = cached.cache_info()
+            counters.hits += info.hits
+            counters.misses += info.misses
+            counters.evictions += info.misses - info.currsize
+            clear()
+
+        cached.cache_clear = cache_clear  # type: ignore[method-assign]
+        _memoized[name] = cached
+        return cached
+
+    return decorate
+
+
+def cache_stats() -> dict[str, CacheStats]:
+    """Return current statistics for every cache name, sorted by name."""
+    return {name: _stats(name) for name in sorted(_counters)}
+
+
+def set_cache_limit(name: str, maxsize: int | None) -> None:
+    """Change the limit of the scoped caches called `name`, evicting as needed."""
+    if name in _memoized:
+        raise ValueError(f"{name!r} is memoized; set its limit with ZILCH_AI_CACHE_LIMITS")
+    if name not in _scoped:
+        raise KeyError(f"no cache named {name!r}")
+    _counters[name].maxsize = maxsize
+    if maxsize is not None:
+        for cache in list(_scoped[name]):
+            cache._shrink(maxsize)
+
+
+def clear_caches(*names: str) -> None:
+    """Empty the named caches, or all of them when no name is given."""
+    for name in names or tuple(_counters):
+        if name in _memoized:
+            _memoized[name].cache_clear()
+        elif name in _scoped:
+            for cache in list(_scoped[name]):
+                cache.clear()
+        else:
+            raise KeyError(f"no cache named {name!r}")
+
+
+def warm_up(rules: RuleSet | None = None) -> None:
+    """Fill the rule, dice and solver caches that simulations under `rules` read."""
+    # Imported here because those modules memoize through this one.
+    from . import dice, ev
+    from .rules import multinomial_outcomes, score_index
+
+    index = score_index(rules)
+    for num_dice in range(index.rules.num_dice + 1):
+        multinomial_outcomes(num_dice)
+    for outcome in range(len(index)):
+        index.options(outcome)
+        index.dice(outcome)
+    for num_dice in range(1, index.rules.num_dice + 1):
+        dice.alias_table(num_dice)
+        ev._transitions(num_dice, index.rules)
+
+
+def _stats(name: str) -> CacheStats:
+    counters = _counters[name]
+    if name in _memoized:
+        info = _memoized[name].cache_info()
+        return CacheStats(
+            name=name,
+            hits=counters.hits + info.hits,
+            misses=counters.misses + info.misses,
+            evictions=counters.evictions + info.misses - info.currsize,
+            size=info.currsize,
+            maxsize=info.maxsize,
+        )
+    live = list(_scoped[name])
+    return CacheStats(
+        name=name,
+        hits=counters.hits,
+        misses=counters.misses,
+        evictions=counters.evictions,
+        size=sum(len(cache) for cache in live),
+        maxsize=counters.maxsize,
+        instances=len(live),
+    )
+
+
+def _configured_limit(name: str, default: int | None) -> int | None:
+    for entry in os.environ.get("ZILCH_AI_CACHE_LIMITS", "").split(","):
+        key, _, value = entry.partition("=")
+        if key.strip() == name:
+            value = value.strip().lower()
+            return None if value in ("none", "") else int(value)
+    return default
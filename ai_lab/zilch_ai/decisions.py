@@ -0,0 +1,126 @@
+"""Precomputed EV decisions for every (roll, loose score) state.
+
+`EVTable.best_option` scores every option of a roll each time it is asked.
+A `DecisionTable` asks once per state, ahead of time, and stores the answer
+in one byte: the low seven bits hold the best option's position in
+`score_index(table.rules).options(outcome)` and the high bit says whether the EV
+follow-up is to bank. Rolls without a scoring option hold `ZILCH`.
+
+Tables are cached on disk next to the `EVTable` they were built from and
+mapped read-only on load, like the EV tables themselves.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .ev import STEP, EVTable
+from .rules import score_index
+from .storage import TableFileError, read_table, write_table
+
+
+ZILCH = 0x7F
+BANK = 0x80
+_POSITION = 0x7F
+_BUILD_OUTCOMES = 512
+
+# Bump when the encoding changes so cached decision tables are rebuilt.
+_DECISIONS_VERSION = 1
+
+
+class DecisionTable:
+    """Best option and follow-up action of an `EVTable`, by outcome and loose score.
+
+    `codes[outcome, loose // STEP]` covers loose scores up to the table's
+    `max_loose`; `option` and `banks` fall back to the `EVTable` itself above
+    that.
+    """
+
+    def __init__(self, table: EVTable, codes: np.ndarray) -> None:
+        self.table = table
+        self.horizon = table.horizon
+        self.codes = codes
+        # Scalar lookups index a flat memoryview: much cheaper than numpy item access.
+        self._flat = memoryview(np.ascontiguousarray(codes)).cast("B")
+        self._columns = codes.shape[1]
+
+    def __reduce__(self) -> tuple[object, tuple[EVTable]]:
+        return DecisionTable.for_table, (self.table,)
+
+    @classmethod
+    def for_table(cls, table: EVTable) -> DecisionTable:
+        """Load the decisions for `table` from its cache directory, or build them."""
+        path = table.cache_path()
+        if path is None:
+            return cls(table, build_codes(table))
+        path = path.with_name(f"decisions-{path.name}")
+        key = _decisions_key(table)
+        try:
+            arrays, _ = read_table(path, "decision-table", key)
+            return cls(table, arrays["codes"])
+        except (OSError, TableFileError, KeyError):
+            pass
+
+        codes = build_codes(table)
+        try:
+            write_table(path, "decision-table", key, {"codes": codes}, {"ev_table": table.cache_key})
+        except OSError:
+            pass
+        return cls(table, codes)
+
+    def option(self, outcome: int, loose: int) -> int:
+        """Position of the best option for `outcome` at `loose`, or -1 on a zilch."""
+        if loose > self.table.max_loose:
+            return int(self.table.best_options(loose, outcome)[0])
+        code = self._flat[outcome * self._columns + round(loose / STEP)] & _POSITION
+        return -1 if code == ZILCH else code
+
+    def options(self, loose: ArrayLike, outcomes: ArrayLike) -> np.ndarray:
+        """Vectorized `option` over broadcastable arrays."""
+        loose, outcomes = np.broadcast_arrays(np.asarray(loose, dtype=np.int64), np.asarray(outcomes, dtype=np.int64))
+        beyond = loose > self.table.max_loose
+        columns = np.rint(np.where(beyond, 0, loose) / STEP).astype(np.int64)
+        positions = (self.codes[outcomes, columns] & _POSITION).astype(np.int64)
+        positions[positions == ZILCH] = -1
+        if beyond.any():
+            positions[beyond] = self.table.best_options(loose[beyond], outcomes[beyond])[0]
+        return positions
+
+    def banks(self, outcome: int, loose: int) -> bool:
+        """Whether the EV follow-up after taking the best option is to bank."""
+        if loose > self.table.max_loose:
+            position = self.option(outcome, loose)
+            if position < 0:
+                return False
+            index = score_index(self.table.rules)
+            selected = int(index.option_start[outcome]) + position
+            points = int(index.option_points[selected])
+            return bool(self.table.bank_decisions(loose + points, index.option_free_dice[selected]))
+        return bool(self._flat[outcome * self._columns + round(loose / STEP)] & BANK)
+
+
+def build_codes(table: EVTable) -> np.ndarray:
+    """Encode the best option and follow-up of every state of `table`."""
+    index = score_index(table.rules)
+    if len(index.option_count) and index.option_count.max() >= ZILCH:
+        raise ValueError(f"rolls with {ZILCH} or more options do not fit a decision code")
+    loose = np.arange(0, table.max_loose + 1, STEP, dtype=np.int64)
+    codes = np.empty((len(index), len(loose)), dtype=np.uint8)
+    for start in range(0, len(index), _BUILD_OUTCOMES):
+        outcomes = np.arange(start, min(start + _BUILD_OUTCOMES, len(index)), dtype=np.int64)
+        grid_outcomes, grid_loose = np.meshgrid(outcomes, loose, indexing="ij")
+        positions, _ = table.best_options(grid_loose, grid_outcomes)
+        scoring = positions >= 0
+        selected = index.option_start[grid_outcomes[scoring]] + positions[scoring]
+        banks = table.bank_decisions(grid_loose[scoring] + index.option_points[selected], index.option_free_dice[selected])
+        block = np.full(positions.shape, ZILCH, dtype=np.uint8)
+        block[scoring] = positions[scoring].astype(np.uint8) | np.where(banks, BANK, 0).astype(np.uint8)
+        codes[start : start + len(outcomes)] = block
+    return codes
+
+
+def _decisions_key(table: EVTable) -> str:
+    return hashlib.sha256(f"decision-table:{_DECISIONS_VERSION}:{table.cache_key}".encode()).hexdigest()
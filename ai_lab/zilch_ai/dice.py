@@ -0,0 +1,159 @@
+"""Alias-table dice sampling over `score_index()` outcomes.
+
+Rolling `n` dice lands on one of the count vectors from
+`multinomial_outcomes(n)` with probability `ways / 6**n`. The alias tables
+here are built from those integer weights, so a single uniform integer in
+`[0, outcomes * 6**n)` selects an outcome with exactly the same distribution
+as rolling and sorting `n` dice, in constant time and without building the
+dice tuple. Samplers return global `score_index()` outcome numbers, which feed
+straight into `ScoreIndex.options` and the EV tables. Outcome numbers are the
+same under every `RuleSet`, so the samplers are shared by all of them.
+
+`CommonDice` is the counter-based alternative used for paired comparisons: its
+dice depend only on (game, turn, roll), not on how many draws came before.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import comb, factorial
+from random import Random
+
+import numpy as np
+
+from .caching import memoize
+from .rules import NUM_SIDES, RuleSet, multinomial_outcomes, score_index
+
+
+@dataclass(frozen=True)
+class AliasTable:
+    """Vose alias table with integer thresholds for one dice count.
+
+    Column `c` keeps outcome `first_outcome + c` when the draw's remainder
+    is below `threshold[c]` and otherwise yields `first_outcome + alias[c]`.
+    """
+
+    first_outcome: int
+    rolls: int
+    threshold: tuple[int, ...]
+    alias: tuple[int, ...]
+    threshold_array: np.ndarray
+    alias_array: np.ndarray
+
+    @property
+    def draws(self) -> int:
+        return len(self.threshold) * self.rolls
+
+    def pick(self, draw: int) -> int:
+        column, remainder = divmod(draw, self.rolls)
+        if remainder < self.threshold[column]:
+            return self.first_outcome + column
+        return self.first_outcome + self.alias[column]
+
+    def pick_array(self, draws: np.ndarray) -> np.ndarray:
+        columns, remainders = np.divmod(draws, self.rolls)
+        local = np.where(remainders < self.threshold_array[columns], columns, self.alias_array[columns])
+        return self.first_outcome + local
+
+
+@memoize("dice.alias_table", maxsize=16)
+def alias_table(num_dice: int) -> AliasTable:
+    outcomes = multinomial_outcomes(num_dice)
+    rolls = NUM_SIDES**num_dice
+    columns = len(outcomes)
+    scaled = [_ways(list(counts)) * columns for counts, _ in outcomes]
+
+    threshold = [rolls] * columns
+    alias = list(range(columns))
+    small = [column for column, weight in enumerate(scaled) if weight < rolls]
+    large = [column for column, weight in enumerate(scaled) if weight >= rolls]
+    while small and large:
+        column = small.pop()
+        donor = large[-1]
+        threshold[column] = scaled[column]
+        alias[column] = donor
+        scaled[donor] -= rolls - scaled[column]
+        if scaled[donor] < rolls:
+            small.append(large.pop())
+
+    return AliasTable(
+        # Rolls of fewer dice come first: comb(n + 5, 6) count vectors for 6 sides.
+        first_outcome=comb(num_dice + NUM_SIDES - 1, NUM_SIDES),
+        rolls=rolls,
+        threshold=tuple(threshold),
+        alias=tuple(alias),
+        threshold_array=np.array(threshold, dtype=np.int64),
+        alias_array=np.array(alias, dtype=np.int64),
+    )
+
+
+def sample_outcome(num_dice: int, rng: Random) -> int:
+    """Roll `num_dice` dice with one draw from `rng` and return the outcome."""
+    table = alias_table(num_dice)
+    return table.pick(rng.randrange(table.draws))
+
+
+def sample_outcomes(free_dice: np.ndarray, generator: np.random.Generator) -> np.ndarray:
+    """Draw one outcome per entry of `free_dice` from a NumPy generator."""
+    outcomes = np.empty(len(free_dice), dtype=np.int64)
+    for num_dice in np.unique(free_dice).tolist():
+        rows = np.flatnonzero(free_dice == num_dice)
+        table = alias_table(num_dice)
+        outcomes[rows] = table.pick_array(generator.integers(0, table.draws, size=len(rows)))
+    return outcomes
+
+
+class CommonDice:
+    """Dice stream keyed by (game, turn, roll) for common random numbers.
+
+    Roll `r` of turn `t` in game `g` always shows the same faces, whatever the
+    players did earlier, and rolling fewer dice shows a prefix of those faces.
+    Two policies replaying the same game therefore see identical dice until
+    their decisions diverge, and correlated dice after that. Faces come from a
+    SplitMix64 hash with rejection, so every roll is exactly uniform. `rules`
+    sets how many dice a roll can hold.
+    """
+
+    __slots__ = ("game", "turn", "rolls", "_turn_key", "_index", "_face_limit")
+
+    def __init__(self, game: int, rules: RuleSet | None = None) -> None:
+        self.game = _mix(game & _MASK)
+        self._index = score_index(rules)
+        dice_space = NUM_SIDES**self._index.rules.num_dice
+        self._face_limit = (1 << 64) // dice_space * dice_space
+        self.start_turn(0)
+
+    def start_turn(self, turn: int) -> None:
+        self.turn = turn
+        self.rolls = 0
+        self._turn_key = _mix(self.game ^ turn)
+
+    def roll(self, num_dice: int) -> int:
+        """Roll `num_dice` dice and return the `score_index()` outcome."""
+        self.rolls += 1
+        draw = _mix(self._turn_key ^ self.rolls)
+        while draw >= self._face_limit:
+            draw = _mix(draw)
+        counts = [0] * NUM_SIDES
+        for _ in range(num_dice):
+            draw, face = divmod(draw, NUM_SIDES)
+            counts[face] += 1
+        return self._index.outcome_for(tuple(counts))
+
+
+_MASK = (1 << 64) - 1
+
+
+def _mix(value: int) -> int:
+    value = (value + 0x9E3779B97F4A7C15) & _MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK
+    return value ^ (value >> 31)
+
+
+def _ways(counts: list[int]) -> int:
+    ways = factorial(sum(counts))
+    for count in counts:
+        ways //= factorial(count)
+    return ways
+
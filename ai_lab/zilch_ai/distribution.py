@@ -0,0 +1,204 @@
+"""Exact turn-score distributions under a fixed turn rule.
+
+`EVTable` answers "what is this turn worth on average"; endgame play needs
+"how likely is this turn to reach T". `TurnDistribution` solves the whole
+distribution of the points a turn banks, in `STEP` buckets, for every
+`(loose, free_dice)` state from which the player is about to roll, and keeps
+its upper tail so `probability_at_least` is a single array read.
+
+The model matches `EVTable`: locked points are safe, so a zilch after a lock
+loses only the loose points; the solver looks `horizon` rolls ahead and banks
+once it runs out; and states above `max_loose` always bank. Totals of
+`max_total` or more share the last bucket.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .decisions import DecisionTable
+from .ev import STEP, EVTable
+from .policies import _greedy_choices
+from .rules import NUM_DICE, STANDARD_RULES, score_index
+
+
+class TurnRule:
+    """How a turn is played: which option to take and when to bank.
+
+    Both methods are vectorized over broadcastable arrays of states, like the
+    batched `EVTable` queries. The defaults play like `Policy`: take the
+    first option and bank as soon as anything is loose.
+    """
+
+    def options(self, loose: np.ndarray, outcomes: np.ndarray) -> np.ndarray:
+        """Position of the option taken for each roll, within `score_index().options`, or -1 on a zilch."""
+        scoring = score_index().option_count[outcomes] > 0
+        return np.broadcast_to(np.where(scoring, 0, -1), np.broadcast(loose, outcomes).shape)
+
+    def banks(self, loose: np.ndarray, free_dice: np.ndarray) -> np.ndarray:
+        """Whether to bank after scoring, with `free_dice` dice left to roll."""
+        return (free_dice > 0) & (loose > 0)
+
+
+class EVRule(TurnRule):
+    """Play each turn as `EVPolicy` does before its endgame adjustments."""
+
+    def __init__(self, table: EVTable) -> None:
+        if table.rules != STANDARD_RULES:
+            raise ValueError("turn distributions cover the standard rules only")
+        self.table = table
+        self.decisions = DecisionTable.for_table(table)
+
+    def options(self, loose: np.ndarray, outcomes: np.ndarray) -> np.ndarray:
+        return self.decisions.options(loose, outcomes)
+
+    def banks(self, loose: np.ndarray, free_dice: np.ndarray) -> np.ndarray:
+        return self.table.bank_decisions(loose, free_dice)
+
+
+class ThresholdRule(TurnRule):
+    """Take the most points and bank at `threshold` loose points.
+
+    Like `GreedyThresholdPolicy`, it also banks `low_dice_threshold` points
+    with two or fewer dice left. The greedy policy counts locked points
+    towards both thresholds; this rule sees only the loose score.
+    """
+
+    def __init__(self, threshold: int = 750, low_dice_threshold: int = 350) -> None:
+        self.threshold = threshold
+        self.low_dice_threshold = low_dice_threshold
+
+    def options(self, loose: np.ndarray, outcomes: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(_greedy_choices()[outcomes], np.broadcast(loose, outcomes).shape)
+
+    def banks(self, loose: np.ndarray, free_dice: np.ndarray) -> np.ndarray:
+        return (free_dice > 0) & ((loose >= self.threshold) | ((free_dice <= 2) & (loose >= self.low_dice_threshold)))
+
+
+class TurnDistribution:
+    """Distribution of turn totals for every pre-roll `(loose, free_dice)` state.
+
+    `tail[free_dice, loose // STEP, b]` is the probability that the turn banks
+    at least `b * STEP` points, `free_dice` running from 1 to `NUM_DICE` (row
+    0 repeats `NUM_DICE`, as in `EVTable.values`).
+    """
+
+    def __init__(self, rule: TurnRule, max_loose: int = 8_000, horizon: int = 7, max_total: int = 20_000) -> None:
+        if max_loose % STEP or max_total % STEP:
+            raise ValueError("max_loose and max_total must be divisible by 50")
+        if max_total < max_loose:
+            raise ValueError("max_total must be at least max_loose")
+        self.rule = rule
+        self.max_loose = max_loose
+        self.horizon = horizon
+        self.max_total = max_total
+        self.tail = self._solve()
+
+    def probabilities(self, loose: int, free_dice: int) -> np.ndarray:
+        """Probability of each `STEP` bucket of turn total, rolling from this state."""
+        if loose > self.max_loose:
+            return _point(self.max_total // STEP + 1, loose // STEP)
+        tail = self.tail[free_dice if free_dice > 0 else NUM_DICE, round(loose / STEP)]
+        return tail - np.append(tail[1:], 0.0)
+
+    def probability_at_least(self, loose: int, free_dice: int, target: int) -> float:
+        """P(turn total >= `target`) when rolling `free_dice` dice with `loose` at stake."""
+        if target > self.max_total:
+            raise ValueError(f"target {target} is above max_total {self.max_total}")
+        if loose > self.max_loose:
+            return float(loose >= target)
+        bucket = max(0, -(-target // STEP))
+        return float(self.tail[free_dice if free_dice > 0 else NUM_DICE, round(loose / STEP), bucket])
+
+    def probabilities_at_least(self, loose: ArrayLike, free_dice: ArrayLike, target: ArrayLike) -> np.ndarray:
+        """Vectorized `probability_at_least` over broadcastable arrays."""
+        loose, free_dice, target = np.broadcast_arrays(
+            np.asarray(loose, dtype=np.int64), np.asarray(free_dice, dtype=np.int64), np.asarray(target, dtype=np.int64)
+        )
+        if (target > self.max_total).any():
+            raise ValueError(f"targets must be at most max_total {self.max_total}")
+        beyond = loose > self.max_loose
+        columns = np.rint(np.where(beyond, 0, loose) / STEP).astype(np.int64)
+        buckets = np.maximum(0, -(-target // STEP))
+        values = self.tail[np.where(free_dice <= 0, NUM_DICE, free_dice), columns, buckets]
+        return np.where(beyond, loose >= target, values)
+
+    def expected_total(self, loose: int, free_dice: int) -> float:
+        """Mean turn total; at most, and close to, `EVTable.roll_value` under `EVRule`."""
+        probabilities = self.probabilities(loose, free_dice)
+        return float(probabilities @ (np.arange(len(probabilities)) * STEP))
+
+    def _solve(self) -> np.ndarray:
+        """Iterate `horizon` layers of `D = terminal + moves @ D + locks @ shift(D[NUM_DICE, 0])`.
+
+        The rule does not depend on depth, so the one-roll transition weights
+        are gathered once: `terminal` for banks and zilches, `moves` into
+        other roll states and `locks` for lock-and-roll shifts.
+        """
+        columns = self.max_loose // STEP + 1
+        buckets = self.max_total // STEP + 1
+        states = NUM_DICE * columns
+        terminal, moves, locks = self._transitions(columns, buckets)
+
+        layer = np.zeros((states, buckets))
+        layer[np.arange(states), np.tile(np.arange(columns), NUM_DICE)] = 1.0
+        fresh_roll = (NUM_DICE - 1) * columns
+        for _ in range(self.horizon):
+            layer = terminal + moves @ layer + locks @ _shifts(layer[fresh_roll])
+
+        tail = np.cumsum(layer[:, ::-1], axis=1)[:, ::-1].reshape(NUM_DICE, columns, buckets)
+        return np.concatenate((tail[-1:], tail)).clip(0.0, 1.0)
+
+    def _transitions(self, columns: int, buckets: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        index = score_index()
+        states = NUM_DICE * columns
+        terminal = np.zeros((states, buckets))
+        moves = np.zeros((states, states))
+        locks = np.zeros((states, buckets))
+        loose = np.arange(columns, dtype=np.int64) * STEP
+
+        for free_dice in range(1, NUM_DICE + 1):
+            roll = index.outcomes(free_dice)
+            outcomes = np.arange(roll.start, roll.stop, dtype=np.int64)
+            grid_outcomes, grid_loose = np.meshgrid(outcomes, loose, indexing="ij")
+            rows = (free_dice - 1) * columns + grid_loose // STEP
+            weights = np.broadcast_to(index.probabilities[outcomes][:, None], rows.shape)
+            positions = np.asarray(self.rule.options(grid_loose, grid_outcomes))
+
+            zilch = positions < 0
+            np.add.at(terminal, (rows[zilch], 0), weights[zilch])
+
+            scoring = ~zilch
+            rows, weights, grid_loose = rows[scoring], weights[scoring], grid_loose[scoring]
+            selected = index.option_start[grid_outcomes[scoring]] + positions[scoring]
+            next_loose = grid_loose + index.option_points[selected]
+            next_free = index.option_free_dice[selected].astype(np.int64)
+
+            locked = next_free == 0
+            np.add.at(locks, (rows[locked], np.minimum(next_loose[locked] // STEP, buckets - 1)), weights[locked])
+
+            open_ = ~locked
+            banked = open_ & ((next_loose > self.max_loose) | self.rule.banks(next_loose, next_free))
+            np.add.at(terminal, (rows[banked], np.minimum(next_loose[banked] // STEP, buckets - 1)), weights[banked])
+
+            rolled = open_ & ~banked
+            targets = (next_free[rolled] - 1) * columns + next_loose[rolled] // STEP
+            np.add.at(moves, (rows[rolled], targets), weights[rolled])
+        return terminal, moves, locks
+
+
+def _shifts(distribution: np.ndarray) -> np.ndarray:
+    """Matrix whose row `s` is `distribution` moved up `s` buckets, capped at the last."""
+    buckets = len(distribution)
+    shifted = np.zeros((buckets, buckets))
+    for shift in range(buckets):
+        shifted[shift, shift:] = distribution[: buckets - shift]
+        shifted[shift, -1] += distribution[buckets - shift :].sum()
+    return shifted
+
+
+def _point(buckets: int, bucket: int) -> np.ndarray:
+    probabilities = np.zeros(buckets)
+    probabilities[min(bucket, buckets - 1)] = 1.0
+    return probabilities
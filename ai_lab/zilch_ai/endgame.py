@@ -0,0 +1,383 @@
+"""Two-player endgame tablebase: win probabilities near the target score.
+
+`EndgameTable` solves the chance that the player to move wins a two-player
+game once both players are within `window` points of `TARGET_SCORE`. Scores,
+needs and turn points are counted in `STEP` buckets.
+
+The final round is solved exactly. The last player needs a turn total of at
+least `need` points, and only `need` minus the points in hand matters, so
+`final[need, free_dice]` covers every state of that turn with optimal option
+choice.
+
+Before the final round, `values[loose, free_dice, seat, a, b, locked]` is the
+win probability of the player in `seat` about to roll `free_dice` dice with
+`locked` and `loose` points this turn, having needed `a` points when the turn
+began while the opponent needs `b`. Keeping the turn's locked points apart
+from `a` makes banks exact: the opponent inherits `locked + loose`, and a
+bank that crosses the target leaves them needing the lead plus the tie
+break. A zilch loses only the loose points: the player keeps `locked`,
+which may cross the target, and the opponent starts a fresh turn. Turns
+pass back and forth, so the states form cycles and are solved by value
+iteration. Banking, building on inherited points and rolling on are chosen
+optimally; options are picked as the `EVTable`'s `DecisionTable` picks
+them, which keeps every sweep one matrix product. Locked and loose points
+are capped at `turn_cap`: a lock past it keeps `turn_cap` locked, and a
+score past it must bank `turn_cap`.
+
+Seat 0 moves first and wins ties, as in `play_game`. Solved tables are
+stored as `uint16` probabilities in a table file and mapped read-only on
+load, so queries are constant-time array reads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .decisions import DecisionTable
+from .ev import STEP, EVTable
+from .policies import EVPolicy, Policy, TurnView
+from .rules import NUM_DICE, STANDARD_RULES, TARGET_SCORE, ScoreOption, score_index
+from .storage import TableFileError, default_cache_dir, read_table, write_table
+
+
+_QUANTUM = np.iinfo(np.uint16).max
+
+# Bump when the solver changes so cached tablebases are rebuilt.
+_ENDGAME_VERSION = 2
+
+
+class EndgameTable:
+    """Win probabilities for two-player states within `window` of the target.
+
+    The table is solved for the option choices of `table` and cached like
+    it: pass `cache=False` to always solve, or a directory instead of
+    `default_cache_dir()`. The default size holds about 21 million states
+    (42 MB) and solves in about 45 s on one core. Without a `table`, the
+    default `EVTable` and its `DecisionTable` are loaded (or solved) first,
+    so `EndgameTable()` on a cold cache builds all three.
+    """
+
+    def __init__(
+        self,
+        table: EVTable | None = None,
+        window: int = 1_200,
+        turn_cap: int = 2_000,
+        target_score: int = TARGET_SCORE,
+        tolerance: float = 1e-5,
+        max_sweeps: int = 1_000,
+        cache: bool | str | os.PathLike[str] = True,
+    ) -> None:
+        if window % STEP or turn_cap % STEP:
+            raise ValueError("window and turn_cap must be divisible by 50")
+        if turn_cap < window:
+            raise ValueError("turn_cap must be at least window")
+        self.table = table or EVTable()
+        if self.table.rules != STANDARD_RULES:
+            raise ValueError("endgame tables are solved for the standard rules only")
+        if turn_cap > self.table.max_loose:
+            raise ValueError("turn_cap must not exceed the EV table's max_loose")
+        self.window = window
+        self.turn_cap = turn_cap
+        self.target_score = target_score
+        self.tolerance = tolerance
+        self.max_sweeps = max_sweeps
+        self.cache = cache
+        self.need_buckets = window // STEP
+        self.turn_buckets = turn_cap // STEP
+        self.sweeps = 0
+        self.final, self.values = self._load_or_solve()
+
+    def __reduce__(self):
+        # Workers reopen the cached file instead of receiving the arrays.
+        settings = (self.window, self.turn_cap, self.target_score, self.tolerance, self.max_sweeps, self.cache)
+        return EndgameTable, (self.table,) + settings
+
+    @property
+    def cache_key(self) -> str:
+        settings = (
+            f"endgame:{_ENDGAME_VERSION}:{self.table.cache_key}:{self.window}:{self.turn_cap}:"
+            f"{self.target_score}:{self.tolerance}"
+        )
+        return hashlib.sha256(settings.encode()).hexdigest()
+
+    def cache_path(self) -> Path | None:
+        if self.cache is False:
+            return None
+        directory = default_cache_dir() if self.cache is True else Path(self.cache)
+        return directory / f"endgame-{self.window}-{self.turn_cap}-{self.cache_key[:16]}.zt"
+
+    def in_window(self, my_score: int, other_score: int) -> bool:
+        """Whether both scores are below the target and within `window` of it."""
+        low = self.target_score - self.window
+        return low <= my_score < self.target_score and low <= other_score < self.target_score
+
+    # Final round ---------------------------------------------------------
+
+    def final_roll_probability(self, need: int, free_dice: int) -> float:
+        """P(a final turn reaches `need` more points), about to roll `free_dice` dice.
+
+        `need` counts the points still missing beyond those in hand, loose
+        included; zero or less means any scoring roll wins.
+        """
+        row = min(max(0, -(-need // STEP)), len(self.final) - 1)
+        return float(self.final[row, free_dice if free_dice > 0 else NUM_DICE])
+
+    def final_start_probability(self, need: int, inherited: int = 0, inherited_free_dice: int = NUM_DICE) -> float:
+        """P(the last player scores `need` points in their turn), building if that is better."""
+        fresh = self.final_roll_probability(need, NUM_DICE)
+        if inherited <= 0:
+            return fresh
+        return max(fresh, self.final_roll_probability(need - inherited, inherited_free_dice))
+
+    # Before the final round ----------------------------------------------
+
+    def roll_probability(self, seat: int, my_score: int, other_score: int, locked: int, loose: int, free_dice: int) -> float:
+        """Win probability of rolling `free_dice` dice with `locked` and `loose` points this turn.
+
+        `my_score` is the score at the start of the turn, both scores in the window.
+        """
+        column = loose // STEP
+        if column > self.turn_buckets:
+            return self.bank_probability(seat, my_score, other_score, locked, self.turn_cap, free_dice)
+        locked_column = min(locked // STEP, self.turn_buckets)
+        return self._value(column, free_dice, seat, self._need(my_score), self._need(other_score), locked_column)
+
+    def bank_probability(self, seat: int, my_score: int, other_score: int, locked: int, loose: int, free_dice: int) -> float:
+        """Win probability of banking `locked + loose` points with `free_dice` dice left."""
+        banked = locked + loose
+        if my_score + banked < self.target_score:
+            return 1.0 - self.start_probability(1 - seat, other_score, my_score + banked, banked, free_dice)
+        need = (my_score + banked - other_score) // STEP + (seat == 0)
+        return 1.0 - self.final_start_probability(need * STEP, banked, free_dice)
+
+    def start_probability(self, seat: int, my_score: int, other_score: int, inherited: int = 0, inherited_free_dice: int = NUM_DICE) -> float:
+        """Win probability at the start of a turn, building on `inherited` if that is better."""
+        a, b = self._need(my_score), self._need(other_score)
+        fresh = self._value(0, NUM_DICE, seat, a, b, 0)
+        column = inherited // STEP
+        if inherited <= 0 or column > self.turn_buckets:
+            return fresh
+        return max(fresh, self._value(column, inherited_free_dice, seat, a, b, 0))
+
+    def _need(self, score: int) -> int:
+        return (self.target_score - score) // STEP
+
+    def _value(self, column: int, free_dice: int, seat: int, a: int, b: int, locked_column: int) -> float:
+        code = self.values[column, free_dice if free_dice > 0 else NUM_DICE, seat, a - 1, b - 1, locked_column]
+        return int(code) / _QUANTUM
+
+    # Solver ---------------------------------------------------------------
+
+    def _load_or_solve(self) -> tuple[np.ndarray, np.ndarray]:
+        path = self.cache_path()
+        if path is not None:
+            try:
+                arrays, meta = read_table(path, "endgame", self.cache_key)
+                self.sweeps = meta["sweeps"]
+                return arrays["final"], arrays["values"]
+            except (OSError, TableFileError, KeyError):
+                pass
+
+        final = _solve_final(self.need_buckets + 2 * self.turn_buckets + 2)
+        values = self._solve(final)
+        codes = np.rint(values * _QUANTUM).astype(np.uint16)
+        if path is not None:
+            meta = {"window": self.window, "turn_cap": self.turn_cap, "step": STEP, "sweeps": self.sweeps}
+            try:
+                write_table(path, "endgame", self.cache_key, {"final": final, "values": codes}, meta)
+            except OSError:
+                pass
+        return final, codes
+
+    def _solve(self, final: np.ndarray) -> np.ndarray:
+        """Value-iterate every pre-roll state at once until no value moves by `tolerance`.
+
+        A sweep first scores every after-roll result: `after[slot, f]` is the
+        value of having `slot` loose buckets with `f` dice left (0 for a
+        lock), the better of banking and rolling on. Slot `turn_buckets + 1`
+        stands for every score past the cap. Each pre-roll state is then the
+        `DecisionTable`'s transition weights times `after`, plus its zilch
+        chance times the zilch value: one matrix product for the whole table.
+        """
+        need, cap = self.need_buckets, self.turn_buckets
+        seats = np.arange(2)[:, None, None, None]
+        a = np.arange(1, need + 1)[None, :, None, None]
+        b = np.arange(1, need + 1)[None, None, :, None]
+        locked = np.arange(cap + 1)[None, None, None, :]
+        shape = (2, need, need, cap + 1)
+        last = len(final) - 1
+        final = final.astype(np.float32)
+
+        # The opponent's final-round need before our turn points: lead plus tie break.
+        lead_need = b - a + (seats == 0)
+        weights, zilch_weights = _sweep_weights(DecisionTable.for_table(self.table), cap)
+        zilch_crossed = 1.0 - final[np.clip(lead_need + locked, 0, last), NUM_DICE]
+        build_crossed = final[np.clip(lead_need, 0, last)]
+
+        values = np.full((cap + 1, NUM_DICE) + shape, 0.5, dtype=np.float32)
+        after = np.empty((cap + 2, NUM_DICE) + shape, dtype=np.float32)
+        # Turn totals banked from each slot; the last slot banks at the cap.
+        totals = locked + np.minimum(np.arange(cap + 2), cap)[:, None, None, None, None]
+        crossing = totals >= a
+        # Where the opponent's need axis lands after we bank `totals` below the target.
+        remaining = np.clip(a - totals, 1, need) - 1
+        lock_columns = np.minimum(totals, cap)
+
+        for sweep in range(1, self.max_sweeps + 1):
+            fresh = values[0, NUM_DICE - 1]
+            # opponent[..., s, a', b] is the value of the opponent of `s`
+            # who needs `b` while `s` needs `a'`, starting afresh or building.
+            opponent_fresh = fresh[::-1, :, :, 0].transpose(0, 2, 1)
+            opponent_build = values[:, :, ::-1, :, :, 0].transpose(0, 1, 2, 4, 3)
+            zilch = np.where(
+                locked >= a,
+                zilch_crossed,
+                1.0 - opponent_fresh[seats, np.clip(a - locked, 1, need) - 1, b - 1],
+            )
+
+            after[:, 0] = fresh[seats, a - 1, b - 1, lock_columns]
+            below_fresh = opponent_fresh[seats, remaining, b - 1]
+            for free_dice in range(1, NUM_DICE):
+                build = opponent_build[lock_columns, free_dice - 1, seats, remaining, b - 1]
+                crossed = 1.0 - np.maximum(
+                    final[np.clip(lead_need + totals, 0, last), NUM_DICE], build_crossed[..., free_dice]
+                )
+                banked = np.where(crossing, crossed, 1.0 - np.maximum(below_fresh, build))
+                after[: cap + 1, free_dice] = np.maximum(banked[: cap + 1], values[:, free_dice - 1])
+                after[cap + 1, free_dice] = banked[cap + 1]
+
+            updated = (weights @ after.reshape(len(weights[0]), -1)).reshape(values.shape)
+            updated += zilch_weights[:, :, None, None, None, None] * zilch
+            change = float(np.abs(updated - values).max())
+            values = updated
+            self.sweeps = sweep
+            if change < self.tolerance:
+                break
+        return np.concatenate((values[:, -1:], values), axis=1)
+
+
+class EndgamePolicy(EVPolicy):
+    """`EVPolicy` that plays two-player endgames from an `EndgameTable`.
+
+    Within the table's window, building and banking maximize the tabulated
+    win probability, and final-round options maximize the chance of passing
+    the leader. Elsewhere it plays as `EVPolicy`.
+    """
+
+    name = "endgame"
+
+    # The scalar methods below decide; the batch engine asks them one game at a time.
+    batch_choose_build = Policy.batch_choose_build
+    batch_choose_option = Policy.batch_choose_option
+    batch_should_bank = Policy.batch_should_bank
+
+    def __init__(self, endgame: EndgameTable | None = None, table: EVTable | None = None) -> None:
+        self.endgame = endgame or EndgameTable(table)
+        super().__init__(table or self.endgame.table, self.endgame.target_score)
+
+    def choose_build(self, view: TurnView) -> bool:
+        if view.inherited_score <= 0 or len(view.scores) != 2:
+            return super().choose_build(view)
+        mine, other = view.scores[view.player_index], view.scores[1 - view.player_index]
+        endgame = self.endgame
+        if view.final_round:
+            need = _final_need(view)
+            build = endgame.final_roll_probability(need - view.inherited_score, view.inherited_free_dice)
+            return build > endgame.final_roll_probability(need, NUM_DICE)
+        if endgame.in_window(mine, other) and view.inherited_score <= endgame.turn_cap:
+            fresh = endgame.start_probability(view.player_index, mine, other)
+            build = endgame.roll_probability(view.player_index, mine, other, 0, view.inherited_score, view.inherited_free_dice)
+            return build > fresh
+        return super().choose_build(view)
+
+    def choose_option(self, dice: tuple[int, ...], options: tuple[ScoreOption, ...], view: TurnView) -> ScoreOption:
+        if not view.final_round or len(view.scores) != 2 or not options:
+            return super().choose_option(dice, options, view)
+        remaining = _final_need(view) - view.locked_points - view.loose_score
+        return max(options, key=lambda option: self._final_option_value(remaining - option.points, option.free_dice))
+
+    def should_bank(self, view: TurnView) -> bool:
+        if view.free_dice <= 0 or len(view.scores) != 2:
+            return super().should_bank(view)
+        if view.final_round:
+            return view.locked_points + view.loose_score >= _final_need(view)
+        mine, other = view.scores[view.player_index], view.scores[1 - view.player_index]
+        if not self.endgame.in_window(mine, other):
+            return super().should_bank(view)
+        state = (view.player_index, mine, other, view.locked_points, view.loose_score, view.free_dice)
+        return self.endgame.bank_probability(*state) >= self.endgame.roll_probability(*state)
+
+    def _final_option_value(self, remaining: int, free_dice: int) -> float:
+        if remaining <= 0:
+            return 1.0
+        return self.endgame.final_roll_probability(remaining, free_dice)
+
+
+def _final_need(view: TurnView) -> int:
+    """Turn points the last player needs to win; seat 0 wins ties."""
+    mine, other = view.scores[view.player_index], view.scores[1 - view.player_index]
+    return other - mine + (view.player_index != 0) * STEP
+
+
+def _solve_final(rows: int) -> np.ndarray:
+    """`final[r, f]`: P(reaching `r` more buckets rolling `f` dice) with optimal options.
+
+    Each option either reaches the need (bank, or lock the points in), locks
+    and rolls every die again, or rolls on; banking short of the need loses.
+    Every option scores, so rows only depend on smaller rows.
+    """
+    index = score_index()
+    final = np.zeros((rows, NUM_DICE + 1))
+    groups = []
+    for free_dice in range(1, NUM_DICE + 1):
+        roll = index.outcomes(free_dice)
+        scoring = [outcome for outcome in roll if index.option_count[outcome]]
+        final[0, free_dice] = index.probabilities[scoring].sum()
+        starts = index.option_start[scoring]
+        counts = index.option_count[scoring]
+        selected = np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        segments = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        groups.append((index.probabilities[scoring], segments, index.option_points[selected] // STEP, index.option_free_dice[selected]))
+    final[0, 0] = final[0, NUM_DICE]
+
+    for row in range(1, rows):
+        for free_dice, (probabilities, segments, points, next_free) in enumerate(groups, start=1):
+            remaining = row - points
+            option_values = np.where(
+                remaining <= 0,
+                1.0,
+                final[np.maximum(remaining, 0), np.where(next_free == 0, NUM_DICE, next_free)],
+            )
+            final[row, free_dice] = probabilities @ np.maximum.reduceat(option_values, segments)
+        final[row, 0] = final[row, NUM_DICE]
+    return final
+
+
+def _sweep_weights(decisions: DecisionTable, cap: int) -> tuple[np.ndarray, np.ndarray]:
+    """Transition weights of the `DecisionTable`'s option choices, for `EndgameTable._solve`.
+
+    Row `column * NUM_DICE + free_dice - 1` spreads a pre-roll state over the
+    after-roll slots `min(column + points, cap + 1) * NUM_DICE + next_free`;
+    `zilch[column, free_dice - 1]` is the rest of its probability.
+    """
+    index = score_index()
+    weights = np.zeros(((cap + 1) * NUM_DICE, (cap + 2) * NUM_DICE))
+    zilch = np.zeros((cap + 1, NUM_DICE))
+    for free_dice in range(1, NUM_DICE + 1):
+        roll = index.outcomes(free_dice)
+        outcomes, columns = np.meshgrid(np.arange(roll.start, roll.stop), np.arange(cap + 1), indexing="ij")
+        positions = decisions.options(columns * STEP, outcomes)
+        probabilities = index.probabilities[outcomes]
+        scoring = positions >= 0
+        np.add.at(zilch[:, free_dice - 1], columns[~scoring], probabilities[~scoring])
+
+        columns = columns[scoring]
+        selected = index.option_start[outcomes[scoring]] + positions[scoring]
+        slots = np.minimum(columns + index.option_points[selected] // STEP, cap + 1)
+        targets = slots * NUM_DICE + index.option_free_dice[selected]
+        np.add.at(weights, (columns * NUM_DICE + free_dice - 1, targets), probabilities[scoring])
+    return weights.astype(np.float32), zilch.astype(np.float32)
@@ -2,16 +2,32 @@
 
 from __future__ import annotations
 
+import hashlib
+import os
+import time
 from dataclasses import dataclass
-from functools import lru_cache
+from pathlib import Path
 
-from .rules import NUM_DICE, ScoreOption, dice_from_counts, multinomial_outcomes, score_options
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .caching import memoize, scoped_cache
+from .rules import STANDARD_RULES, RuleSet, ScoreOption, rules_fingerprint, score_index, score_options
+from .storage import TableFileError, default_cache_dir, read_table, write_table
 
 
 STEP = 50
 
+# Upper bound on (loose scores x roll options) evaluated at once by the solver,
+# which keeps its scratch arrays at a few megabytes for any `max_loose`.
+_SOLVER_CHUNK = 1 << 20
 
-@dataclass(frozen=True)
+# Bump when the solver's output changes for the same rules and settings, so
+# tables cached on disk by an older solver are not reused.
+_SOLVER_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
 class EVDecision:
     action: str
     value: float
@@ -24,24 +40,145 @@ class EVTable:
     Locked points are additive, so the solver only needs to model the risky
     loose portion of a turn. The horizon is measured in future rolls; increasing
     it makes the bot more ambitious at the cost of runtime.
+
+    The table is solved bottom-up into `values[depth, free_dice, loose // STEP]`,
+    one depth layer at a time. Column `free_dice == 0` repeats the full-dice
+    values, since scoring every die means rolling all of them again.
+
+    Solved tables are cached on disk, keyed by the rules fingerprint and the
+    solver settings, and later constructions map the file read-only instead of
+    solving. Pass `cache=False` to always solve, or a directory to use instead
+    of `default_cache_dir()`.
+
+    `rules` picks the `RuleSet` to solve; tables for different rule sets get
+    different cache keys, so they can share a cache directory.
+
+    `best_option` results are memoized in a bounded "ev.decisions" cache owned
+    by the table (see `caching.scoped_cache`), so they are freed with it.
     """
 
-    def __init__(self, max_loose: int = 8_000, horizon: int = 7) -> None:
+    def __init__(
+        self,
+        max_loose: int = 8_000,
+        horizon: int = 7,
+        cache: bool | str | os.PathLike[str] = True,
+        rules: RuleSet | None = None,
+    ) -> None:
         if max_loose % STEP != 0:
             raise ValueError("max_loose must be divisible by 50")
+        self.rules = STANDARD_RULES if rules is None else rules
         self.max_loose = max_loose
         self.horizon = horizon
+        self.cache = cache
+        self.values = self._load_or_solve()
+        self.decisions = scoped_cache("ev.decisions", maxsize=65_536)
+
+    def __reduce__(self) -> tuple[type[EVTable], tuple[int, int, bool | str | os.PathLike[str], RuleSet]]:
+        # Worker processes reopen the cached file rather than receive a copy.
+        return EVTable, (self.max_loose, self.horizon, self.cache, self.rules)
+
+    @property
+    def cache_key(self) -> str:
+        return self._cache_key(self.horizon)
+
+    def cache_path(self, horizon: int | None = None) -> Path | None:
+        if self.cache is False:
+            return None
+        horizon = self.horizon if horizon is None else horizon
+        directory = default_cache_dir() if self.cache is True else Path(self.cache)
+        return directory / f"ev-{self.max_loose}-{horizon}-{self._cache_key(horizon)[:16]}.zt"
+
+    def roll_values(self, loose: ArrayLike, free_dice: ArrayLike) -> np.ndarray:
+        """Vectorized `roll_value` over broadcastable arrays of states."""
+        loose, free_dice = np.broadcast_arrays(np.asarray(loose, dtype=np.int64), np.asarray(free_dice, dtype=np.int64))
+        beyond = loose > self.max_loose
+        # np.rint rounds half to even, like the scalar `_snap`.
+        columns = np.rint(np.where(beyond, 0, loose) / STEP).astype(np.int64)
+        values = self.values[self.horizon, np.where(free_dice <= 0, self.rules.num_dice, free_dice), columns]
+        return np.where(beyond, loose.astype(float), values)
+
+    def bank_decisions(self, loose: ArrayLike, free_dice: ArrayLike) -> np.ndarray:
+        """Vectorized `choose_after_score(...).action == "bank"`."""
+        loose = np.asarray(loose)
+        return (np.asarray(free_dice) > 0) & (loose >= self.roll_values(loose, free_dice))
+
+    def after_score_values(self, loose: ArrayLike, free_dice: ArrayLike) -> np.ndarray:
+        """Vectorized `choose_after_score(...).value`."""
+        loose, free_dice = np.broadcast_arrays(np.asarray(loose, dtype=np.int64), np.asarray(free_dice, dtype=np.int64))
+        return np.where(
+            free_dice > 0,
+            np.maximum(loose, self.roll_values(loose, free_dice)),
+            loose + self.roll_value(0, self.rules.num_dice),
+        )
+
+    def best_options(self, loose: ArrayLike, outcomes: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+        """Vectorized `best_option` over `score_index()` outcome numbers.
+
+        Returns each state's best option position within
+        `score_index().options(outcome)` (the `score_options` order) and its
+        value. Ties go to the first option, as in `best_option`; outcomes with
+        no scoring option get position -1 and value 0.
+        """
+        index = score_index(self.rules)
+        loose, outcomes = np.broadcast_arrays(np.asarray(loose, dtype=np.int64), np.asarray(outcomes, dtype=np.int64))
+        shape = loose.shape
+        loose, outcomes = loose.ravel(), outcomes.ravel()
+        counts = index.option_count[outcomes]
+        positions = np.full(len(outcomes), -1, dtype=np.int64)
+        best = np.zeros(len(outcomes))
+        scoring = counts > 0
+        if scoring.any():
+            counts = counts[scoring]
+            segments = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            offsets = np.arange(counts.sum()) - np.repeat(segments, counts)
+            selected = np.repeat(index.option_start[outcomes[scoring]], counts) + offsets
+            next_loose = np.repeat(loose[scoring], counts) + index.option_points[selected]
+            values = self.after_score_values(next_loose, index.option_free_dice[selected])
+            best[scoring] = np.maximum.reduceat(values, segments)
+            first = np.where(values == np.repeat(best[scoring], counts), offsets, np.iinfo(np.int64).max)
+            positions[scoring] = np.minimum.reduceat(first, segments)
+        return positions.reshape(shape), best.reshape(shape)
+
+    def best_options_for_counts(self, loose: ArrayLike, counts: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+        """`best_options` for rows of count vectors instead of outcome numbers."""
+        outcomes = score_index(self.rules).outcomes_for(counts).reshape(np.shape(counts)[:-1])
+        if (outcomes < 0).any():
+            raise ValueError(f"count vectors must describe rolls of 0 to {self.rules.num_dice} dice")
+        return self.best_options(loose, outcomes)
+
+    def layer_changes(self) -> np.ndarray:
+        """Largest value change from each depth to the next, `[1, horizon]`.
+
+        Values never shrink with depth, so these are also how much each extra
+        roll of look-ahead added anywhere in the table.
+        """
+        return np.abs(np.diff(self.values, axis=0)).max(axis=(1, 2))
+
+    def extend(self, layers: int = 1, store: bool = True) -> EVTable:
+        """Solve `layers` more depth layers on top of the existing ones, in place.
+
+        Only the new layers are computed. Unless `store` is false, the result is
+        cached on disk under the new horizon, as if built at that depth.
+        """
+        if layers < 0:
+            raise ValueError("layers must be non-negative")
+        self.values = self._solve(self.values, self.horizon + layers)
+        self.horizon += layers
+        self.decisions.clear()
+        if layers and store:
+            self._store()
+        return self
 
     def roll_value(self, loose: int, free_dice: int) -> float:
         if free_dice <= 0:
-            free_dice = NUM_DICE
+            free_dice = self.rules.num_dice
         if loose > self.max_loose:
             return float(loose)
-        return self._roll_value(self._snap(loose), free_dice, self.horizon)
+        return float(self.values[self.horizon, free_dice, self._snap(loose) // STEP])
 
     def choose_after_score(self, loose: int, free_dice: int) -> EVDecision:
         if free_dice <= 0:
-            return EVDecision("roll", loose + self.roll_value(0, NUM_DICE))
+            return EVDecision("roll", loose + self.roll_value(0, self.rules.num_dice))
 
         roll = self.roll_value(loose, free_dice)
         if loose >= roll:
@@ -51,52 +188,226 @@ class EVTable:
     def option_decision(self, loose: int, option: ScoreOption) -> EVDecision:
         next_loose = loose + option.points
         if option.free_dice == 0:
-            return EVDecision("lock-and-roll", next_loose + self.roll_value(0, NUM_DICE), option)
+            return EVDecision("lock-and-roll", next_loose + self.roll_value(0, self.rules.num_dice), option)
 
         followup = self.choose_after_score(next_loose, option.free_dice)
         return EVDecision(followup.action, followup.value, option)
 
     def best_option(self, dice: tuple[int, ...], loose: int = 0) -> EVDecision:
-        options = score_options(tuple(sorted(dice)))
+        key = (tuple(sorted(dice)), loose)
+        decision = self.decisions.get(key)
+        if decision is None:
+            decision = self.decisions.put(key, self._best_option(*key))
+        return decision
+
+    def _best_option(self, dice: tuple[int, ...], loose: int) -> EVDecision:
+        options = score_options(dice, rules=self.rules)
         if not options:
             return EVDecision("zilch", 0)
 
         return max((self.option_decision(loose, option) for option in options), key=lambda decision: decision.value)
 
-    @lru_cache(maxsize=None)
-    def _roll_value(self, loose: int, free_dice: int, depth: int) -> float:
-        if depth <= 0:
-            return float(loose)
+    def _cache_key(self, horizon: int) -> str:
+        settings = f"ev-table:{_SOLVER_VERSION}:{rules_fingerprint(self.rules)}:{STEP}:{self.max_loose}:{horizon}"
+        return hashlib.sha256(settings.encode()).hexdigest()
+
+    def _load_or_solve(self) -> np.ndarray:
+        """Map the cached table, or grow the deepest shallower cached one, or solve."""
+        path = self.cache_path()
+        if path is None:
+            return self._solve(self._base_layer()[None], self.horizon)
+        try:
+            arrays, _ = read_table(path, "ev-table", self.cache_key)
+            return arrays["values"]
+        except (OSError, TableFileError, KeyError):
+            pass
+
+        values = self._solve(self._cached_prefix(), self.horizon)
+        self.values = values
+        self._store()
+        return values
+
+    def _cached_prefix(self) -> np.ndarray:
+        """Layers of the deepest cached table below `horizon`, or just depth 0."""
+        for horizon in range(self.horizon - 1, 0, -1):
+            path = self.cache_path(horizon)
+            if path is not None and path.exists():
+                try:
+                    arrays, _ = read_table(path, "ev-table", self._cache_key(horizon))
+                    return arrays["values"]
+                except (OSError, TableFileError, KeyError):
+                    continue
+        return self._base_layer()[None]
 
-        total = 0.0
-        for probability, summaries in _outcome_summaries(free_dice):
-            if not summaries:
-                continue
-
-            best = 0.0
-            for points, next_free_dice in summaries:
-                next_loose = loose + points
-                if next_free_dice == 0:
-                    value = next_loose + self._roll_value(0, NUM_DICE, depth - 1)
-                elif next_loose > self.max_loose:
-                    value = float(next_loose)
-                else:
-                    snapped = self._snap(next_loose)
-                    value = max(float(next_loose), self._roll_value(snapped, next_free_dice, depth - 1))
-                best = max(best, value)
-            total += probability * best
-        return total
+    def _store(self) -> None:
+        path = self.cache_path()
+        if path is None:
+            return
+        meta = {"max_loose": self.max_loose, "horizon": self.horizon, "step": STEP}
+        try:
+            write_table(path, "ev-table", self.cache_key, {"values": self.values}, meta)
+        except OSError:
+            pass
+
+    def _base_layer(self) -> np.ndarray:
+        loose = np.arange(0, self.max_loose + 1, STEP, dtype=float)
+        return np.broadcast_to(loose, (self.rules.num_dice + 1, len(loose)))
+
+    def _solve(self, prefix: np.ndarray, horizon: int) -> np.ndarray:
+        values = np.empty((horizon + 1,) + prefix.shape[1:])
+        values[: len(prefix)] = prefix
+        for depth in range(len(prefix), horizon + 1):
+            values[depth] = self._next_layer(values[depth - 1])
+        return values
+
+    def _next_layer(self, layer: np.ndarray) -> np.ndarray:
+        """Solve depth `d` of the table from depth `d - 1`."""
+        loose = np.arange(0, self.max_loose + 1, STEP)
+        values = np.empty_like(layer)
+        # One spare slot past the previous layer holds -inf, so lookups for
+        # banked or locked options fall back to the points in hand.
+        previous = np.append(layer.ravel(), -np.inf)
+        restart = layer[self.rules.num_dice, 0]
+        for free_dice in range(1, self.rules.num_dice + 1):
+            transitions = _transitions(free_dice, self.rules)
+            rows = max(1, _SOLVER_CHUNK // len(transitions.points))
+            for start in range(0, len(loose), rows):
+                chunk = loose[start : start + rows]
+                values[free_dice, start : start + rows] = self._expected_roll(previous, restart, chunk, transitions)
+        values[0] = values[self.rules.num_dice]
+        return values
+
+    def _expected_roll(
+        self, previous: np.ndarray, restart: float, loose: np.ndarray, transitions: _Transitions
+    ) -> np.ndarray:
+        """Expected value of one roll from each loose score, given the next layer."""
+        next_loose = loose[:, None] + transitions.points[None, :]
+        lookup = transitions.free_dice * (self.max_loose // STEP + 1) + next_loose // STEP
+        lookup[(next_loose > self.max_loose) | (transitions.free_dice == 0)] = len(previous) - 1
+
+        option_values = previous.take(lookup)
+        np.maximum(option_values, next_loose, out=option_values)
+        option_values[:, transitions.free_dice == 0] += restart
+        best = np.maximum.reduceat(option_values, transitions.group_start, axis=1)
+        return best @ transitions.probabilities
 
     @staticmethod
     def _snap(value: int) -> int:
         return int(round(value / STEP) * STEP)
 
 
-@lru_cache(maxsize=None)
-def _outcome_summaries(free_dice: int) -> tuple[tuple[float, tuple[tuple[int, int], ...]], ...]:
+@dataclass(frozen=True)
+class Convergence:
+    """How far `solve_anytime` got and why it stopped.
+
+    `change` is the largest value change made by the last layer; `stopped_by`
+    is "epsilon", "time" or "max_horizon".
+    """
+
+    horizon: int
+    change: float
+    stopped_by: str
+    seconds: float
+    layer_seconds: tuple[float, ...]
+
+    @property
+    def converged(self) -> bool:
+        return self.stopped_by == "epsilon"
+
+
+def solve_anytime(
+    max_loose: int = 8_000,
+    time_budget: float | None = None,
+    epsilon: float | None = None,
+    max_horizon: int = 64,
+    start_horizon: int = 1,
+    cache: bool | str | os.PathLike[str] = True,
+    rules: RuleSet | None = None,
+) -> tuple[EVTable, Convergence]:
+    """Deepen an `EVTable` one layer at a time until a stopping rule fires.
+
+    Stops once the last layer changed no value by more than `epsilon`, once
+    another layer would likely overrun `time_budget` seconds (judged by the
+    previous layer's time), or at `max_horizon`. With neither rule given it
+    runs to `max_horizon`. The finished table is cached under its horizon.
+    """
+    started = time.perf_counter()
+    table = EVTable(max_loose, max(1, start_horizon), cache, rules)
+    layer_seconds: list[float] = []
+    stopped_by = "max_horizon"
+    while table.horizon < max_horizon:
+        if epsilon is not None and table.layer_changes()[-1] <= epsilon:
+            stopped_by = "epsilon"
+            break
+        elapsed = time.perf_counter() - started
+        if time_budget is not None and elapsed + (layer_seconds[-1] if layer_seconds else 0.0) > time_budget:
+            stopped_by = "time"
+            break
+        layer_started = time.perf_counter()
+        table.extend(1, store=False)
+        layer_seconds.append(time.perf_counter() - layer_started)
+    else:
+        if epsilon is not None and table.layer_changes()[-1] <= epsilon:
+            stopped_by = "epsilon"
+
+    if layer_seconds:
+        table._store()
+    convergence = Convergence(
+        horizon=table.horizon,
+        change=float(table.layer_changes()[-1]),
+        stopped_by=stopped_by,
+        seconds=time.perf_counter() - started,
+        layer_seconds=tuple(layer_seconds),
+    )
+    return table, convergence
+
+
+@memoize("ev.outcome_summaries", maxsize=64)
+def _outcome_summaries(free_dice: int, rules: RuleSet = STANDARD_RULES) -> tuple[tuple[float, tuple[tuple[int, int], ...]], ...]:
+    index = score_index(rules)
+    points = index.option_points.tolist()
+    next_free_dice = index.option_free_dice.tolist()
     summaries = []
-    for counts, probability in multinomial_outcomes(free_dice):
-        dice = dice_from_counts(counts)
-        options = tuple((option.points, option.free_dice) for option in score_options(dice))
-        summaries.append((probability, options))
+    for outcome in index.outcomes(free_dice):
+        start, stop = index.option_start[outcome], index.option_start[outcome + 1]
+        summaries.append((float(index.probabilities[outcome]), tuple(zip(points[start:stop], next_free_dice[start:stop]))))
     return tuple(summaries)
+
+
+@dataclass(frozen=True)
+class _Transitions:
+    """Scoring outcomes of one roll, flattened for the layered solver.
+
+    Rolls with the same set of `(points, free_dice)` choices are merged into
+    one group whose probability is their sum. Options for group `g` start at
+    `group_start[g]`.
+    """
+
+    probabilities: np.ndarray
+    group_start: np.ndarray
+    points: np.ndarray
+    free_dice: np.ndarray
+
+
+@memoize("ev.transitions", maxsize=64)
+def _transitions(free_dice: int, rules: RuleSet = STANDARD_RULES) -> _Transitions:
+    groups: dict[tuple[tuple[int, int], ...], float] = {}
+    for probability, summaries in _outcome_summaries(free_dice, rules):
+        if summaries:
+            key = tuple(sorted(set(summaries)))
+            groups[key] = groups.get(key, 0.0) + probability
+
+    group_start = []
+    points = []
+    next_free_dice = []
+    for summaries in groups:
+        group_start.append(len(points))
+        for option_points, option_free_dice in summaries:
+            points.append(option_points)
+            next_free_dice.append(option_free_dice)
+    return _Transitions(
+        probabilities=np.array(list(groups.values())),
+        group_start=np.array(group_start, dtype=np.int64),
+        points=np.array(points, dtype=np.int64),
+        free_dice=np.array(next_free_dice, dtype=np.int64),
+    )
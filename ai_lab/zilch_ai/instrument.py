@@ -0,0 +1,180 @@
+"""Optional instrumentation for `play_turn` and `play_game`.
+
+Pass a `Probe` as `probe=` to count turn events, time every policy decision
+and measure cache hit rates over a run. Without a probe the simulator only
+pays for an `is not None` check per event.
+
+    probe = Probe()
+    simulate_games(policies, 1_000, probe=probe)
+    print(json.dumps(probe.report(), indent=2))
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+from typing import Any, Sequence
+
+from .caching import cache_stats
+from .policies import Policy, TurnView
+from .rules import STANDARD_RULES, RuleSet, ScoreOption, score_index
+
+
+DECISIONS = ("choose_build", "choose_option", "should_bank")
+_BUCKETS = 40
+
+
+@dataclass
+class LatencyHistogram:
+    """Decision latencies in power-of-two nanosecond buckets.
+
+    Bucket `b` holds calls that took less than `2**b` ns (and at least
+    `2**(b - 1)`), so quantiles are upper bounds within a factor of two.
+    """
+
+    calls: int = 0
+    total_ns: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * _BUCKETS)
+
+    def add(self, nanoseconds: int) -> None:
+        self.calls += 1
+        self.total_ns += nanoseconds
+        self.buckets[min(nanoseconds.bit_length(), _BUCKETS - 1)] += 1
+
+    def merge(self, other: LatencyHistogram) -> LatencyHistogram:
+        self.calls += other.calls
+        self.total_ns += other.total_ns
+        self.buckets = [mine + theirs for mine, theirs in zip(self.buckets, other.buckets)]
+        return self
+
+    def quantile(self, q: float) -> int:
+        """Upper bound, in ns, of the bucket holding quantile `q`."""
+        rank = q * (self.calls - 1)
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen > rank:
+                return 1 << bucket
+        return 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "total_ns": self.total_ns,
+            "mean_ns": self.total_ns / self.calls if self.calls else 0.0,
+            "p50_ns": self.quantile(0.5),
+            "p99_ns": self.quantile(0.99),
+            "histogram": {1 << bucket: count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class TimedPolicy(Policy):
+    """Wrap a policy so each decision's latency lands in a `Probe`."""
+
+    def __init__(self, policy: Policy, probe: Probe) -> None:
+        self.policy = policy
+        self.name = policy.name
+        self._build, self._option, self._bank = (probe.latency(policy.name, decision) for decision in DECISIONS)
+
+    def choose_build(self, view: TurnView) -> bool:
+        started = perf_counter_ns()
+        decision = self.policy.choose_build(view)
+        self._build.add(perf_counter_ns() - started)
+        return decision
+
+    def choose_option(self, dice: tuple[int, ...], options: tuple[ScoreOption, ...], view: TurnView) -> ScoreOption:
+        started = perf_counter_ns()
+        option = self.policy.choose_option(dice, options, view)
+        self._option.add(perf_counter_ns() - started)
+        return option
+
+    def should_bank(self, view: TurnView) -> bool:
+        started = perf_counter_ns()
+        decision = self.policy.should_bank(view)
+        self._bank.add(perf_counter_ns() - started)
+        return decision
+
+
+@dataclass
+class Probe:
+    """Counters, decision latencies and cache statistics for one run.
+
+    `counts` holds games, turns, rolls, zilches, locks (all dice scored),
+    builds and banks. Cache hits and misses are measured as differences from
+    when the probe was created (or last settled), so probes from worker
+    processes can be merged into one report. `score_index.options` is
+    measured on the index of `rules`, which must be the rules of the games
+    the probe records.
+    """
+
+    counts: Counter[str] = field(default_factory=Counter)
+    latencies: dict[tuple[str, str], LatencyHistogram] = field(default_factory=dict)
+    caches: dict[str, Counter[str]] = field(default_factory=dict)
+    rules: RuleSet = STANDARD_RULES
+    _baseline: dict[str, tuple[int, int]] = field(default_factory=dict, repr=False)
+    _settled_rolls: int = field(default=0, repr=False)
+
+    def __post_init__(self) -> None:
+        if not self._baseline:
+            self._baseline = cache_snapshot(self.rules)
+
+    def latency(self, policy: str, decision: str) -> LatencyHistogram:
+        return self.latencies.setdefault((policy, decision), LatencyHistogram())
+
+    def wrap(self, policies: Sequence[Policy]) -> list[Policy]:
+        return [policy if isinstance(policy, TimedPolicy) else TimedPolicy(policy, self) for policy in policies]
+
+    def settle(self) -> Probe:
+        """Fold cache activity since the last snapshot into `caches`.
+
+        `ScoreIndex.options` keeps no counters: its misses are the outcomes
+        built since the snapshot, and every other roll was a hit.
+        """
+        current = cache_snapshot(self.rules)
+        for name, (hits, misses) in current.items():
+            before_hits, before_misses = self._baseline.get(name, (0, 0))
+            stats = self.caches.setdefault(name, Counter())
+            stats["hits"] += hits - before_hits
+            stats["misses"] += misses - before_misses
+        built = current["score_index.options"][1] - self._baseline["score_index.options"][1]
+        self.caches["score_index.options"]["hits"] += self.counts["rolls"] - self._settled_rolls - built
+        self._settled_rolls = self.counts["rolls"]
+        self._baseline = current
+        return self
+
+    def merge(self, other: Probe) -> Probe:
+        """Add a settled probe, typically one returned by a worker process."""
+        self._settled_rolls += other.counts["rolls"]
+        self.counts.update(other.counts)
+        for key, histogram in other.latencies.items():
+            self.latency(*key).merge(histogram)
+        for name, stats in other.caches.items():
+            self.caches.setdefault(name, Counter()).update(stats)
+        return self
+
+    def report(self) -> dict[str, Any]:
+        """Return everything recorded so far as JSON-ready nested dicts."""
+        self.settle()
+        decisions: dict[str, dict[str, Any]] = {}
+        for (policy, decision), histogram in sorted(self.latencies.items()):
+            decisions.setdefault(policy, {})[decision] = histogram.as_dict()
+        caches = {}
+        for name, stats in sorted(self.caches.items()):
+            lookups = stats["hits"] + stats["misses"]
+            caches[name] = {
+                "hits": stats["hits"],
+                "misses": stats["misses"],
+                "hit_rate": stats["hits"] / lookups if lookups else None,
+            }
+        return {"counts": dict(sorted(self.counts.items())), "decisions": decisions, "caches": caches}
+
+
+def cache_snapshot(rules: RuleSet | None = None) -> dict[str, tuple[int, int]]:
+    """Cumulative `(hits, misses)` of every registered cache in this process.
+
+    `score_index.options` counts the options built in the index of `rules`.
+    """
+    snapshot = {name: (stats.hits, stats.misses) for name, stats in cache_stats().items()}
+    snapshot["score_index.options"] = (0, score_index(rules).built_options())
+    return snapshot
@@ -0,0 +1,106 @@
+"""Paired two-player comparisons with common random numbers.
+
+Each seed is played twice, once as `first` vs `second` and once with the
+seats swapped. Both games use `CommonDice`, so in the swapped game each policy
+faces the dice the other one had from the same seat. The pair's difference
+cancels the dice luck and the first-mover advantage that independent games
+leave in the estimate.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from math import sqrt
+from statistics import NormalDist
+from typing import Iterator
+
+from .policies import Policy
+from .sim import GameResult, iter_games
+
+
+@dataclass
+class PairedStats:
+    """Running paired-difference summary for two policies.
+
+    Each pair contributes `d = (first's wins - second's wins) / 2`, one of -1,
+    0 or 1. Its mean estimates `P(first wins) - P(second wins)`, averaged over
+    both seat orders. `independent_variance` is the variance the same number of
+    unpaired games would have, for judging how much the pairing saved.
+    """
+
+    pairs: int = 0
+    first_wins: int = 0
+    split_pairs: int = 0
+    difference_total: int = 0
+    difference_squares: int = 0
+    margin_total: int = 0
+
+    def add(self, forward: GameResult, swapped: GameResult) -> None:
+        wins = (forward.winner_index == 0) + (swapped.winner_index == 1)
+        difference = wins - 1
+        self.pairs += 1
+        self.first_wins += wins
+        self.split_pairs += difference == 0
+        self.difference_total += difference
+        self.difference_squares += difference * difference
+        self.margin_total += forward.scores[0] - forward.scores[1] + swapped.scores[1] - swapped.scores[0]
+
+    @property
+    def games(self) -> int:
+        return 2 * self.pairs
+
+    def mean_difference(self) -> float:
+        return self.difference_total / self.pairs if self.pairs else 0.0
+
+    def variance(self) -> float:
+        """Estimated variance of `mean_difference`."""
+        if self.pairs < 2:
+            return float("inf")
+        mean = self.mean_difference()
+        sample = (self.difference_squares - self.pairs * mean * mean) / (self.pairs - 1)
+        return sample / self.pairs
+
+    def independent_variance(self) -> float:
+        if not self.pairs:
+            return float("inf")
+        rate = self.first_wins / self.games
+        return 4 * rate * (1 - rate) / self.games
+
+    def interval(self, confidence: float = 0.95) -> tuple[float, float]:
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        half_width = z * sqrt(self.variance())
+        mean = self.mean_difference()
+        return max(-1.0, mean - half_width), min(1.0, mean + half_width)
+
+    def mean_margin(self) -> float:
+        """Mean points by which `first` beat `second`, per game."""
+        return self.margin_total / self.games if self.pairs else 0.0
+
+
+def iter_pairs(
+    first: Policy,
+    second: Policy,
+    pairs: int,
+    seed: int = 20260617,
+    workers: int | None = None,
+) -> Iterator[tuple[GameResult, GameResult]]:
+    """Yield `(first vs second, second vs first)` results sharing one seed.
+
+    With `workers`, each seat order streams from its own process pool.
+    """
+    forward = iter_games([first, second], pairs, seed, workers, common_dice=True)
+    swapped = iter_games([second, first], pairs, seed, workers, common_dice=True)
+    return zip(forward, swapped)
+
+
+def paired_match(
+    first: Policy,
+    second: Policy,
+    pairs: int,
+    seed: int = 20260617,
+    workers: int | None = None,
+) -> PairedStats:
+    stats = PairedStats()
+    for forward, swapped in iter_pairs(first, second, pairs, seed, workers):
+        stats.add(forward, swapped)
+    return stats
@@ -4,15 +4,67 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from random import Random
+from typing import TYPE_CHECKING, Iterator, Sequence, overload
 
+import numpy as np
+
+from .caching import memoize
+from .decisions import DecisionTable
 from .ev import EVTable
-from .rules import NUM_DICE, TARGET_SCORE, ScoreOption, score_options
+from .rules import RuleSet, ScoreOption, score_index, score_options
+
+if TYPE_CHECKING:
+    from .batch import GameBatch
+
+
+class ScoresView(Sequence[int]):
+    """Read-only live view of the running game's scores.
+
+    The simulator hands one of these to policies instead of copying the score
+    list into a fresh tuple on every decision.
+    """
+
+    __slots__ = ("_scores",)
+
+    def __init__(self, scores: list[int]) -> None:
+        self._scores = scores
+
+    @overload
+    def __getitem__(self, index: int) -> int: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> tuple[int, ...]: ...
 
+    def __getitem__(self, index: int | slice) -> int | tuple[int, ...]:
+        if isinstance(index, slice):
+            return tuple(self._scores[index])
+        return self._scores[index]
 
-@dataclass
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._scores)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence):
+            return tuple(self._scores) == tuple(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ScoresView({tuple(self._scores)!r})"
+
+
+@dataclass(slots=True)
 class TurnView:
+    """What a policy sees when asked for a decision.
+
+    The simulator reuses a single view per game and updates it in place
+    between decisions, so policies should read from it rather than keep it.
+    """
+
     player_index: int
-    scores: tuple[int, ...]
+    scores: Sequence[int]
     inherited_score: int
     inherited_free_dice: int
     locked_points: int
@@ -33,6 +85,24 @@ class Policy:
     def should_bank(self, view: TurnView) -> bool:
         return view.loose_score > 0
 
+    # Vectorized decision paths for the batch engine. Each method answers for
+    # the games at `rows`, which are all seated at this policy. The defaults
+    # ask the scalar methods one game at a time.
+
+    def batch_choose_build(self, batch: GameBatch, rows: np.ndarray) -> Sequence[bool]:
+        return [self.choose_build(batch.view(row)) for row in rows]
+
+    def batch_choose_option(self, batch: GameBatch, rows: np.ndarray, outcomes: np.ndarray) -> Sequence[int]:
+        choices = []
+        for row, outcome in zip(rows, outcomes):
+            dice = batch.table.dice(outcome)
+            options = batch.table.options(outcome)
+            choices.append(options.index(self.choose_option(dice, options, batch.view(row))))
+        return choices
+
+    def batch_should_bank(self, batch: GameBatch, rows: np.ndarray) -> Sequence[bool]:
+        return [self.should_bank(batch.view(row)) for row in rows]
+
 
 class RandomPolicy(Policy):
     name = "random"
@@ -68,6 +138,16 @@ class GreedyThresholdPolicy(Policy):
             return True
         return view.free_dice <= 2 and view.loose_score + view.locked_points >= 350
 
+    def batch_choose_build(self, batch: GameBatch, rows: np.ndarray) -> np.ndarray:
+        return (batch.inherited_score[rows] >= 500) | (batch.inherited_free_dice[rows] >= 7)
+
+    def batch_choose_option(self, batch: GameBatch, rows: np.ndarray, outcomes: np.ndarray) -> np.ndarray:
+        return _greedy_choices()[outcomes]
+
+    def batch_should_bank(self, batch: GameBatch, rows: np.ndarray) -> np.ndarray:
+        earned = batch.loose_score[rows] + batch.locked_points[rows]
+        return (earned >= self.bank_threshold) | ((batch.free_dice[rows] <= 2) & (earned >= 350))
+
 
 class EVPolicy(Policy):
     name = "ev"
@@ -77,9 +157,18 @@ class EVPolicy(Policy):
         "high_free_dice": 4_500,
     }
 
-    def __init__(self, table: EVTable | None = None, target_score: int = TARGET_SCORE) -> None:
+    def __init__(self, table: EVTable | None = None, target_score: int | None = None) -> None:
         self.table = table or EVTable()
-        self.target_score = target_score
+        self.target_score = self.table.rules.target_score if target_score is None else target_score
+        self._decisions: DecisionTable | None = None
+
+    @property
+    def decisions(self) -> DecisionTable:
+        """Precomputed best options of `table`, rebuilt if the table is extended."""
+        decisions = self._decisions
+        if decisions is None or decisions.table is not self.table or decisions.horizon != self.table.horizon:
+            decisions = self._decisions = DecisionTable.for_table(self.table)
+        return decisions
 
     def closing_lead_buffer(self, free_dice: int) -> int:
         if free_dice >= 7:
@@ -92,12 +181,15 @@ class EVPolicy(Policy):
         if view.inherited_score <= 0:
             return False
         build_value = self.table.roll_value(view.inherited_score, view.inherited_free_dice)
-        fresh_value = self.table.roll_value(0, NUM_DICE)
+        fresh_value = self.table.roll_value(0, self.table.rules.num_dice)
         return build_value > fresh_value
 
     def choose_option(self, dice: tuple[int, ...], options: tuple[ScoreOption, ...], view: TurnView) -> ScoreOption:
-        decision = self.table.best_option(dice, view.loose_score)
-        return decision.option or options[0]
+        outcome = score_index(self.table.rules).outcome_for_dice(dice)
+        if outcome is None or not options:
+            return self.table.best_option(dice, view.loose_score).option or options[0]
+        position = self.decisions.option(outcome, view.loose_score)
+        return options[position] if position >= 0 else options[0]
 
     def should_bank(self, view: TurnView) -> bool:
         if view.free_dice <= 0:
@@ -117,6 +209,55 @@ class EVPolicy(Policy):
         decision = self.table.choose_after_score(view.loose_score, view.free_dice)
         return decision.action == "bank"
 
+    def batch_choose_build(self, batch: GameBatch, rows: np.ndarray) -> np.ndarray:
+        build_value = self.table.roll_values(batch.inherited_score[rows], batch.inherited_free_dice[rows])
+        return build_value > self.table.roll_value(0, self.table.rules.num_dice)
+
+    def batch_choose_option(self, batch: GameBatch, rows: np.ndarray, outcomes: np.ndarray) -> np.ndarray:
+        return self.decisions.options(batch.loose_score[rows], outcomes)
+
+    def batch_should_bank(self, batch: GameBatch, rows: np.ndarray) -> np.ndarray:
+        free_dice = batch.free_dice[rows]
+        loose = batch.loose_score[rows]
+        total_if_bank = batch.own_scores(rows) + batch.locked_points[rows] + loose
+        other_best = batch.best_other_scores(rows)
+        final_round = batch.final_round[rows]
+        buffers = np.select(
+            [free_dice >= 7, free_dice >= 4],
+            [self.closing_buffers["high_free_dice"], self.closing_buffers["mid_free_dice"]],
+            self.closing_buffers["low_free_dice"],
+        )
+        by_table = self.table.bank_decisions(loose, free_dice)
+        return np.select(
+            [
+                free_dice <= 0,
+                final_round & (total_if_bank > other_best),
+                ~final_round & (total_if_bank >= self.target_score),
+                final_round,
+            ],
+            [False, True, total_if_bank - other_best >= buffers, False],
+            by_table,
+        )
+
+
+@memoize("policies.greedy_choices", maxsize=1)
+def _greedy_choices() -> np.ndarray:
+    """Position of the `GreedyThresholdPolicy` pick for every scoring outcome."""
+    index = score_index()
+    choices = np.full(len(index), -1, dtype=np.int64)
+    for outcome, (start, stop) in enumerate(zip(index.option_start[:-1].tolist(), index.option_start[1:].tolist())):
+        if stop > start:
+            keys = list(zip(index.option_points[start:stop].tolist(), index.option_free_dice[start:stop].tolist()))
+            choices[outcome] = keys.index(max(keys))
+    return choices
+
+
+def check_rules(policies: Sequence[Policy], rules: RuleSet) -> None:
+    """Raise `ValueError` if an `EVPolicy` in `policies` was solved for other rules."""
+    for policy in policies:
+        if isinstance(policy, EVPolicy) and policy.table.rules != rules:
+            raise ValueError(f"the {policy.name} policy's EV table was solved for other rules than the game's")
+
 
-def legal_options(dice: tuple[int, ...]) -> tuple[ScoreOption, ...]:
-    return score_options(tuple(sorted(dice)))
+def legal_options(dice: tuple[int, ...], rules: RuleSet | None = None) -> tuple[ScoreOption, ...]:
+    return score_options(tuple(sorted(dice)), rules=rules)
@@ -0,0 +1,179 @@
+"""Game results, one at a time or column by column.
+
+`GameResult` is what `play_game` returns. `GameResults` holds many of them as
+three NumPy columns (winner seat, turns, and one score per seat), about 13
+bytes per two-player game instead of a dataclass and a tuple each. It is a
+`Sequence` of `GameResult`s, built on access, so code that iterates, indexes
+or compares result lists keeps working, while summaries (`win_rates`,
+`margin_quantiles`, `turn_counts`) run as single array operations. `save`
+writes a table file (see `storage`) and `load` maps it back without copying.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Iterable, Iterator, overload
+
+import numpy as np
+
+from .storage import read_table, write_table
+
+
+@dataclass(frozen=True, slots=True)
+class GameResult:
+    winner_index: int
+    scores: tuple[int, ...]
+    turns: int
+
+
+class GameResults(Sequence):
+    """Growable columns of game results for a fixed number of seats."""
+
+    def __init__(self, players: int, capacity: int = 0) -> None:
+        self.players = players
+        self._winner = np.zeros(capacity, dtype=np.uint8)
+        self._turns = np.zeros(capacity, dtype=np.uint32)
+        self._scores = np.zeros((capacity, players), dtype=np.int32)
+        self._size = 0
+
+    @classmethod
+    def from_arrays(cls, winner: np.ndarray, scores: np.ndarray, turns: np.ndarray) -> GameResults:
+        """Wrap existing columns; arrays of the column dtypes are used without copying."""
+        scores = np.asarray(scores, dtype=np.int32)
+        results = cls(scores.shape[1])
+        results._winner = np.asarray(winner, dtype=np.uint8)
+        results._turns = np.asarray(turns, dtype=np.uint32)
+        results._scores = scores
+        results._size = len(scores)
+        if not len(results._winner) == len(results._turns) == results._size:
+            raise ValueError("winner, scores and turns must have one row per game")
+        return results
+
+    @property
+    def winner(self) -> np.ndarray:
+        return self._winner[: self._size]
+
+    @property
+    def turns(self) -> np.ndarray:
+        return self._turns[: self._size]
+
+    @property
+    def scores(self) -> np.ndarray:
+        return self._scores[: self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    @overload
+    def __getitem__(self, index: int) -> GameResult: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> GameResults: ...
+
+    def __getitem__(self, index: int | slice) -> GameResult | GameResults:
+        if isinstance(index, slice):
+            return GameResults.from_arrays(self.winner[index], self.scores[index], self.turns[index])
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("game index out of range")
+        return GameResult(int(self._winner[index]), tuple(self._scores[index].tolist()), int(self._turns[index]))
+
+    def __iter__(self) -> Iterator[GameResult]:
+        for winner, scores, turns in zip(self.winner.tolist(), self.scores.tolist(), self.turns.tolist()):
+            yield GameResult(winner, tuple(scores), turns)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, GameResults):
+            return (
+                self.players == other.players
+                and np.array_equal(self.winner, other.winner)
+                and np.array_equal(self.scores, other.scores)
+                and np.array_equal(self.turns, other.turns)
+            )
+        if isinstance(other, (list, tuple)):
+            return len(other) == self._size and all(mine == theirs for mine, theirs in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"GameResults(players={self.players}, games={self._size})"
+
+    def __reduce__(self):
+        return GameResults.from_arrays, (self.winner, self.scores, self.turns)
+
+    def append(self, result: GameResult) -> None:
+        if len(result.scores) != self.players:
+            raise ValueError(f"expected {self.players} scores, got {len(result.scores)}")
+        self._reserve(1)
+        self._winner[self._size] = result.winner_index
+        self._turns[self._size] = result.turns
+        self._scores[self._size] = result.scores
+        self._size += 1
+
+    def extend(self, results: Iterable[GameResult]) -> GameResults:
+        """Append `results`, copying columns directly when they are `GameResults`."""
+        if not isinstance(results, GameResults):
+            for result in results:
+                self.append(result)
+            return self
+        if results.players != self.players:
+            raise ValueError(f"expected {self.players} scores, got {results.players}")
+        size = len(results)
+        self._reserve(size)
+        self._winner[self._size : self._size + size] = results.winner
+        self._turns[self._size : self._size + size] = results.turns
+        self._scores[self._size : self._size + size] = results.scores
+        self._size += size
+        return self
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed <= len(self._winner):
+            return
+        capacity = max(needed, 2 * len(self._winner), 1_024)
+        winner, turns, scores = self.winner, self.turns, self.scores
+        self._winner = np.zeros(capacity, dtype=np.uint8)
+        self._turns = np.zeros(capacity, dtype=np.uint32)
+        self._scores = np.zeros((capacity, self.players), dtype=np.int32)
+        self._winner[: self._size] = winner
+        self._turns[: self._size] = turns
+        self._scores[: self._size] = scores
+
+    def win_counts(self) -> np.ndarray:
+        return np.bincount(self.winner, minlength=self.players)
+
+    def win_rates(self) -> np.ndarray:
+        return self.win_counts() / self._size if self._size else np.zeros(self.players)
+
+    def mean_scores(self) -> np.ndarray:
+        return self.scores.mean(axis=0) if self._size else np.zeros(self.players)
+
+    def margins(self) -> np.ndarray:
+        """Winner's score minus the runner-up's (or minus 0 for one seat)."""
+        if self.players == 1:
+            return self.scores[:, 0].astype(np.int64)
+        top = np.partition(self.scores, self.players - 2, axis=1)
+        return top[:, -1].astype(np.int64) - top[:, -2]
+
+    def margin_quantiles(self, q: float | Sequence[float]) -> np.ndarray:
+        return np.quantile(self.margins(), q, method="lower")
+
+    def turn_quantiles(self, q: float | Sequence[float]) -> np.ndarray:
+        return np.quantile(self.turns, q, method="lower")
+
+    def turn_counts(self) -> tuple[np.ndarray, np.ndarray]:
+        """Distinct turn counts and how many games took each."""
+        return np.unique(self.turns, return_counts=True)
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        write_table(path, "game-results", f"players={self.players}", {"winner": self.winner, "scores": self.scores, "turns": self.turns})
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> GameResults:
+        """Map a saved file; the columns are read-only views of it."""
+        arrays, _ = read_table(path, "game-results")
+        return cls.from_arrays(arrays["winner"], arrays["scores"], arrays["turns"])
@@ -2,28 +2,93 @@
 
 This module mirrors the scoring behavior in app.js. Keep changes here aligned
 with the web game, not with generic Farkle variants.
+
+House variants are described by a `RuleSet`: the dice count, target score
+and scoring table. `STANDARD_RULES` is the web game, and `NUM_DICE` and
+`TARGET_SCORE` are its values. Every function that depends on the rules
+takes a `rules` argument (default: the standard rules), and the compiled
+`score_index` and memo caches are keyed by the rule set, so variants can be
+compared side by side in one process.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from functools import lru_cache
-from math import factorial
+import hashlib
+from dataclasses import dataclass, field
+from math import comb, factorial
+from pathlib import Path
 from random import Random
 from typing import Iterable
 
+import numpy as np
+
+from .caching import memoize
+from .storage import TableFileError, default_cache_dir, read_table, write_table
+
 
 TARGET_SCORE = 20_000
 NUM_SIDES = 6
 NUM_DICE = 10
-
-
-@dataclass(frozen=True, order=True)
+MAX_DICE = 11
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """A Zilch variant: how many dice, the target score and what scores.
+
+    `singles` pairs a face with the points one die of it scores. `triples`
+    holds the points for three of each face, 1 to 6. `of_a_kind[i]` scores
+    `i + 4` of a kind; the default is 1,000 points per die past three, up to
+    `num_dice`. Faces in `split_fours` have no four of a kind: four of them
+    score as a triple plus a single (the web game's four 1's). A `straight`
+    (one of every face) scores its points, or nothing when `None`.
+    Three dice of a face can never be taken as three singles.
+    """
+
+    num_dice: int = NUM_DICE
+    target_score: int = TARGET_SCORE
+    singles: tuple[tuple[int, int], ...] = ((1, 100), (5, 50))
+    triples: tuple[int, ...] = (1_000, 200, 300, 400, 500, 600)
+    of_a_kind: tuple[int, ...] = ()
+    split_fours: tuple[int, ...] = (1,)
+    straight: int | None = 1_500
+
+    def __post_init__(self) -> None:
+        # 11 dice allow at most 101 options per roll; 12 allow 137, more than
+        # a `DecisionTable` code can hold.
+        if not 1 <= self.num_dice <= MAX_DICE:
+            raise ValueError(f"num_dice must be between 1 and {MAX_DICE}")
+        if len(self.triples) != NUM_SIDES:
+            raise ValueError(f"triples needs points for each of the {NUM_SIDES} faces")
+        if not self.of_a_kind:
+            object.__setattr__(self, "of_a_kind", tuple(1_000 * (n - 3) for n in range(4, self.num_dice + 1)))
+        if len(self.of_a_kind) < self.num_dice - 3:
+            raise ValueError(f"of_a_kind needs points for 4 to {self.num_dice} of a kind")
+
+    def kind_points(self, face: int, n: int) -> int | None:
+        """Points for taking `n >= 3` dice showing `face` as one set, if that scores."""
+        if n == 3:
+            return self.triples[face - 1]
+        if n == 4 and face in self.split_fours:
+            return None
+        return self.of_a_kind[n - 4] if n - 4 < len(self.of_a_kind) else None
+
+
+STANDARD_RULES = RuleSet()
+VARIANTS = {
+    "standard": STANDARD_RULES,
+    "eight-dice": RuleSet(num_dice=8, target_score=15_000),
+    "six-dice": RuleSet(num_dice=6, target_score=10_000),
+    "doubling-kinds": RuleSet(of_a_kind=tuple(1_000 * 2 ** (n - 4) for n in range(4, NUM_DICE + 1))),
+}
+
+
+@dataclass(frozen=True, order=True, slots=True)
 class ScoreOption:
     points: int
     used_dice: tuple[int, ...]
     remaining_dice: tuple[int, ...]
-    descriptions: tuple[str, ...] = ()
+    descriptions: tuple[str, ...] = field(default=(), compare=False)
 
     @property
     def free_dice(self) -> int:
@@ -62,79 +127,52 @@ def _move_key(move: ScoreOption) -> tuple[int, tuple[int, ...], tuple[int, ...],
     )
 
 
-def _uses_three_singles_as_triple(move: ScoreOption, face: int) -> bool:
-    single_description = "1 (100)" if face == 1 else "5 (50)"
-    return sum(1 for description in move.descriptions if description == single_description) >= 3
+def _uses_singles_as_triple(move: ScoreOption, rules: RuleSet) -> bool:
+    for face, points in rules.singles:
+        single_description = f"{face} ({points})"
+        if sum(1 for description in move.descriptions if description == single_description) >= 3:
+            return True
+    return False
 
 
-def _is_valid_combo(move: ScoreOption) -> bool:
-    return not _uses_three_singles_as_triple(move, 1) and not _uses_three_singles_as_triple(move, 5)
+def _is_valid_combo(move: ScoreOption, rules: RuleSet = STANDARD_RULES) -> bool:
+    return not _uses_singles_as_triple(move, rules)
 
 
-def scoring_moves(dice: tuple[int, ...]) -> tuple[ScoreOption, ...]:
+def scoring_moves(dice: tuple[int, ...], rules: RuleSet = STANDARD_RULES) -> tuple[ScoreOption, ...]:
     moves: list[ScoreOption] = []
     counts = counts_for(dice)
 
-    if all(count >= 1 for count in counts):
+    if rules.straight is not None and all(count >= 1 for count in counts):
         straight = (1, 2, 3, 4, 5, 6)
         moves.append(
             ScoreOption(
-                points=1500,
-                descriptions=("1-6 (1500)",),
+                points=rules.straight,
+                descriptions=(f"1-6 ({rules.straight})",),
                 used_dice=straight,
                 remaining_dice=remove_dice(dice, straight),
             )
         )
 
     for face, count in enumerate(counts, start=1):
-        if count < 3:
-            continue
-
-        if face == 1:
-            for n in range(3, count + 1):
-                if n == 3:
-                    points = 1000
-                elif n == 4:
-                    continue
-                else:
-                    points = 1000 + (n - 4) * 1000
-                used = tuple([face] * n)
-                moves.append(
-                    ScoreOption(
-                        points=points,
-                        descriptions=(f"{n} {face}'s ({points})",),
-                        used_dice=used,
-                        remaining_dice=remove_dice(dice, used),
-                    )
-                )
-        else:
-            if count >= 4:
-                for n in range(4, count + 1):
-                    points = 1000 + (n - 4) * 1000
-                    used = tuple([face] * n)
-                    moves.append(
-                        ScoreOption(
-                            points=points,
-                            descriptions=(f"{n} {face}'s ({points})",),
-                            used_dice=used,
-                            remaining_dice=remove_dice(dice, used),
-                        )
-                    )
-
-            points = face * 100
-            used = tuple([face] * 3)
+        # Triples of faces without a four of a kind come first, as in app.js.
+        sizes = list(range(4, count + 1)) + [3] if face not in rules.split_fours else list(range(3, count + 1))
+        for n in sizes if count >= 3 else ():
+            points = rules.kind_points(face, n)
+            if points is None:
+                continue
+            used = tuple([face] * n)
             moves.append(
                 ScoreOption(
                     points=points,
-                    descriptions=(f"3 {face}'s ({points})",),
+                    descriptions=(f"{n} {face}'s ({points})",),
                     used_dice=used,
                     remaining_dice=remove_dice(dice, used),
                 )
             )
 
-    for face in (1, 5):
+    for face, points in rules.singles:
         if counts[face - 1] > 0:
-            points = 100 if face == 1 else 50
             moves.append(
                 ScoreOption(
                     points=points,
@@ -147,33 +185,48 @@ def scoring_moves(dice: tuple[int, ...]) -> tuple[ScoreOption, ...]:
     return tuple(moves)
 
 
-@lru_cache(maxsize=None)
-def score_options(dice: tuple[int, ...]) -> tuple[ScoreOption, ...]:
-    sorted_dice = tuple(sorted(dice))
+def score_options(dice: tuple[int, ...], describe: bool = False, rules: RuleSet | None = None) -> tuple[ScoreOption, ...]:
+    """Return every legal way to score `dice`, highest points first.
+
+    Rolls of up to `rules.num_dice` dice are served from the compiled
+    `score_index(rules)` without descriptions. Pass `describe=True` to get
+    the scoring combinations spelled out, e.g. for display or tests.
+    """
+    rules = rules or STANDARD_RULES
+    if not describe:
+        index = score_index(rules)
+        outcome = index.outcome_for(counts_for(dice))
+        if outcome is not None:
+            return index.options(outcome)
+    return _described_options(tuple(sorted(dice)), rules)
+
+
+@memoize("rules.described_options", maxsize=4_096)
+def _described_options(sorted_dice: tuple[int, ...], rules: RuleSet = STANDARD_RULES) -> tuple[ScoreOption, ...]:
     combinations: list[ScoreOption] = []
 
-    for move in scoring_moves(sorted_dice):
+    for move in scoring_moves(sorted_dice, rules):
         combinations.append(move)
-        for tail in score_options(move.remaining_dice):
+        for tail in _described_options(move.remaining_dice, rules):
             combinations.append(
                 ScoreOption(
                     points=move.points + tail.points,
                     descriptions=move.descriptions + tail.descriptions,
-                    used_dice=move.used_dice + tail.used_dice,
+                    used_dice=tuple(sorted(move.used_dice + tail.used_dice)),
                     remaining_dice=tail.remaining_dice,
                 )
             )
 
     unique: dict[tuple[int, tuple[int, ...], tuple[int, ...], tuple[str, ...]], ScoreOption] = {}
     for combo in combinations:
-        if not _is_valid_combo(combo):
+        if not _is_valid_combo(combo, rules):
             continue
         unique.setdefault(_move_key(combo), combo)
 
     return tuple(sorted(unique.values(), key=lambda option: option.points, reverse=True))
 
 
-@lru_cache(maxsize=None)
+@memoize("rules.multinomial_outcomes", maxsize=64)
 def multinomial_outcomes(num_dice: int) -> tuple[tuple[tuple[int, ...], float], ...]:
     """Return unique dice-count outcomes without enumerating all ordered rolls."""
     outcomes: list[tuple[tuple[int, ...], float]] = []
@@ -192,3 +245,179 @@ def multinomial_outcomes(num_dice: int) -> tuple[tuple[tuple[int, ...], float],
 
     visit(num_dice, NUM_SIDES, ())
     return tuple(outcomes)
+
+
+def rules_fingerprint(rules: RuleSet | None = None) -> str:
+    """Hash of a rule set and this module's scoring code.
+
+    Solved tables on disk are keyed by this value, so any edit to the rules
+    invalidates them, and each variant gets tables of its own.
+    """
+    return _fingerprint(rules or STANDARD_RULES)
+
+
+@memoize("rules.fingerprint", maxsize=16)
+def _fingerprint(rules: RuleSet) -> str:
+    digest = hashlib.sha256(f"{NUM_SIDES}:{rules!r}\n".encode())
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()
+
+
+# Bump when the compiled layout changes so cached indexes are rebuilt.
+_INDEX_VERSION = 1
+
+
+class ScoreIndex:
+    """Scoring options for every count vector of up to `rules.num_dice` dice.
+
+    Outcomes are numbered by dice count, then in `multinomial_outcomes` order,
+    so the outcomes of an `n`-dice roll are `first_outcome[n]:first_outcome[n + 1]`.
+    Options of outcome `i` live at `option_start[i]:option_start[i + 1]` in the
+    option arrays and keep the order of `score_options`, so an option's
+    position there is also its position in the `score_options` tuple. The
+    numbering does not depend on the rule set: an `n`-dice roll has the same
+    outcome number in every index that covers `n` dice.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray], rules: RuleSet = STANDARD_RULES) -> None:
+        self.rules = rules
+        self.counts = arrays["counts"]
+        self.first_outcome = arrays["first_outcome"]
+        self.probabilities = arrays["probabilities"]
+        self.option_start = arrays["option_start"]
+        self.option_points = arrays["option_points"]
+        self.option_used = arrays["option_used"]
+        self.option_free_dice = arrays["option_free_dice"]
+        self.option_count = np.diff(self.option_start)
+        self.num_dice = self.counts.sum(axis=1)
+        self._index = {tuple(row): outcome for outcome, row in enumerate(self.counts.tolist())}
+        self._by_dice: dict[tuple[int, ...], int] | None = None
+        self._dice: list[tuple[int, ...] | None] = [None] * len(self.counts)
+        self._options: list[tuple[ScoreOption, ...] | None] = [None] * len(self.counts)
+        self._weights = (rules.num_dice + 1) ** np.arange(NUM_SIDES, dtype=np.int64)
+        keys = self.counts.astype(np.int64) @ self._weights
+        self._key_order = np.argsort(keys)
+        self._sorted_keys = keys[self._key_order]
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        return {
+            "counts": self.counts,
+            "first_outcome": self.first_outcome,
+            "probabilities": self.probabilities,
+            "option_start": self.option_start,
+            "option_points": self.option_points,
+            "option_used": self.option_used,
+            "option_free_dice": self.option_free_dice,
+        }
+
+    def built_options(self) -> int:
+        """Number of outcomes whose `ScoreOption` tuples have been built so far."""
+        return len(self._options) - self._options.count(None)
+
+    def outcome_for(self, counts: tuple[int, ...]) -> int | None:
+        return self._index.get(counts)
+
+    def outcome_for_dice(self, dice: tuple[int, ...]) -> int | None:
+        """Outcome of a sorted dice tuple, such as one returned by `dice`."""
+        if self._by_dice is None:
+            self._by_dice = {self.dice(outcome): outcome for outcome in range(len(self.counts))}
+        return self._by_dice.get(dice)
+
+    def outcomes_for(self, counts: np.ndarray) -> np.ndarray:
+        """Vectorized `outcome_for` over rows of count vectors, with -1 for misses."""
+        counts = np.asarray(counts, dtype=np.int64).reshape(-1, NUM_SIDES)
+        keys = counts @ self._weights
+        positions = np.searchsorted(self._sorted_keys, keys).clip(max=len(self._sorted_keys) - 1)
+        valid = (counts >= 0).all(axis=1) & (counts.sum(axis=1) <= self.rules.num_dice) & (self._sorted_keys[positions] == keys)
+        return np.where(valid, self._key_order[positions], -1)
+
+    def outcomes(self, num_dice: int) -> range:
+        return range(int(self.first_outcome[num_dice]), int(self.first_outcome[num_dice + 1]))
+
+    def dice(self, outcome: int) -> tuple[int, ...]:
+        dice = self._dice[outcome]
+        if dice is None:
+            dice = self._dice[outcome] = dice_from_counts(tuple(self.counts[outcome].tolist()))
+        return dice
+
+    def options(self, outcome: int) -> tuple[ScoreOption, ...]:
+        options = self._options[outcome]
+        if options is None:
+            roll = self.counts[outcome].tolist()
+            start, stop = self.option_start[outcome], self.option_start[outcome + 1]
+            options = self._options[outcome] = tuple(
+                ScoreOption(
+                    points=points,
+                    used_dice=dice_from_counts(tuple(used)),
+                    remaining_dice=dice_from_counts(tuple(have - spent for have, spent in zip(roll, used))),
+                )
+                for points, used in zip(self.option_points[start:stop].tolist(), self.option_used[start:stop].tolist())
+            )
+        return options
+
+
+def compile_score_index(rules: RuleSet | None = None) -> ScoreIndex:
+    """Enumerate every roll of up to `rules.num_dice` dice into a `ScoreIndex`."""
+    rules = rules or STANDARD_RULES
+    counts: list[tuple[int, ...]] = []
+    first_outcome = []
+    probabilities = []
+    option_start = [0]
+    points: list[int] = []
+    used: list[tuple[int, ...]] = []
+    free: list[int] = []
+
+    for num_dice in range(rules.num_dice + 1):
+        first_outcome.append(len(counts))
+        for roll_counts, probability in multinomial_outcomes(num_dice):
+            counts.append(roll_counts)
+            probabilities.append(probability)
+            for option in _described_options(dice_from_counts(roll_counts), rules):
+                points.append(option.points)
+                used.append(counts_for(option.used_dice))
+                free.append(option.free_dice)
+            option_start.append(len(points))
+    first_outcome.append(len(counts))
+
+    return ScoreIndex(
+        {
+            "counts": np.array(counts, dtype=np.int8),
+            "first_outcome": np.array(first_outcome, dtype=np.int64),
+            "probabilities": np.array(probabilities),
+            "option_start": np.array(option_start, dtype=np.int64),
+            "option_points": np.array(points, dtype=np.int32),
+            "option_used": np.array(used, dtype=np.int8).reshape(-1, NUM_SIDES),
+            "option_free_dice": np.array(free, dtype=np.int8),
+        },
+        rules,
+    )
+
+
+def score_index(rules: RuleSet | None = None) -> ScoreIndex:
+    """Return the process-wide `ScoreIndex` of `rules`, loading it from the table cache.
+
+    The compiled index is written to `default_cache_dir()` and keyed by
+    `rules_fingerprint(rules)`, so it is rebuilt whenever the rules change.
+    """
+    return _score_index(rules or STANDARD_RULES)
+
+
+@memoize("rules.score_index", maxsize=8)
+def _score_index(rules: RuleSet) -> ScoreIndex:
+    key = hashlib.sha256(f"score-index:{_INDEX_VERSION}:{rules_fingerprint(rules)}".encode()).hexdigest()
+    path = default_cache_dir() / f"score-index-{key[:16]}.zt"
+    try:
+        arrays, _ = read_table(path, "score-index", key)
+        return ScoreIndex(arrays, rules)
+    except (OSError, TableFileError, KeyError):
+        pass
+
+    index = compile_score_index(rules)
+    try:
+        write_table(path, "score-index", key, index.arrays())
+    except OSError:
+        pass
+    return index
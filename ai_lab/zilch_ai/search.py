@@ -0,0 +1,395 @@
+"""Monte Carlo search policy on top of the batch engine.
+
+`MCTSPolicy` settles each decision by simulation. The candidate moves become
+children of the current position, and every child is valued by playing the
+rest of the game out with a rollout policy (`EVPolicy` by default). Rollouts
+are allocated to children by UCB1 and run as vectorized batches, through
+the same `_BatchRunner` as `simulate_batch`, until a rollout count or a
+wall-clock budget is spent. Only the first move is searched; the rollout
+policy plays every later decision. The move with the best win rate for the player
+to move is returned.
+
+The search keeps its own small game state, `SearchState`, rather than
+replaying `play_game`. It can be built from a `TurnView`, advanced by a move
+and loaded into a `GameBatch` of any size.
+"""
+
+from __future__ import annotations
+
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from math import log
+from typing import Sequence
+
+import numpy as np
+
+from .batch import GameBatch, _BatchRunner
+from .ev import EVTable
+from .policies import EVPolicy, Policy, TurnView
+from .rules import NUM_DICE, TARGET_SCORE, ScoreOption
+
+
+@dataclass(frozen=True, slots=True)
+class SearchState:
+    """A game position: between turns (`in_turn=False`) or about to roll.
+
+    `winner` is set once the game is over.
+    """
+
+    scores: tuple[int, ...]
+    player_index: int
+    played_final_turn: tuple[bool, ...]
+    final_round: bool = False
+    inherited_score: int = 0
+    inherited_free_dice: int = NUM_DICE
+    in_turn: bool = False
+    locked_points: int = 0
+    loose_score: int = 0
+    free_dice: int = NUM_DICE
+    turn_number: int = 1
+    winner: int | None = None
+
+    @classmethod
+    def from_view(cls, view: TurnView, target_score: int = TARGET_SCORE, turn_number: int = 1) -> SearchState:
+        """The position of a live decision, mid-turn.
+
+        A view does not say who has had their final turn, but play goes in
+        seat order from the first player to reach `target_score`: that is
+        the one with such a score furthest back from the player to move.
+        """
+        scores = tuple(view.scores)
+        players = len(scores)
+        played = [False] * players
+        if view.final_round:
+            behind = [(view.player_index - step) % players for step in range(1, players)]
+            crossers = [step for step, seat in enumerate(behind) if scores[seat] >= target_score]
+            for seat in behind[: max(crossers, default=-1) + 1]:
+                played[seat] = True
+        return cls(
+            scores,
+            view.player_index,
+            tuple(played),
+            view.final_round,
+            view.inherited_score,
+            view.inherited_free_dice,
+            True,
+            view.locked_points,
+            view.loose_score,
+            view.free_dice,
+            turn_number,
+        )
+
+    def view(self) -> TurnView:
+        return TurnView(
+            self.player_index,
+            self.scores,
+            self.inherited_score,
+            self.inherited_free_dice,
+            self.locked_points,
+            self.loose_score,
+            self.free_dice,
+            self.final_round,
+        )
+
+    def start(self, build: bool) -> SearchState:
+        """Begin the turn, on the inherited points if `build`."""
+        if build:
+            return replace(self, in_turn=True, locked_points=0, loose_score=self.inherited_score, free_dice=self.inherited_free_dice)
+        return replace(self, in_turn=True, locked_points=0, loose_score=0, free_dice=NUM_DICE)
+
+    def take(self, option: ScoreOption) -> SearchState:
+        """Set `option`'s dice aside; locking every die rolls all of them again."""
+        loose = self.loose_score + option.points
+        if option.free_dice == 0:
+            return replace(self, locked_points=self.locked_points + loose, loose_score=0, free_dice=NUM_DICE)
+        return replace(self, loose_score=loose, free_dice=option.free_dice)
+
+    def bank(self, target_score: int = TARGET_SCORE, max_turns: int = 20_000) -> SearchState:
+        """End the turn keeping every point, as `play_game` does, and pass to the next player."""
+        earned = self.locked_points + self.loose_score
+        seat = self.player_index
+        scores = self.scores[:seat] + (self.scores[seat] + earned,) + self.scores[seat + 1 :]
+        final_round = self.final_round or scores[seat] >= target_score
+        played = list(self.played_final_turn)
+        if final_round:
+            played[seat] = True
+        state = replace(
+            self,
+            scores=scores,
+            played_final_turn=tuple(played),
+            final_round=final_round,
+            inherited_score=earned,
+            inherited_free_dice=self.free_dice,
+            in_turn=False,
+            locked_points=0,
+            loose_score=0,
+            free_dice=NUM_DICE,
+        )
+        if final_round and all(played):
+            return replace(state, winner=max(range(len(scores)), key=lambda index: scores[index]))
+        return state._next_player(max_turns)
+
+    def _next_player(self, max_turns: int) -> SearchState:
+        players = len(self.scores)
+        seat, turn_number = self.player_index, self.turn_number
+        while True:
+            seat, turn_number = (seat + 1) % players, turn_number + 1
+            if turn_number > max_turns:
+                return replace(self, winner=max(range(players), key=lambda index: self.scores[index]))
+            if not (self.final_round and self.played_final_turn[seat]):
+                return replace(self, player_index=seat, turn_number=turn_number)
+
+
+def rollout_wins(
+    states: Sequence[SearchState],
+    rollouts: Sequence[int],
+    policies: Sequence[Policy],
+    generator: np.random.Generator,
+    target_score: int = TARGET_SCORE,
+    max_turns: int = 20_000,
+) -> np.ndarray:
+    """Play `rollouts[i]` games on from each `states[i]`, all in one batch.
+
+    Returns wins per state and seat. Finished positions are credited without
+    playing.
+    """
+    players = len(policies)
+    counts = np.asarray(rollouts, dtype=np.int64)
+    wins = np.zeros((len(states), players), dtype=np.int64)
+    live = [i for i, state in enumerate(states) if state.winner is None]
+    for i, state in enumerate(states):
+        if state.winner is not None:
+            wins[i, state.winner] = counts[i]
+    if not live:
+        return wins
+
+    rows = np.repeat(np.arange(len(live)), counts[live])
+    batch = GameBatch(players, len(rows))
+    live_states = [states[i] for i in live]
+    for field in _BATCH_FIELDS:
+        getattr(batch, field)[:] = np.array([getattr(state, field) for state in live_states])[rows]
+    _BatchRunner(policies, batch, None, generator, target_score, max_turns).run()
+    winners = batch.scores.argmax(axis=1)
+    np.add.at(wins, (np.asarray(live)[rows], winners), 1)
+    return wins
+
+
+_BATCH_FIELDS = (
+    "scores",
+    "player_index",
+    "turn_number",
+    "inherited_score",
+    "inherited_free_dice",
+    "locked_points",
+    "loose_score",
+    "free_dice",
+    "final_round",
+    "played_final_turn",
+    "in_turn",
+)
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """How the last decision's rollouts were spent, child by child."""
+
+    visits: tuple[int, ...]
+    wins: tuple[int, ...]
+    choice: int
+    seconds: float
+
+    @property
+    def rollouts(self) -> int:
+        return sum(self.visits)
+
+    def win_rates(self) -> tuple[float, ...]:
+        return tuple(wins / visits if visits else 0.0 for wins, visits in zip(self.wins, self.visits))
+
+
+class MCTSPolicy(Policy):
+    """Decide builds, options and banks by UCB1-allocated batched rollouts.
+
+    Each decision gets `rollouts` simulated games or `time_budget` seconds,
+    whichever runs out first (one of them must be set); every child gets at
+    least one rollout, however small the budget. Children get `batch_size`
+    rollouts per wave: all of them first, then the better half by UCB1 with
+    `exploration`. Waves are played in smaller steps sized to what is left
+    of the budget, so a decision does not overrun it by more than one step.
+    With `workers`, each step is split across a process pool that is started
+    on first use and kept until `close()` (or the end of a `with` block, or
+    garbage collection); each worker unpickles the rollout policy once.
+    Moves that cannot differ (one option, or options with the same points
+    and dice left) are not searched.
+    """
+
+    name = "mcts"
+
+    def __init__(
+        self,
+        rollout_policy: Policy | None = None,
+        rollouts: int | None = 4_096,
+        time_budget: float | None = None,
+        batch_size: int = 512,
+        exploration: float = 0.5,
+        workers: int | None = None,
+        seed: int = 20260617,
+        table: EVTable | None = None,
+        target_score: int = TARGET_SCORE,
+    ) -> None:
+        if rollouts is None and time_budget is None:
+            raise ValueError("set rollouts, time_budget or both")
+        self.rollout_policy = rollout_policy or EVPolicy(table, target_score)
+        self.rollouts = rollouts
+        self.time_budget = time_budget
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.workers = workers
+        self.target_score = target_score
+        self._seeds = np.random.SeedSequence(seed)
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_finalizer: weakref.finalize | None = None
+        self.last_result: SearchResult | None = None
+
+    def __getstate__(self) -> dict[str, object]:
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_pool_finalizer"] = None
+        return state
+
+    def __enter__(self) -> MCTSPolicy:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut the rollout pool down, if one was started."""
+        if self._pool_finalizer is not None:
+            self._pool_finalizer()
+        self._pool = None
+        self._pool_finalizer = None
+
+    def choose_build(self, view: TurnView) -> bool:
+        if view.inherited_score <= 0:
+            return False
+        state = replace(SearchState.from_view(view, self.target_score), in_turn=False)
+        return bool(self._search(view, [state.start(False), state.start(True)]))
+
+    def choose_option(self, dice: tuple[int, ...], options: tuple[ScoreOption, ...], view: TurnView) -> ScoreOption:
+        distinct: dict[tuple[int, int], int] = {}
+        for position, option in enumerate(options):
+            distinct.setdefault((option.points, option.free_dice), position)
+        if len(distinct) <= 1:
+            return options[0]
+        positions = list(distinct.values())
+        state = SearchState.from_view(view, self.target_score)
+        children = [self._after_scoring(state.take(options[position])) for position in positions]
+        return options[positions[self._search(view, children)]]
+
+    def should_bank(self, view: TurnView) -> bool:
+        if view.free_dice <= 0:
+            return False
+        state = SearchState.from_view(view, self.target_score)
+        return self._search(view, [state, state.bank(self.target_score)]) == 1
+
+    def _after_scoring(self, state: SearchState) -> SearchState:
+        """Resolve the bank-or-roll choice after an option as the rollout policy would."""
+        if state.loose_score > 0 and self.rollout_policy.should_bank(state.view()):
+            return state.bank(self.target_score)
+        return state
+
+    def _search(self, view: TurnView, children: list[SearchState]) -> int:
+        """Index of the child with the best win rate for the player to move.
+
+        The first wave plays a batch from every child; each later wave plays
+        a batch from the better half by UCB1. A wave is played in steps that
+        fit the remaining rollouts and, judged by the last step's speed, the
+        remaining time. All children of a step share one `GameBatch` per worker.
+        """
+        started = time.perf_counter()
+        seat = view.player_index
+        players = len(view.scores)
+        visits = np.zeros(len(children), dtype=np.int64)
+        wins = np.zeros(len(children), dtype=np.int64)
+        shards = self.workers if self.workers and self.workers > 1 else 1
+        if shards > 1 and self._pool is None:
+            self._pool = ProcessPoolExecutor(shards, initializer=_init_worker, initargs=(self.rollout_policy, self.target_score))
+            self._pool_finalizer = weakref.finalize(self, self._pool.shutdown)
+
+        chosen = list(range(len(children)))
+        seconds_per_rollout: float | None = None
+        while True:
+            played = 0
+            while played < self.batch_size:
+                step = self._step(self.batch_size - played, len(chosen), visits, started, seconds_per_rollout)
+                if step <= 0:
+                    break
+                step_started = time.perf_counter()
+                wins[chosen] += self._play(players, [children[child] for child in chosen], step, shards)[:, seat]
+                visits[chosen] += step
+                played += step
+                seconds_per_rollout = (time.perf_counter() - step_started) / (step * len(chosen))
+            if played < self.batch_size:
+                break
+            chosen = self._select(visits, wins)
+
+        choice = int(np.argmax(wins / visits))
+        self.last_result = SearchResult(tuple(visits.tolist()), tuple(wins.tolist()), choice, time.perf_counter() - started)
+        return choice
+
+    def _step(
+        self, wanted: int, children: int, visits: np.ndarray, started: float, seconds_per_rollout: float | None
+    ) -> int:
+        """Rollouts per chosen child for the next step: `wanted`, cut to the budget."""
+        step = wanted
+        if self.rollouts is not None:
+            step = min(step, (self.rollouts - int(visits.sum())) // children)
+        if self.time_budget is not None:
+            left = self.time_budget - (time.perf_counter() - started)
+            if seconds_per_rollout is None:
+                step = min(step, _FIRST_STEP)
+            else:
+                step = min(step, int(left / (seconds_per_rollout * children)))
+            if left <= 0:
+                step = 0
+        # Every child needs a rollout before win rates can be compared.
+        return max(step, 1) if not visits.all() else step
+
+    def _play(self, players: int, states: list[SearchState], step: int, shards: int) -> np.ndarray:
+        """Wins by state and seat from `step` rollouts of each state."""
+        seeds = self._seeds.spawn(shards)
+        # Each shard plays an even share of every state's rollouts.
+        shares = [[len(range(shard, step, shards))] * len(states) for shard in range(shards)]
+        if self._pool is None:
+            return _rollouts(self.rollout_policy, self.target_score, players, states, shares[0], seeds[0])
+        return np.sum(list(self._pool.map(_play_shard, [players] * shards, [states] * shards, shares, seeds)), axis=0)
+
+    def _select(self, visits: np.ndarray, wins: np.ndarray) -> list[int]:
+        """The better half of the children by UCB1 score."""
+        scores = wins / visits + self.exploration * np.sqrt(log(visits.sum()) / visits)
+        return sorted(np.argsort(-scores, kind="stable")[: -(-len(visits) // 2)].tolist())
+
+
+# Rollouts per child in the first step of a timed search, before its speed is known.
+_FIRST_STEP = 1
+
+
+def _rollouts(
+    policy: Policy, target_score: int, players: int, states: list[SearchState], rollouts: list[int], seed: np.random.SeedSequence
+) -> np.ndarray:
+    return rollout_wins(states, rollouts, [policy] * players, np.random.default_rng(seed), target_score)
+
+
+_worker_policy: tuple[Policy, int] | None = None
+
+
+def _init_worker(policy: Policy, target_score: int) -> None:
+    global _worker_policy
+    _worker_policy = policy, target_score
+
+
+def _play_shard(players: int, states: list[SearchState], rollouts: list[int], seed: np.random.SeedSequence) -> np.ndarray:
+    assert _worker_policy is not None
+    return _rollouts(*_worker_policy, players, states, rollouts, seed)
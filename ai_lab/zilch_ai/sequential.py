@@ -0,0 +1,166 @@
+"""Sequential stopping rules for policy comparisons.
+
+A lineup is played in batches and checked after each one, so obvious
+mismatches stop after a few hundred games while close ones keep going.
+
+Seats are rotated: game `k` seats the lineup shifted by `k mod n`, each
+rotation on its own independent seed stream, and every look falls on a
+whole number of rotations. The statistic is the win rate `p` of the first
+policy averaged over seats, so first-move advantage cancels out. Its wins
+are a sum of independent Bernoulli trials with differing per-seat rates,
+whose variance is at most the binomial one with the same mean, so the
+binomial tests below stay valid (if slightly conservative).
+
+Two rules are available:
+
+- Wald's SPRT on `p`. With `n` players, equal strength means `p0 = 1 / n`. Two one-sided tests run side by side, against
+  `p0 + delta` and `p0 - delta`, each at `alpha / 2`. The first to cross its
+  upper bound decides "better" or "worse". If both cross their lower bound,
+  the difference is smaller than `delta` ("equivalent").
+- Precision: stop once a Wilson interval for `p` is narrower than
+  `2 * precision`. Look `k` uses level `alpha / (k * (k + 1))`, which sums
+  to `alpha` over all looks, so the final interval keeps its coverage
+  however many times it was checked.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import islice
+from math import log
+from typing import Generator, Iterable, Sequence
+
+from .batch import iter_batch
+from .policies import Policy
+from .results import GameResult
+from .sim import _iter_rounds
+from .stats import GameStats, wilson_interval
+
+
+@dataclass(frozen=True)
+class SequentialResult:
+    decision: str
+    games: int
+    stats: GameStats
+    interval: tuple[float, float]
+    log_likelihood_ratios: tuple[float, float] = (0.0, 0.0)
+
+
+def sprt_bounds(alpha: float, beta: float) -> tuple[float, float]:
+    """Wald's (accept null, reject null) log-likelihood-ratio bounds."""
+    return log(beta / (1 - alpha)), log((1 - beta) / alpha)
+
+
+def bernoulli_llr(wins: int, losses: int, p0: float, p1: float) -> float:
+    return wins * log(p1 / p0) + losses * log((1 - p1) / (1 - p0))
+
+
+def sequential_match(
+    policies: Sequence[Policy],
+    delta: float = 0.05,
+    alpha: float = 0.05,
+    beta: float = 0.05,
+    precision: float | None = None,
+    batch_size: int = 200,
+    max_games: int = 100_000,
+    seed: int = 20260617,
+    engine: str = "python",
+    workers: int | None = None,
+) -> SequentialResult:
+    """Play `policies` until the first policy's seat-averaged win rate is settled.
+
+    Uses the SPRT unless `precision` is given. `stats` counts wins by
+    policy, not by seat. `batch_size` and `max_games` are rounded down to
+    whole rotations of the lineup. Returns "undecided" if `max_games` runs
+    out first.
+    """
+    players = len(policies)
+    p0 = 1 / players
+    if not 0 < p0 - delta < p0 + delta < 1:
+        raise ValueError("delta must keep both alternatives inside (0, 1)")
+    lower, upper = sprt_bounds(alpha / 2, beta)
+    batch_size = max(players, batch_size - batch_size % players)
+    max_games -= max_games % players
+
+    stats = GameStats(players)
+    results = _rotated_results(policies, max_games, seed, engine, workers, batch_size)
+    looks = 0
+    llrs = (0.0, 0.0)
+    try:
+        while stats.games < max_games:
+            batch = list(islice(results, min(batch_size, max_games - stats.games)))
+            if not batch:
+                break
+            stats.extend(batch)
+            looks += 1
+            wins = stats.wins[0]
+            losses = stats.games - wins
+
+            if precision is not None:
+                interval = wilson_interval(wins, stats.games, 1 - alpha / (looks * (looks + 1)))
+                if interval[1] - interval[0] <= 2 * precision:
+                    return SequentialResult(_side(interval, p0), stats.games, stats, interval)
+                continue
+
+            llrs = (bernoulli_llr(wins, losses, p0, p0 + delta), bernoulli_llr(wins, losses, p0, p0 - delta))
+            if llrs[0] >= upper:
+                decision = "better"
+            elif llrs[1] >= upper:
+                decision = "worse"
+            elif llrs[0] <= lower and llrs[1] <= lower:
+                decision = "equivalent"
+            else:
+                continue
+            return SequentialResult(decision, stats.games, stats, wilson_interval(wins, stats.games), llrs)
+    finally:
+        results.close()
+
+    interval = wilson_interval(stats.wins[0], stats.games, 1 - alpha / max(1, looks * (looks + 1)))
+    return SequentialResult("undecided", stats.games, stats, interval, llrs)
+
+
+def _side(interval: tuple[float, float], p0: float) -> str:
+    if interval[0] > p0:
+        return "better"
+    if interval[1] < p0:
+        return "worse"
+    return "equivalent"
+
+
+def _rotated_results(
+    policies: Sequence[Policy], games: int, seed: int, engine: str, workers: int | None, batch_size: int
+) -> Generator[GameResult, None, None]:
+    """Yield results by policy, cycling through every rotation of the seats.
+
+    With `workers`, the rotations share one process pool whose shards are
+    sized from `batch_size`, so an early stop leaves little queued work, and
+    closing the generator cancels it.
+    """
+    players = len(policies)
+    per_rotation = -(-games // players)
+    lineups = [list(policies[shift:]) + list(policies[:shift]) for shift in range(players)]
+    seeds = [seed + shift for shift in range(players)]
+    rounds: Generator[tuple[Iterable[GameResult], ...], None, None]
+    if engine == "batch":
+        streams = [iter_batch(lineup, per_rotation, lineup_seed) for lineup, lineup_seed in zip(lineups, seeds)]
+        rounds = (tuple((result,) for result in row) for row in zip(*streams))
+    else:
+        streams = []
+        shard_size = max(1, -(-batch_size // (players * workers))) if workers else None
+        rounds = _iter_rounds(lineups, seeds, per_rotation, workers, shard_size=shard_size)
+    try:
+        for shards in rounds:
+            for row in zip(*shards):
+                for shift, result in enumerate(row):
+                    yield _unrotate(result, shift)
+    finally:
+        rounds.close()
+        for stream in streams:
+            stream.close()
+
+
+def _unrotate(result: GameResult, shift: int) -> GameResult:
+    """Re-index a result of the lineup shifted by `shift` by original policy."""
+    players = len(result.scores)
+    scores = tuple(result.scores[(policy - shift) % players] for policy in range(players))
+    return GameResult((result.winner_index + shift) % players, scores, result.turns)
@@ -2,19 +2,19 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from random import Random
-from typing import Sequence
+from typing import TYPE_CHECKING, Iterable, Iterator, Sequence
 
-from .policies import Policy, TurnView
-from .rules import NUM_DICE, TARGET_SCORE, roll_dice, score_options
+from .dice import CommonDice, sample_outcome
+from .instrument import Probe
+from .policies import Policy, ScoresView, TurnView, check_rules
+from .results import GameResult, GameResults
+from .rules import STANDARD_RULES, RuleSet, score_index
 
-
-@dataclass(frozen=True)
-class GameResult:
-    winner_index: int
-    scores: tuple[int, ...]
-    turns: int
+if TYPE_CHECKING:
+    from .traces import TraceWriter
 
 
 def play_turn(
@@ -24,64 +24,88 @@ def play_turn(
     inherited_score: int,
     inherited_free_dice: int,
     final_round: bool,
-    rng: Random,
+    rng: Random | CommonDice,
+    view: TurnView | None = None,
+    probe: Probe | None = None,
+    trace: TraceWriter | None = None,
+    rules: RuleSet | None = None,
 ) -> tuple[int, int, int, bool]:
-    view = TurnView(
-        player_index=player_index,
-        scores=tuple(scores),
-        inherited_score=inherited_score,
-        inherited_free_dice=inherited_free_dice,
-        locked_points=0,
-        loose_score=0,
-        free_dice=NUM_DICE,
-        final_round=final_round,
-    )
+    """Play one turn and return `(earned, inherited, free_dice, zilched)`.
+
+    `rng` is either a `Random`, consumed one draw per roll, or a `CommonDice`
+    stream already positioned at this turn.
+
+    Pass a `view` to have it updated in place instead of allocating a new one;
+    `play_game` reuses one view, backed by a `ScoresView`, for a whole game.
+    A `probe` counts the turn's rolls, zilches, locks, builds and banks, and a
+    `trace` records every roll and decision. `rules` sets the scoring and the
+    number of dice; a `CommonDice` stream must have been made for the same rules.
+    """
+    index = score_index(rules)
+    num_dice = index.rules.num_dice
+    if view is None:
+        view = TurnView(player_index, ScoresView(scores), inherited_score, inherited_free_dice, 0, 0, num_dice)
+    view.player_index = player_index
+    view.inherited_score = inherited_score
+    view.inherited_free_dice = inherited_free_dice
+    view.locked_points = 0
+    view.loose_score = 0
+    view.free_dice = num_dice
+    view.final_round = final_round
+
     if inherited_score > 0 and policy.choose_build(view):
         loose_score = inherited_score
         free_dice = inherited_free_dice
+        if probe is not None:
+            probe.counts["builds"] += 1
     else:
         loose_score = 0
-        free_dice = NUM_DICE
+        free_dice = num_dice
+    if probe is not None:
+        probe.counts["turns"] += 1
+    if trace is not None:
+        trace.start_turn(loose_score > 0)
 
     locked_points = 0
+    common = isinstance(rng, CommonDice)
 
     while True:
-        dice = roll_dice(free_dice, rng)
-        options = score_options(dice)
+        outcome = rng.roll(free_dice) if common else sample_outcome(free_dice, rng)
+        options = index.options(outcome)
+        if probe is not None:
+            probe.counts["rolls"] += 1
+            probe.counts["zilches"] += not options
         if not options:
-            return locked_points, 0, NUM_DICE, True
-
-        view = TurnView(
-            player_index=player_index,
-            scores=tuple(scores),
-            inherited_score=inherited_score,
-            inherited_free_dice=inherited_free_dice,
-            locked_points=locked_points,
-            loose_score=loose_score,
-            free_dice=free_dice,
-            final_round=final_round,
-        )
-        selected = policy.choose_option(dice, options, view)
+            if trace is not None:
+                trace.roll(outcome, -1)
+            return locked_points, 0, num_dice, True
+
+        view.locked_points = locked_points
+        view.loose_score = loose_score
+        view.free_dice = free_dice
+        selected = policy.choose_option(index.dice(outcome), options, view)
         loose_score += selected.points
         free_dice = selected.free_dice
 
         if free_dice == 0:
+            if trace is not None:
+                trace.roll(outcome, options.index(selected))
+            if probe is not None:
+                probe.counts["locks"] += 1
             locked_points += loose_score
             loose_score = 0
-            free_dice = NUM_DICE
+            free_dice = num_dice
             continue
 
-        view = TurnView(
-            player_index=player_index,
-            scores=tuple(scores),
-            inherited_score=inherited_score,
-            inherited_free_dice=inherited_free_dice,
-            locked_points=locked_points,
-            loose_score=loose_score,
-            free_dice=free_dice,
-            final_round=final_round,
-        )
-        if policy.should_bank(view):
+        view.locked_points = locked_points
+        view.loose_score = loose_score
+        view.free_dice = free_dice
+        banks = policy.should_bank(view)
+        if trace is not None:
+            trace.roll(outcome, options.index(selected), banks)
+        if banks:
+            if probe is not None:
+                probe.counts["banks"] += 1
             earned = locked_points + loose_score
             return earned, earned, free_dice, False
 
@@ -89,22 +113,56 @@ def play_turn(
 def play_game(
     policies: Sequence[Policy],
     seed: int | None = None,
-    target_score: int = TARGET_SCORE,
+    target_score: int | None = None,
     max_turns: int = 20_000,
+    common_dice: bool = False,
+    probe: Probe | None = None,
+    trace: TraceWriter | None = None,
+    rules: RuleSet | None = None,
 ) -> GameResult:
-    rng = Random(seed)
+    """Play one game from `seed`.
+
+    With `common_dice`, rolls come from a `CommonDice` stream keyed by the seed,
+    the turn number and the roll within the turn, so replaying a seed with
+    other policies (or with seats swapped) reuses the same dice. A `probe`
+    records turn events and times every policy decision. A `trace` appends
+    the game's rolls and decisions to a trace file (see `traces`); traces
+    only cover the standard rules. `rules` picks the `RuleSet`, whose
+    `target_score` is used unless `target_score` is given, and every
+    `EVPolicy` must have been solved for it.
+    """
+    rules = STANDARD_RULES if rules is None else rules
+    check_rules(policies, rules)
+    if probe is not None and probe.rules != rules:
+        raise ValueError("the probe measures another rule set's score index than the game's")
+    if target_score is None:
+        target_score = rules.target_score
+    if trace is not None and rules != STANDARD_RULES:
+        raise ValueError("traces record games under the standard rules only")
+    num_dice = rules.num_dice
+    if probe is not None:
+        probe.counts["games"] += 1
+        policies = probe.wrap(policies)
+    rng: Random | CommonDice = Random(seed)
+    if common_dice:
+        rng = CommonDice(rng.getrandbits(64) if seed is None else seed, rules)
     scores = [0 for _ in policies]
     inherited_score = 0
-    inherited_free_dice = NUM_DICE
+    inherited_free_dice = num_dice
     final_round = False
     played_final_turn = [False for _ in policies]
     current_index = 0
+    view = TurnView(0, ScoresView(scores), 0, num_dice, 0, 0, num_dice)
+    if trace is not None:
+        trace.start_game(seed, len(policies), target_score)
 
     for turn_number in range(1, max_turns + 1):
         if final_round and played_final_turn[current_index]:
             current_index = (current_index + 1) % len(policies)
             continue
 
+        if common_dice:
+            rng.start_turn(turn_number)
         earned, next_inherited, next_free_dice, zilched = play_turn(
             policies[current_index],
             current_index,
@@ -113,12 +171,16 @@ def play_game(
             inherited_free_dice,
             final_round,
             rng,
+            view,
+            probe,
+            trace,
+            rules,
         )
         scores[current_index] += earned
 
         if zilched:
             inherited_score = 0
-            inherited_free_dice = NUM_DICE
+            inherited_free_dice = num_dice
         else:
             inherited_score = next_inherited
             inherited_free_dice = next_free_dice
@@ -129,15 +191,156 @@ def play_game(
         if final_round:
             played_final_turn[current_index] = True
             if all(played_final_turn):
-                winner_index = max(range(len(scores)), key=lambda index: scores[index])
-                return GameResult(winner_index, tuple(scores), turn_number)
+                break
 
         current_index = (current_index + 1) % len(policies)
+    else:
+        turn_number = max_turns
 
     winner_index = max(range(len(scores)), key=lambda index: scores[index])
-    return GameResult(winner_index, tuple(scores), max_turns)
+    result = GameResult(winner_index, tuple(scores), turn_number)
+    if trace is not None:
+        trace.end_game(result)
+    return result
+
+
+def simulate_games(
+    policies: Sequence[Policy],
+    games: int,
+    seed: int = 20260617,
+    workers: int | None = None,
+    common_dice: bool = False,
+    probe: Probe | None = None,
+    rules: RuleSet | None = None,
+) -> GameResults:
+    """Play `games` games and return their results, in seed order, as columns.
+
+    See `iter_games` for seeding and the `workers` option.
+    """
+    results = GameResults(len(policies), games)
+    for shard in _iter_shards(policies, games, seed, workers, common_dice, probe, rules):
+        results.extend(shard)
+    return results
+
+
+def iter_games(
+    policies: Sequence[Policy],
+    games: int,
+    seed: int = 20260617,
+    workers: int | None = None,
+    common_dice: bool = False,
+    probe: Probe | None = None,
+    rules: RuleSet | None = None,
+) -> Iterator[GameResult]:
+    """Yield game results as they finish, seeding each game from `Random(seed)`.
+
+    Per-game seeds are drawn lazily, so memory stays flat however many games
+    are requested. With `workers` above one, the seeds are split into
+    contiguous shards and played on a process pool. Each worker unpickles the
+    lineup once, so a shared `EVTable` is loaded once per worker rather than
+    per shard. Shards are yielded in seed order, so the results do not depend
+    on the number of workers as long as the policies carry no random state of
+    their own (each worker gets its own copy of a `RandomPolicy` generator).
+    `common_dice` and `rules` are passed through to `play_game`. With a `probe`, each worker
+    records its shards into a probe of its own, and those are merged into
+    `probe` as the shards come back. Closing the iterator early cancels the
+    shards that have not started.
+    """
+    for shard in _iter_shards(policies, games, seed, workers, common_dice, probe, rules):
+        yield from shard
+
+
+def _iter_shards(
+    policies: Sequence[Policy],
+    games: int,
+    seed: int,
+    workers: int | None,
+    common_dice: bool,
+    probe: Probe | None,
+    rules: RuleSet | None = None,
+) -> Iterator[Iterable[GameResult]]:
+    for shards in _iter_rounds([policies], [seed], games, workers, common_dice, probe, rules):
+        yield shards[0]
+
+
+def _iter_rounds(
+    lineups: Sequence[Sequence[Policy]],
+    seeds: Sequence[int],
+    games: int,
+    workers: int | None,
+    common_dice: bool = False,
+    probe: Probe | None = None,
+    rules: RuleSet | None = None,
+    shard_size: int | None = None,
+) -> Iterator[tuple[Iterable[GameResult], ...]]:
+    """Play `games` games of each lineup, yielding one equal-sized shard per lineup at a time.
+
+    Lineup `i` draws its game seeds from `Random(seeds[i])`. With `workers`,
+    all lineups share one process pool; `shard_size` defaults to a fraction
+    of `games` per worker. Closing the generator cancels the shards that
+    have not started.
+    """
+    rngs = [Random(seed) for seed in seeds]
+    if not workers or workers <= 1 or games <= 1:
+        for _ in range(games):
+            yield tuple(
+                (play_game(lineup, seed=rng.randrange(2**32), common_dice=common_dice, probe=probe, rules=rules),)
+                for lineup, rng in zip(lineups, rngs)
+            )
+        return
+
+    if shard_size is None:
+        shard_size = min(_MAX_SHARD, max(1, -(-games // (workers * _SHARDS_PER_WORKER))))
+    lineups = tuple(tuple(lineup) for lineup in lineups)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(lineups,))
+    try:
+        pending: deque[list[Future[tuple[GameResults, Probe | None]]]] = deque()
+        remaining = games
+        while remaining or pending:
+            while remaining and (not pending or len(pending) * len(lineups) < workers * _SHARDS_IN_FLIGHT):
+                size = min(shard_size, remaining)
+                pending.append(
+                    [
+                        pool.submit(
+                            _play_shard,
+                            [rng.randrange(2**32) for _ in range(size)],
+                            common_dice,
+                            probe is not None,
+                            rules,
+                            lineup,
+                        )
+                        for lineup, rng in enumerate(rngs)
+                    ]
+                )
+                remaining -= size
+            shards = []
+            for future in pending.popleft():
+                results, shard_probe = future.result()
+                if probe is not None and shard_probe is not None:
+                    probe.merge(shard_probe)
+                shards.append(results)
+            yield tuple(shards)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+_SHARDS_PER_WORKER = 4
+_SHARDS_IN_FLIGHT = 2
+_MAX_SHARD = 10_000
+_worker_lineups: tuple[tuple[Policy, ...], ...] = ()
+
+
+def _init_worker(lineups: tuple[tuple[Policy, ...], ...]) -> None:
+    global _worker_lineups
+    _worker_lineups = lineups
 
 
-def simulate_games(policies: Sequence[Policy], games: int, seed: int = 20260617) -> list[GameResult]:
-    rng = Random(seed)
-    return [play_game(policies, seed=rng.randrange(2**32)) for _ in range(games)]
+def _play_shard(
+    seeds: list[int], common_dice: bool = False, instrument: bool = False, rules: RuleSet | None = None, lineup: int = 0
+) -> tuple[GameResults, Probe | None]:
+    policies = _worker_lineups[lineup]
+    probe = Probe(rules=STANDARD_RULES if rules is None else rules) if instrument else None
+    results = GameResults(len(policies), len(seeds))
+    for game_seed in seeds:
+        results.append(play_game(policies, seed=game_seed, common_dice=common_dice, probe=probe, rules=rules))
+    return results, probe.settle() if probe is not None else None
@@ -0,0 +1,130 @@
+"""Constant-memory, mergeable statistics over streams of game results."""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from math import sqrt
+from statistics import NormalDist
+from typing import Iterable
+
+import numpy as np
+
+from .results import GameResult, GameResults
+
+
+MARGIN_BUCKET = 500
+
+
+def wilson_interval(successes: int, trials: int, confidence: float = 0.95) -> tuple[float, float]:
+    """Wilson score interval for a binomial proportion."""
+    if trials <= 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    half_width = z * sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+@dataclass
+class GameStats:
+    """Online summary of games played by one lineup.
+
+    Everything is kept as integer counts, so memory does not grow with the
+    number of games and `merge` combines shards exactly, in any order.
+    Margins (winner minus runner-up) are bucketed by `MARGIN_BUCKET` points.
+    Seats are positions in the turn order, so `wins` doubles as the seat-order
+    effect when the same policy sits in every seat.
+    """
+
+    players: int
+    games: int = 0
+    wins: list[int] = field(default_factory=list)
+    score_totals: list[int] = field(default_factory=list)
+    turn_counts: Counter[int] = field(default_factory=Counter)
+    margin_counts: Counter[int] = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        self.wins = self.wins or [0] * self.players
+        self.score_totals = self.score_totals or [0] * self.players
+
+    def add(self, result: GameResult) -> None:
+        if len(result.scores) != self.players:
+            raise ValueError(f"expected {self.players} scores, got {len(result.scores)}")
+        self.games += 1
+        self.wins[result.winner_index] += 1
+        for seat, score in enumerate(result.scores):
+            self.score_totals[seat] += score
+        self.turn_counts[result.turns] += 1
+        runner_up = max((score for seat, score in enumerate(result.scores) if seat != result.winner_index), default=0)
+        self.margin_counts[(result.scores[result.winner_index] - runner_up) // MARGIN_BUCKET] += 1
+
+    def extend(self, results: Iterable[GameResult]) -> GameStats:
+        if isinstance(results, GameResults):
+            return self.merge(GameStats.from_results(results))
+        for result in results:
+            self.add(result)
+        return self
+
+    @classmethod
+    def from_results(cls, results: GameResults) -> GameStats:
+        """Summarize columnar results with array operations instead of per-game adds."""
+        stats = cls(results.players, len(results), results.win_counts().tolist(), results.scores.sum(axis=0, dtype=np.int64).tolist())
+        turns, counts = results.turn_counts()
+        stats.turn_counts.update(dict(zip(turns.tolist(), counts.tolist())))
+        buckets, counts = np.unique(results.margins() // MARGIN_BUCKET, return_counts=True)
+        stats.margin_counts.update(dict(zip(buckets.tolist(), counts.tolist())))
+        return stats
+
+    def merge(self, other: GameStats) -> GameStats:
+        """Fold `other` into this summary and return it."""
+        if other.players != self.players:
+            raise ValueError("cannot merge stats for different player counts")
+        self.games += other.games
+        self.wins = [mine + theirs for mine, theirs in zip(self.wins, other.wins)]
+        self.score_totals = [mine + theirs for mine, theirs in zip(self.score_totals, other.score_totals)]
+        self.turn_counts.update(other.turn_counts)
+        self.margin_counts.update(other.margin_counts)
+        return self
+
+    def __add__(self, other: GameStats) -> GameStats:
+        return GameStats(self.players).merge(self).merge(other)
+
+    def win_rate(self, seat: int) -> float:
+        return self.wins[seat] / self.games if self.games else 0.0
+
+    def win_interval(self, seat: int, confidence: float = 0.95) -> tuple[float, float]:
+        return wilson_interval(self.wins[seat], self.games, confidence)
+
+    def mean_score(self, seat: int) -> float:
+        return self.score_totals[seat] / self.games if self.games else 0.0
+
+    def mean_turns(self) -> float:
+        return sum(turns * count for turns, count in self.turn_counts.items()) / self.games if self.games else 0.0
+
+    def turn_quantile(self, q: float) -> int:
+        return _quantile(self.turn_counts, q, self.games)
+
+    def margin_quantile(self, q: float) -> int:
+        """Lower edge, in points, of the margin bucket holding quantile `q`."""
+        return _quantile(self.margin_counts, q, self.games) * MARGIN_BUCKET
+
+    def margin_histogram(self) -> dict[int, int]:
+        return {bucket * MARGIN_BUCKET: count for bucket, count in sorted(self.margin_counts.items())}
+
+    def turn_histogram(self) -> dict[int, int]:
+        return dict(sorted(self.turn_counts.items()))
+
+
+def _quantile(counts: Counter[int], q: float, total: int) -> int:
+    if total <= 0:
+        raise ValueError("no games recorded")
+    rank = q * (total - 1)
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen > rank:
+            return value
+    return max(counts)
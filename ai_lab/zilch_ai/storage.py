@@ -0,0 +1,145 @@
+"""Versioned binary files for solved tables, loaded through `mmap`.
+
+A table file is a small JSON header followed by raw NumPy arrays:
+
+    magic (8 bytes) | format version (u32) | header size (u32) | header | arrays
+
+The header names the file kind, the cache key it was built for and the dtype,
+shape and offset of every array. Arrays start on 64-byte boundaries so they can
+be viewed in place: `read_table` maps the file read-only, which lets every
+process that loads the same table share one copy in the page cache.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+
+
+MAGIC = b"ZILCHTAB"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+class TableFileError(ValueError):
+    """Raised when a table file is missing pieces or was built for another key."""
+
+
+def default_cache_dir() -> Path:
+    """Return the table cache directory, honoring `ZILCH_AI_CACHE`."""
+    configured = os.environ.get("ZILCH_AI_CACHE")
+    if configured:
+        return Path(configured)
+    return Path.home() / ".cache" / "zilch_ai"
+
+
+def write_table(
+    path: str | os.PathLike[str],
+    kind: str,
+    key: str,
+    arrays: Mapping[str, np.ndarray],
+    meta: Mapping[str, Any] | None = None,
+) -> None:
+    """Write `arrays` to `path` atomically, replacing any existing file."""
+    entries = []
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        entries.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+        offset += array.nbytes
+
+    header = json.dumps({"kind": kind, "key": key, "meta": dict(meta or {}), "arrays": entries}).encode()
+    data_start = _aligned(_PREAMBLE.size + len(header))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(handle, "wb") as out:
+            out.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            out.write(header)
+            for entry, array in zip(entries, arrays.values()):
+                out.seek(data_start + entry["offset"])
+                out.write(np.ascontiguousarray(array).tobytes())
+            out.truncate(data_start + offset)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def read_table(path: str | os.PathLike[str], kind: str, key: str | None = None) -> tuple[dict[str, np.ndarray], dict[str, Any]]:
+    """Map a table file and return read-only array views plus its metadata.
+
+    Raises `TableFileError` if the file is not a table of `kind`, or was built
+    for a different `key`.
+    """
+    with open(path, "rb") as source:
+        if os.fstat(source.fileno()).st_size < _PREAMBLE.size:
+            raise TableFileError(f"{path} is truncated")
+        mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, header_size = _PREAMBLE.unpack_from(mapped)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise TableFileError(f"{path} is not a version {FORMAT_VERSION} table file")
+    header = _parse_header(mapped[_PREAMBLE.size : _PREAMBLE.size + header_size], path)
+    if header["kind"] != kind:
+        raise TableFileError(f"{path} holds a {header['kind']!r} table, not {kind!r}")
+    if key is not None and header["key"] != key:
+        raise TableFileError(f"{path} was built for a different rule set or settings")
+
+    data_start = _aligned(_PREAMBLE.size + header_size)
+    arrays = {}
+    for entry in header["arrays"]:
+        try:
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            start = data_start + int(entry["offset"])
+        except (KeyError, TypeError, ValueError) as error:
+            raise TableFileError(f"{path} has a malformed array entry") from error
+        if count < 0 or start < data_start or start + count * dtype.itemsize > len(mapped):
+            raise TableFileError(f"{path} is truncated")
+        arrays[entry["name"]] = np.frombuffer(mapped, dtype=dtype, count=count, offset=start).reshape(entry["shape"])
+    return arrays, header["meta"]
+
+
+def read_header(path: str | os.PathLike[str]) -> dict[str, Any]:
+    """Return the JSON header of a table file: its kind, key, meta and array layout.
+
+    Raises `TableFileError` if the file is not a table file or its header is damaged.
+    """
+    with open(path, "rb") as source:
+        preamble = source.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise TableFileError(f"{path} is truncated")
+        magic, version, header_size = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise TableFileError(f"{path} is not a version {FORMAT_VERSION} table file")
+        return _parse_header(source.read(header_size), path)
+
+
+def _parse_header(raw: bytes, path: str | os.PathLike[str]) -> dict[str, Any]:
+    try:
+        header = json.loads(raw)
+    except ValueError as error:  # includes UnicodeDecodeError
+        raise TableFileError(f"{path} has a damaged header") from error
+    if (
+        not isinstance(header, dict)
+        or not {"kind", "key", "meta", "arrays"} <= header.keys()
+        or not isinstance(header["arrays"], list)
+        or not all(isinstance(entry, dict) and {"name", "dtype", "shape", "offset"} <= entry.keys() for entry in header["arrays"])
+    ):
+        raise TableFileError(f"{path} has a damaged header")
+    return header
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
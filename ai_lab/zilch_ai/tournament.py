@@ -0,0 +1,362 @@
+"""Incremental round-robin tournaments with an on-disk result store.
+
+A roster is a list of policy specs (see `build_policy`). `schedule` turns it
+into seatings: every combination of distinct specs for each table size in
+`players`, in each of its cyclic seat rotations. `play_tournament` plays each
+seating over fixed blocks of `block_size` consecutive seeds on common dice,
+so the rotations of a combination share their dice, and stores one
+`GameStats` per (seating, seed block) in a `ResultStore`. Blocks already in
+the store are skipped: adding a policy to the roster only plays the
+seatings it sits in, and raising `games` only plays the new blocks.
+
+`rank` fits Bradley–Terry strengths to the stored win counts without
+replaying anything. A game of more than two players counts as a choice of
+its winner among the seats (Luce's model), so pairs and larger tables feed
+one fit.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from random import Random
+from typing import Iterable, Iterator, Sequence
+
+from .endgame import EndgamePolicy, EndgameTable
+from .ev import EVTable
+from .policies import EVPolicy, GreedyThresholdPolicy, Policy, RandomPolicy
+from .rules import TARGET_SCORE, rules_fingerprint
+from .sim import play_game
+from .stats import GameStats
+from .storage import default_cache_dir
+from .tuning import DEFAULT_TABLE, Candidate, candidates
+
+
+_CANDIDATE_SPEC = re.compile(r"^(\w+)\((.*)\)$")
+
+
+def build_policy(spec: str, target_score: int = TARGET_SCORE, seed: int = 0) -> Policy:
+    """Build the policy a spec names, with `name` set to the spec.
+
+    Specs are `ev`, `endgame`, `random`, `greedy-N`, or a tuning candidate
+    such as `ev(horizon=5, high_free_dice=4000)` or `greedy(bank_threshold=400)`.
+    A `random` policy draws from `Random(seed)`. EV and endgame tables are
+    shared by every policy built in the process.
+    """
+    if spec == "ev":
+        policy: Policy = EVPolicy(_ev_table(DEFAULT_TABLE["max_loose"], DEFAULT_TABLE["horizon"]), target_score)
+    elif spec == "endgame":
+        policy = EndgamePolicy(_endgame_table(target_score))
+    elif spec == "random":
+        policy = RandomPolicy(Random(seed))
+    elif spec.startswith("greedy-") and spec[len("greedy-") :].isdigit():
+        policy = GreedyThresholdPolicy(int(spec[len("greedy-") :]))
+    else:
+        candidate = _parse_candidate(spec)
+        settings = candidate.table_settings()
+        policy = candidate.build(_ev_table(*settings) if settings else None)
+        if isinstance(policy, EVPolicy):
+            policy.target_score = target_score
+    policy.name = spec
+    return policy
+
+
+def check_spec(spec: str) -> str:
+    """Return `spec` if `build_policy` accepts its syntax, else raise `ValueError`.
+
+    Nothing is built, so no table is solved or loaded.
+    """
+    if spec not in ("ev", "endgame", "random") and not (spec.startswith("greedy-") and spec[len("greedy-") :].isdigit()):
+        _parse_candidate(spec)
+    return spec
+
+
+def _parse_candidate(spec: str) -> Candidate:
+    match = _CANDIDATE_SPEC.match(spec.replace(" ", ""))
+    if match is None:
+        raise ValueError(f"unknown policy spec {spec!r}; use ev, endgame, random, greedy-N or family(name=value, ...)")
+    family, body = match.groups()
+    space: dict[str, list[int]] = {}
+    for item in filter(None, body.split(",")):
+        name, _, value = item.partition("=")
+        try:
+            space[name] = [int(value)]
+        except ValueError:
+            raise ValueError(f"expected integer settings in {spec!r}") from None
+    return candidates(family, space)[0]
+
+
+_tables: dict[tuple, EVTable | EndgameTable] = {}
+
+
+def _ev_table(max_loose: int, horizon: int) -> EVTable:
+    key = ("ev", max_loose, horizon)
+    if key not in _tables:
+        _tables[key] = EVTable(max_loose, horizon)
+    return _tables[key]  # type: ignore[return-value]
+
+
+def _endgame_table(target_score: int) -> EndgameTable:
+    key = ("endgame", target_score)
+    if key not in _tables:
+        _tables[key] = EndgameTable(_ev_table(DEFAULT_TABLE["max_loose"], DEFAULT_TABLE["horizon"]), target_score=target_score)
+    return _tables[key]  # type: ignore[return-value]
+
+
+def schedule(roster: Sequence[str], players: Sequence[int] = (2,)) -> list[tuple[str, ...]]:
+    """Every seating of distinct roster specs, each combination in all its seat rotations."""
+    if len(set(roster)) != len(roster):
+        raise ValueError("roster specs must be distinct")
+    seatings = []
+    for size in players:
+        if size < 2 or size > len(roster):
+            raise ValueError(f"cannot seat {size} players from a roster of {len(roster)}")
+        for group in combinations(roster, size):
+            seatings.extend(group[shift:] + group[:shift] for shift in range(size))
+    return seatings
+
+
+class ResultStore:
+    """SQLite file of `GameStats`, one row per (seating, seed block).
+
+    Rows are keyed by the rules fingerprint and the target score too, so a
+    rules change or another target starts from an empty store. Specs name
+    behaviour: after changing what a spec plays like, `forget` it.
+    """
+
+    def __init__(self, path: str | os.PathLike[str] | None = None) -> None:
+        self.path = Path(path) if path is not None else default_cache_dir() / "tournament.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " rules TEXT NOT NULL, target INTEGER NOT NULL, seating TEXT NOT NULL,"
+            " start INTEGER NOT NULL, stop INTEGER NOT NULL, stats TEXT NOT NULL,"
+            " PRIMARY KEY (rules, target, seating, start, stop))"
+        )
+        self._connection.commit()
+
+    def __enter__(self) -> ResultStore:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def blocks(self, target_score: int = TARGET_SCORE) -> set[tuple[tuple[str, ...], int, int]]:
+        """The `(seating, start, stop)` blocks stored for `target_score`."""
+        rows = self._connection.execute(
+            "SELECT seating, start, stop FROM results WHERE rules = ? AND target = ?", (rules_fingerprint(), target_score)
+        )
+        return {(tuple(json.loads(seating)), start, stop) for seating, start, stop in rows}
+
+    def put(self, seating: Sequence[str], start: int, stop: int, stats: GameStats, target_score: int = TARGET_SCORE) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+            (rules_fingerprint(), target_score, json.dumps(list(seating)), start, stop, _dump_stats(stats)),
+        )
+        self._connection.commit()
+
+    def results(self, target_score: int = TARGET_SCORE, roster: Iterable[str] | None = None) -> dict[tuple[str, ...], GameStats]:
+        """Stored stats merged per seating, limited to seatings drawn from `roster`."""
+        allowed = None if roster is None else set(roster)
+        merged: dict[tuple[str, ...], GameStats] = {}
+        rows = self._connection.execute(
+            "SELECT seating, stats FROM results WHERE rules = ? AND target = ?", (rules_fingerprint(), target_score)
+        )
+        for text, stats_text in rows:
+            seating = tuple(json.loads(text))
+            if allowed is not None and not allowed.issuperset(seating):
+                continue
+            stats = _load_stats(stats_text)
+            merged[seating] = merged[seating].merge(stats) if seating in merged else stats
+        return merged
+
+    def forget(self, spec: str) -> int:
+        """Delete every stored block whose seating includes `spec`; return how many."""
+        rows = [
+            (rules, target, seating, start, stop)
+            for rules, target, seating, start, stop in self._connection.execute("SELECT rules, target, seating, start, stop FROM results")
+            if spec in json.loads(seating)
+        ]
+        self._connection.executemany(
+            "DELETE FROM results WHERE rules = ? AND target = ? AND seating = ? AND start = ? AND stop = ?", rows
+        )
+        self._connection.commit()
+        return len(rows)
+
+
+def _dump_stats(stats: GameStats) -> str:
+    return json.dumps(
+        {
+            "players": stats.players,
+            "games": stats.games,
+            "wins": stats.wins,
+            "score_totals": stats.score_totals,
+            "turn_counts": sorted(stats.turn_counts.items()),
+            "margin_counts": sorted(stats.margin_counts.items()),
+        }
+    )
+
+
+def _load_stats(text: str) -> GameStats:
+    data = json.loads(text)
+    stats = GameStats(data["players"], data["games"], data["wins"], data["score_totals"])
+    stats.turn_counts.update(dict(map(tuple, data["turn_counts"])))
+    stats.margin_counts.update(dict(map(tuple, data["margin_counts"])))
+    return stats
+
+
+@dataclass(frozen=True)
+class Rating:
+    spec: str
+    rating: float
+    games: int
+    wins: int
+    expected_wins: float
+
+
+@dataclass(frozen=True)
+class Standings:
+    """Bradley–Terry ratings on the Elo scale, best first, averaging 1500."""
+
+    ratings: tuple[Rating, ...]
+    games: int
+    seatings: int
+
+    def format(self) -> str:
+        lines = [
+            f"{len(self.ratings)} policies, {self.seatings} seatings, {self.games} games",
+            f"{'rank':>4}  {'policy':<40} {'rating':>7} {'games':>8} {'wins':>8} {'expected':>9}",
+        ]
+        for place, rating in enumerate(self.ratings, start=1):
+            lines.append(
+                f"{place:>4}  {rating.spec:<40} {rating.rating:>7.0f} {rating.games:>8} {rating.wins:>8} {rating.expected_wins:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+def rank(results: dict[tuple[str, ...], GameStats], prior: float = 1.0, tolerance: float = 1e-9, max_iterations: int = 10_000) -> Standings:
+    """Fit Bradley–Terry strengths to per-seating win counts.
+
+    Each seating's games are choices of a winner among its specs, with
+    probability proportional to strength. Hunter's MM updates find the
+    maximum, with `prior` virtual wins and losses per spec against an
+    opponent of average strength so unbeaten or winless specs stay finite.
+    """
+    specs = sorted({spec for seating in results for spec in seating})
+    if not specs:
+        return Standings((), 0, 0)
+    position = {spec: index for index, spec in enumerate(specs)}
+    won = [0] * len(specs)
+    games = [0] * len(specs)
+    groups = []
+    for seating, stats in results.items():
+        members = [position[spec] for spec in seating]
+        groups.append((members, stats.games))
+        for seat, member in enumerate(members):
+            won[member] += stats.wins[seat]
+            games[member] += stats.games
+
+    strength = [1.0] * len(specs)
+    for _ in range(max_iterations):
+        exposure = [2 * prior / (value + 1.0) for value in strength]
+        for members, count in groups:
+            share = count / sum(strength[member] for member in members)
+            for member in members:
+                exposure[member] += share
+        updated = [(won[index] + prior) / exposure[index] for index in range(len(specs))]
+        scale = math.exp(sum(math.log(value) for value in updated) / len(updated))
+        updated = [value / scale for value in updated]
+        change = max(abs(math.log(new / old)) for new, old in zip(updated, strength))
+        strength = updated
+        if change < tolerance:
+            break
+
+    expected = [0.0] * len(specs)
+    for members, count in groups:
+        total = sum(strength[member] for member in members)
+        for member in members:
+            expected[member] += count * strength[member] / total
+    ratings = [
+        Rating(spec, 1500 + 400 * math.log10(strength[index]), games[index], won[index], expected[index])
+        for index, spec in enumerate(specs)
+    ]
+    ratings.sort(key=lambda rating: -rating.rating)
+    return Standings(tuple(ratings), sum(stats.games for stats in results.values()), len(results))
+
+
+@dataclass(frozen=True)
+class TournamentReport:
+    standings: Standings
+    played: int
+    stored: int
+    games_played: int
+
+
+def play_tournament(
+    roster: Sequence[str],
+    store: ResultStore,
+    games: int = 1_000,
+    players: Sequence[int] = (2,),
+    block_size: int = 250,
+    seed: int = 20260617,
+    workers: int | None = None,
+    target_score: int = TARGET_SCORE,
+) -> TournamentReport:
+    """Play the seed blocks of `roster`'s seatings missing from `store`, then rank.
+
+    Every seating plays seeds `seed + b * block_size` up to `seed + (b + 1) *
+    block_size` for each block `b` covering `games` (rounded up to whole
+    blocks). Blocks are played on a process pool with `workers` and stored
+    as they finish, so an interrupted run loses at most the blocks in flight.
+    """
+    if games <= 0 or block_size <= 0:
+        raise ValueError("games and block_size must be positive")
+    # Build every spec once up front: bad specs fail early and tables are
+    # solved and cached before the workers map them.
+    for spec in roster:
+        build_policy(spec, target_score)
+    seatings = schedule(roster, players)
+    stored = store.blocks(target_score)
+    starts = range(seed, seed + games, block_size)
+    jobs = [(seating, start, start + block_size) for seating in seatings for start in starts]
+    missing = [job for job in jobs if job not in stored]
+
+    games_played = 0
+    for seating, start, stop, stats in _play_blocks(missing, target_score, workers):
+        store.put(seating, start, stop, stats, target_score)
+        games_played += stats.games
+    standings = rank(store.results(target_score, roster))
+    return TournamentReport(standings, len(missing), len(jobs) - len(missing), games_played)
+
+
+def _play_blocks(
+    jobs: list[tuple[tuple[str, ...], int, int]], target_score: int, workers: int | None
+) -> Iterator[tuple[tuple[str, ...], int, int, GameStats]]:
+    if not workers or workers <= 1 or len(jobs) <= 1:
+        for seating, start, stop in jobs:
+            yield seating, start, stop, play_block(seating, start, stop, target_score)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(play_block, seating, start, stop, target_score): (seating, start, stop) for seating, start, stop in jobs}
+        for future in as_completed(futures):
+            yield (*futures[future], future.result())
+
+
+def play_block(seating: Sequence[str], start: int, stop: int, target_score: int = TARGET_SCORE) -> GameStats:
+    """Play seeds `start` to `stop` with `seating` on common dice."""
+    policies = [build_policy(spec, target_score, seed=start) for spec in seating]
+    stats = GameStats(len(policies))
+    for game_seed in range(start, stop):
+        stats.add(play_game(policies, seed=game_seed, target_score=target_score, common_dice=True))
+    return stats
@@ -0,0 +1,239 @@
+"""Policy hyperparameter tuning by successive halving.
+
+A search space lists values for the settings of one policy family:
+`GreedyThresholdPolicy`'s `bank_threshold`, or `EVPolicy`'s closing buffers
+and the `EVTable` `horizon` and `max_loose` it plays from. Every combination
+is a `Candidate`.
+
+`successive_halving` races the candidates against a reference lineup. In
+round `r` each survivor plays `initial_seeds * eta ** r` new seeds, and every
+seed is played once with the candidate in each seat, on common dice. All
+candidates see the same seeds, so their win rates differ by play rather
+than by luck. After each round only the best `1 / eta` go on. Games run on a
+process pool with `workers`. EV tables are solved once per `(max_loose,
+horizon)` and shared by every candidate that uses those settings; workers
+map the cached files.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import product
+from random import Random
+from typing import Mapping, Sequence
+
+from .ev import EVTable
+from .policies import EVPolicy, GreedyThresholdPolicy, Policy
+from .sim import play_game
+from .stats import wilson_interval
+
+
+DEFAULT_TABLE = {"max_loose": 8_000, "horizon": 7}
+PARAMETERS = {
+    "greedy": ("bank_threshold",),
+    "ev": ("max_loose", "horizon", *EVPolicy.closing_buffers),
+}
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One point of a search space: a policy family and its settings."""
+
+    family: str
+    params: tuple[tuple[str, int], ...]
+
+    @property
+    def name(self) -> str:
+        settings = ", ".join(f"{key}={value}" for key, value in self.params)
+        return f"{self.family}({settings})"
+
+    def table_settings(self) -> tuple[int, int] | None:
+        """`(max_loose, horizon)` of the EV table this candidate plays from, if any."""
+        if self.family != "ev":
+            return None
+        params = {**DEFAULT_TABLE, **dict(self.params)}
+        return params["max_loose"], params["horizon"]
+
+    def build(self, table: EVTable | None = None) -> Policy:
+        params = dict(self.params)
+        if self.family == "greedy":
+            policy: Policy = GreedyThresholdPolicy(**params)
+        else:
+            policy = EVPolicy(table)
+            buffers = {key: params[key] for key in EVPolicy.closing_buffers if key in params}
+            if buffers:
+                policy.closing_buffers = {**EVPolicy.closing_buffers, **buffers}
+        policy.name = self.name
+        return policy
+
+
+def candidates(family: str, space: Mapping[str, Sequence[int]]) -> list[Candidate]:
+    """Every combination of the values in `space`, in the order given."""
+    if family not in PARAMETERS:
+        raise ValueError(f"unknown policy family {family!r}; expected one of {sorted(PARAMETERS)}")
+    unknown = set(space) - set(PARAMETERS[family])
+    if unknown:
+        raise ValueError(f"{family} has no parameters {sorted(unknown)}; expected {PARAMETERS[family]}")
+    names = list(space)
+    return [Candidate(family, tuple(zip(names, values))) for values in product(*(space[name] for name in names))]
+
+
+@dataclass(frozen=True)
+class CandidateScore:
+    candidate: Candidate
+    wins: int
+    games: int
+    rounds: int
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    def interval(self, confidence: float = 0.95) -> tuple[float, float]:
+        return wilson_interval(self.wins, self.games, confidence)
+
+
+@dataclass(frozen=True)
+class TuningReport:
+    """Candidates ranked by the round they reached, then by win rate."""
+
+    ranking: tuple[CandidateScore, ...]
+    reference: tuple[str, ...]
+    rounds: int
+    games: int
+    tables: int
+
+    @property
+    def best(self) -> Candidate:
+        return self.ranking[0].candidate
+
+    def format(self) -> str:
+        seats = len(self.reference) + 1
+        lines = [
+            f"{len(self.ranking)} candidates vs {' + '.join(self.reference)}: {self.rounds} rounds, "
+            f"{self.games} games, {self.tables} EV tables (even share {100 / seats:.1f}%)",
+            f"{'rank':>4}  {'candidate':<48} {'rounds':>6} {'games':>7} {'win rate':>8}  95% CI",
+        ]
+        for rank, score in enumerate(self.ranking, start=1):
+            low, high = score.interval()
+            lines.append(
+                f"{rank:>4}  {score.candidate.name:<48} {score.rounds:>6} {score.games:>7} "
+                f"{score.win_rate * 100:>7.1f}%  {low * 100:.1f}-{high * 100:.1f}%"
+            )
+        return "\n".join(lines)
+
+
+def successive_halving(
+    candidates: Sequence[Candidate],
+    reference: Sequence[Policy],
+    initial_seeds: int = 50,
+    eta: int = 2,
+    max_rounds: int | None = None,
+    seed: int = 20260617,
+    workers: int | None = None,
+    cache: bool | str | os.PathLike[str] = True,
+) -> TuningReport:
+    """Race `candidates` against `reference` and rank them.
+
+    Rounds go on until one candidate is left or `max_rounds` have been
+    played. `cache` is passed to every `EVTable` the candidates need.
+    """
+    if not candidates or not reference:
+        raise ValueError("need at least one candidate and one reference policy")
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+
+    # Solve each distinct table once, up front, so workers only map it.
+    tables = {settings: EVTable(*settings, cache=cache) for settings in {c.table_settings() for c in candidates} if settings}
+    rng = Random(seed)
+    totals = {candidate: [0, 0, 0] for candidate in candidates}
+    survivors = list(candidates)
+    rounds = 0
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(tuple(reference), tables)) if workers and workers > 1 else None
+    arena = _Arena(tuple(reference), tables)
+    try:
+        while survivors and (max_rounds is None or rounds < max_rounds):
+            seeds = [rng.randrange(2**32) for _ in range(initial_seeds * eta**rounds)]
+            for candidate, (wins, games) in zip(survivors, _play_round(survivors, seeds, arena, pool, workers)):
+                totals[candidate][0] += wins
+                totals[candidate][1] += games
+                totals[candidate][2] += 1
+            rounds += 1
+            if len(survivors) == 1:
+                break
+            survivors.sort(key=lambda candidate: -totals[candidate][0] / totals[candidate][1])
+            survivors = survivors[: -(-len(survivors) // eta)]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    scores = [CandidateScore(candidate, *totals[candidate]) for candidate in candidates]
+    scores.sort(key=lambda score: (-score.rounds, -score.win_rate))
+    return TuningReport(
+        tuple(scores),
+        tuple(policy.name for policy in reference),
+        rounds,
+        sum(score.games for score in scores),
+        len(tables),
+    )
+
+
+class _Arena:
+    """Plays candidates against the reference, building each candidate once."""
+
+    def __init__(self, reference: tuple[Policy, ...], tables: dict[tuple[int, int], EVTable]) -> None:
+        self.reference = reference
+        self.tables = tables
+        self.policies: dict[Candidate, Policy] = {}
+
+    def play(self, candidate: Candidate, seeds: Sequence[int]) -> tuple[int, int]:
+        """Candidate wins and games over `seeds`, with the candidate in every seat."""
+        policy = self.policies.get(candidate)
+        if policy is None:
+            settings = candidate.table_settings()
+            policy = self.policies[candidate] = candidate.build(self.tables[settings] if settings else None)
+        wins = games = 0
+        for game_seed in seeds:
+            for seat in range(len(self.reference) + 1):
+                lineup = [*self.reference[:seat], policy, *self.reference[seat:]]
+                wins += play_game(lineup, seed=game_seed, common_dice=True).winner_index == seat
+                games += 1
+        return wins, games
+
+
+_worker_arena: _Arena | None = None
+
+
+def _init_worker(reference: tuple[Policy, ...], tables: dict[tuple[int, int], EVTable]) -> None:
+    global _worker_arena
+    _worker_arena = _Arena(reference, tables)
+
+
+def _play_shard(candidate: Candidate, seeds: list[int]) -> tuple[int, int]:
+    assert _worker_arena is not None
+    return _worker_arena.play(candidate, seeds)
+
+
+def _play_round(
+    survivors: Sequence[Candidate],
+    seeds: list[int],
+    arena: _Arena,
+    pool: ProcessPoolExecutor | None,
+    workers: int | None,
+) -> list[tuple[int, int]]:
+    if pool is None:
+        return [arena.play(candidate, seeds) for candidate in survivors]
+    # Split each candidate's seeds so small rounds still fill the pool.
+    shards = max(1, min(len(seeds), -(-2 * (workers or 1) // len(survivors))))
+    size = -(-len(seeds) // shards)
+    futures = [
+        [pool.submit(_play_shard, candidate, seeds[start : start + size]) for start in range(0, len(seeds), size)]
+        for candidate in survivors
+    ]
+    results = []
+    for shard_futures in futures:
+        shard_results = [future.result() for future in shard_futures]
+        results.append((sum(wins for wins, _ in shard_results), sum(games for _, games in shard_results)))
+    return results